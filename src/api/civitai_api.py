@@ -1,29 +1,66 @@
 
+import os
 import re
+import hashlib
 import requests
 import json
 import time
-from concurrent.futures import ThreadPoolExecutor
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Callable
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Callable
 from urllib.parse import urlparse
 
+from src.api.http_session import HttpSessionPool
 from src.models.model_info import ModelInfo
+from src.utils.bandwidth_limiter import BandwidthLimiter
+from src.utils.disk_writer import DiskWriter
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+class ChecksumMismatchError(Exception):
+    """Raised when a downloaded file does not match its published hash"""
+    pass
+
+class DownloadStoppedError(Exception):
+    """Raised to abort a transfer whose download was cancelled or paused"""
+    pass
+
 class CivitaiAPI:
     """
     API client for interacting with Civitai
     """
     BASE_URL = "https://civitai.com/api/v1"
     
-    def __init__(self, api_key: str = "", fetch_batch_size: int = 100, rate_limit_delay: float = 0.5):
+    # Bounds for the transfer read size, which adapts to the link speed
+    MIN_CHUNK_SIZE = 64 * 1024
+    MAX_CHUNK_SIZE = 4 * 1024 * 1024
+    
+    # Seconds between progress reports (and resume state saves) during transfers
+    PROGRESS_INTERVAL = 0.5
+    
+    # File types in a version's files[] that are variants of the model itself
+    MODEL_FILE_TYPES = ("Model", "Pruned Model")
+    
+    def __init__(self, api_key: str = "", fetch_batch_size: int = 100, rate_limit_delay: float = 0.5,
+                 bandwidth_limiter: Optional[BandwidthLimiter] = None,
+                 session_pool: Optional[HttpSessionPool] = None,
+                 disk_writer: Optional[DiskWriter] = None,
+                 file_preferences: Optional[Dict[str, str]] = None):
         self.api_key = api_key
         self.fetch_batch_size = fetch_batch_size
         self.rate_limit_delay = rate_limit_delay  # Delay between API calls in seconds
         self.last_request_time = 0
+        self.rate_limit_lock = threading.Lock()
+        self.bandwidth_limiter = bandwidth_limiter  # Shared by all transfers, if set
+        self.session_pool = session_pool or HttpSessionPool()
+        self.disk_writer = disk_writer or DiskWriter()  # Writes inline unless a shared writer is given
+        self.file_preferences = file_preferences or {}  # Preferred file variant: format, size and fp
+    
+    def get_session(self) -> requests.Session:
+        """Get the pooled HTTP session for the calling thread"""
+        return self.session_pool.get_session()
     
     def get_headers(self) -> Dict:
         """Get request headers with API key if available"""
@@ -36,10 +73,23 @@ class CivitaiAPI:
     
     def _respect_rate_limit(self):
         """Respect rate limiting by adding delay between requests"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.rate_limit_delay:
-            time.sleep(self.rate_limit_delay - elapsed)
-        self.last_request_time = time.time()
+        # The client is shared by all workers, so the delay applies across threads
+        with self.rate_limit_lock:
+            elapsed = time.time() - self.last_request_time
+            if elapsed < self.rate_limit_delay:
+                time.sleep(self.rate_limit_delay - elapsed)
+            self.last_request_time = time.time()
+    
+    def throttle(self, num_bytes: int, flow: Optional[Hashable] = None) -> None:
+        """
+        Block until the shared bandwidth limit allows num_bytes more
+        
+        Args:
+            num_bytes: Number of bytes transferred
+            flow: Key of the transfer the bytes belong to, whose weight sets its share
+        """
+        if self.bandwidth_limiter:
+            self.bandwidth_limiter.consume(num_bytes, flow)
     
     def fetch_json(self, url: str, params: Dict = None) -> Dict:
         """
@@ -55,14 +105,15 @@ class CivitaiAPI:
         self._respect_rate_limit()
         
         try:
-            r = requests.get(url, headers=self.get_headers(), params=params, timeout=30)
+            r = self.get_session().get(url, headers=self.get_headers(), params=params, timeout=30)
             r.raise_for_status()
             return r.json()
         except requests.RequestException as e:
             logger.error(f"API request failed: {str(e)}")
             return {}
     
-    def parse_url(self, url: str) -> Tuple[Optional[int], Optional[int]]:
+    @staticmethod
+    def parse_url(url: str) -> Tuple[Optional[int], Optional[int]]:
         """
         Extract model ID and version ID from Civitai URL
         
@@ -89,8 +140,33 @@ class CivitaiAPI:
             
         return None, None
     
+    @staticmethod
+    def canonical_url(url: str) -> str:
+        """
+        Get one spelling for all URLs of the same model or model version
+        
+        /models/123, /models/123?modelVersionId=456 and
+        /models/123/versions/456 differ only in form; the result is
+        https://civitai.com/models/123 with ?modelVersionId=456 when a
+        version is given.
+        
+        Args:
+            url: Civitai URL
+            
+        Returns:
+            Canonical URL, or the URL unchanged if it isn't a model URL
+        """
+        model_id, version_id = CivitaiAPI.parse_url(url)
+        if not model_id:
+            return url
+        canonical = f"https://civitai.com/models/{model_id}"
+        if version_id:
+            canonical += f"?modelVersionId={version_id}"
+        return canonical
+    
     def fetch_model_info(self, model_id: int, version_id: Optional[int] = None, 
-                        max_images: int = 500) -> Optional[ModelInfo]:
+                        max_images: int = 500,
+                        stop_check: Callable[[], bool] = None) -> Optional[ModelInfo]:
         """
         Fetch model information from Civitai API
         
@@ -98,9 +174,11 @@ class CivitaiAPI:
             model_id: Model ID
             version_id: Version ID (optional)
             max_images: Maximum number of images to fetch
+            stop_check: Callable returning True when fetching should stop
+                (e.g. cancelled); checked before every request
             
         Returns:
-            ModelInfo object or None if failed
+            ModelInfo object or None if failed or stopped
         """
         logger.info(f"Fetching model information for model ID: {model_id}")
         
@@ -127,6 +205,9 @@ class CivitaiAPI:
             version_id = model_data["modelVersions"][0]["id"]
             logger.info(f"Using latest version ID: {version_id}")
         
+        if stop_check and stop_check():
+            return None
+            
         # Fetch version data
         version_url = f"{self.BASE_URL}/model-versions/{version_id}"
         version_data = self.fetch_json(version_url)
@@ -135,14 +216,24 @@ class CivitaiAPI:
             logger.error("Failed to fetch version data")
             return None
             
-        download_url = version_data.get("downloadUrl", "")
         tags = version_data.get("trainedWords", [])
         base_model = version_data.get("baseModel", "unknown")
         version_name = version_data.get("name", "")
         
+        # Pick the file variant to download and get its published hashes
+        files = version_data.get("files", [])
+        model_file = self._select_model_file(version_data)
+        download_url = model_file.get("downloadUrl") or version_data.get("downloadUrl", "")
+        file_hashes = model_file.get("hashes", {})
+        if model_file.get("name"):
+            metadata = model_file.get("metadata") or {}
+            logger.info(
+                f"Selected file {model_file['name']} ({metadata.get('fp') or '-'}, "
+                f"{metadata.get('size') or '-'}, {metadata.get('format') or '-'})"
+            )
+        
         # Extract dependencies
         dependencies = []
-        files = version_data.get("files", [])
         for file in files:
             # Look for required VAE or other requirements
             if file.get("type") == "VAE":
@@ -171,7 +262,9 @@ class CivitaiAPI:
         
         # Fetch images
         logger.info("Fetching images...")
-        images = self.fetch_images(model_id, version_id, max_images)
+        images = self.fetch_images(model_id, version_id, max_images, stop_check)
+        if stop_check and stop_check():
+            return None
         logger.info(f"Found {len(images)} images")
         
         model_info = ModelInfo(
@@ -188,7 +281,9 @@ class CivitaiAPI:
             nsfw=nsfw,
             creator=creator,
             stats=stats,
-            dependencies=dependencies
+            dependencies=dependencies,
+            file_hashes=file_hashes,
+            size=int(model_file.get("sizeKB", 0) * 1024)
         )
         
         # Calculate overall rating
@@ -196,8 +291,96 @@ class CivitaiAPI:
         
         return model_info
     
+    def _get_primary_file(self, version_data: Dict) -> Dict:
+        """Get the file entry behind the downloadUrl of a model version"""
+        download_url = version_data.get("downloadUrl", "")
+        files = version_data.get("files", [])
+        return next(
+            (f for f in files if download_url and f.get("downloadUrl") == download_url),
+            next((f for f in files if f.get("primary")), files[0] if files else {})
+        )
+    
+    def _select_model_file(self, version_data: Dict) -> Dict:
+        """
+        Choose the file variant of a model version to download
+        
+        Among the model files of the version, the one matching most of the
+        file preferences wins; the format preference outranks the size one,
+        which outranks the precision one. Ties go to the primary file, then
+        to SafeTensors over pickled files; versions without alternatives
+        always use the primary file.
+        
+        Args:
+            version_data: Model version data from the API
+            
+        Returns:
+            File entry from files[], or an empty dict if there are none
+        """
+        primary = self._get_primary_file(version_data)
+        candidates = [
+            f for f in version_data.get("files", [])
+            if f.get("type", "Model") in self.MODEL_FILE_TYPES and f.get("downloadUrl")
+        ]
+        preferences = [
+            (key, value.lower()) for key, value in (
+                ("format", self.file_preferences.get("format", "any")),
+                ("size", self.file_preferences.get("size", "any")),
+                ("fp", self.file_preferences.get("fp", "any")),
+            )
+            if value and value != "any"
+        ]
+        if len(candidates) < 2 or not preferences:
+            return primary
+            
+        def score(f):
+            metadata = f.get("metadata") or {}
+            matches = tuple(str(metadata.get(key, "")).lower() == value for key, value in preferences)
+            return matches + (f is primary, str(metadata.get("format", "")).lower() == "safetensor")
+        
+        return max(candidates, key=score)
+    
+    def fetch_file_size(self, url: str) -> int:
+        """
+        Get the size of the model file behind a model URL without downloading it
+        
+        Uses the size published with the version files, or a HEAD request on
+        the download URL if the API doesn't list one.
+        
+        Args:
+            url: Civitai model URL
+            
+        Returns:
+            Size in bytes, or 0 if it couldn't be determined
+        """
+        model_id, version_id = self.parse_url(url)
+        if not model_id:
+            return 0
+            
+        if version_id:
+            version_data = self.fetch_json(f"{self.BASE_URL}/model-versions/{version_id}")
+        else:
+            # The model endpoint lists its versions, newest first
+            versions = self.fetch_json(f"{self.BASE_URL}/models/{model_id}").get("modelVersions") or [{}]
+            version_data = versions[0]
+            
+        model_file = self._select_model_file(version_data)
+        size = int(model_file.get("sizeKB", 0) * 1024)
+        download_url = model_file.get("downloadUrl") or version_data.get("downloadUrl")
+        if size or not download_url:
+            return size
+            
+        try:
+            self._respect_rate_limit()
+            r = self.get_session().head(download_url, headers=self.get_headers(), allow_redirects=True, timeout=30)
+            r.close()
+            return int(r.headers.get("content-length", 0)) if r.ok else 0
+        except requests.RequestException as e:
+            logger.error(f"Size probe failed for {url}: {str(e)}")
+            return 0
+    
     def fetch_images(self, model_id: int, version_id: Optional[int], 
-                    max_images: int = 500) -> List[Dict]:
+                    max_images: int = 500,
+                    stop_check: Callable[[], bool] = None) -> List[Dict]:
         """
         Fetch images for the model
         
@@ -205,6 +388,7 @@ class CivitaiAPI:
             model_id: Model ID
             version_id: Version ID (optional)
             max_images: Maximum number of images to fetch
+            stop_check: Callable returning True when no more pages should be fetched
             
         Returns:
             List of image dictionaries
@@ -213,7 +397,7 @@ class CivitaiAPI:
             items = []
             cursor = None
             
-            while True:
+            while not (stop_check and stop_check()):
                 params = {
                     "modelId": model_id,
                     "limit": self.fetch_batch_size,
@@ -279,23 +463,210 @@ class CivitaiAPI:
             logger.error(f"Error fetching images: {str(e)}")
             return []
     
+    def get_part_path(self, out_path: Path) -> Path:
+        """Get the path of the partial download file for a final file path"""
+        return out_path.with_name(out_path.name + ".part")
+    
+    def _load_part_state(self, state_path: Path) -> Dict:
+        """Load the resume state saved next to a partial download"""
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_part_state(self, state_path: Path, state: Dict) -> None:
+        """Save the resume state next to a partial download"""
+        with open(state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+    
+    def _new_part_state(self, r: requests.Response, total: int) -> Dict:
+        """Create the resume state for a response"""
+        return {
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "total": total
+        }
+    
+    def _get_resume_validator(self, state: Dict) -> Optional[str]:
+        """Get the If-Range validator for a partial download, if it has one"""
+        etag = state.get("etag")
+        # Weak ETags are not allowed in If-Range
+        if etag and not etag.startswith("W/"):
+            return etag
+        return state.get("last_modified")
+    
+    def _split_segments(self, total: int, segments: int) -> List[List[int]]:
+        """Split a file into [start, end, done] byte ranges of roughly equal size"""
+        size = total // segments
+        ranges = []
+        for i in range(segments):
+            start = i * size
+            end = total - 1 if i == segments - 1 else start + size - 1
+            ranges.append([start, end, 0])
+        return ranges
+    
+    def _create_hasher(self, expected_hashes: Optional[Dict]) -> Tuple[Optional[str], Any]:
+        """
+        Create a hasher for the strongest published hash we can compute
+        
+        Args:
+            expected_hashes: Hashes published by Civitai (e.g. {"SHA256": "..."})
+            
+        Returns:
+            Tuple of (expected hex digest, hasher), or (None, None) if the file
+            can't be verified
+        """
+        hashes = {k.upper(): v for k, v in (expected_hashes or {}).items() if v}
+        
+        if "SHA256" in hashes:
+            return hashes["SHA256"].lower(), hashlib.sha256()
+            
+        if "BLAKE3" in hashes:
+            try:
+                from blake3 import blake3
+                return hashes["BLAKE3"].lower(), blake3()
+            except ImportError:
+                logger.warning("Only a BLAKE3 hash is published and the blake3 package is not installed, skipping verification")
+                
+        return None, None
+    
+    def _hash_file_range(self, hasher, path: Path, start: int, end: int) -> None:
+        """Feed bytes [start, end) of a file into a hasher"""
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                data = f.read(min(1024 * 1024, remaining))
+                if not data:
+                    break
+                hasher.update(data)
+                remaining -= len(data)
+    
+    def _verify_hash(self, hasher, expected: str, path: Path) -> None:
+        """Delete a file and raise ChecksumMismatchError if its hash doesn't match"""
+        actual = hasher.hexdigest()
+        if actual != expected:
+            path.unlink(missing_ok=True)
+            raise ChecksumMismatchError(
+                f"Checksum mismatch for {path.name}: expected {expected}, got {actual}"
+            )
+        logger.info(f"Verified checksum of {path.name}")
+    
+    def _read_chunks(self, r: requests.Response):
+        """
+        Yield the body of a streamed response as views of one reused buffer
+        
+        Reads grow while they complete quickly and shrink on slow links, and
+        stay below a quarter second of the bandwidth limit so stop checks and
+        progress remain responsive. Each view is only valid until the next
+        one is produced.
+        
+        Args:
+            r: Response opened with stream=True
+        """
+        encoding = r.headers.get("content-encoding", "identity").lower()
+        if encoding not in ("", "identity"):
+            # Compressed bodies have to go through the requests decoder
+            yield from r.iter_content(self.MIN_CHUNK_SIZE)
+            return
+        
+        view = memoryview(bytearray(self.MAX_CHUNK_SIZE))
+        size = self.MIN_CHUNK_SIZE
+        while True:
+            limit = self.MAX_CHUNK_SIZE
+            if self.bandwidth_limiter and self.bandwidth_limiter.is_limited():
+                limit = max(self.MIN_CHUNK_SIZE, min(limit, self.bandwidth_limiter.get_rate() // 4))
+            size = min(size, limit)
+            
+            started = time.monotonic()
+            n = r.raw.readinto(view[:size])
+            if not n:
+                return
+            elapsed = time.monotonic() - started
+            
+            yield view[:n]
+            
+            if n == size and elapsed < 0.1:
+                size = min(size * 2, limit)
+            elif elapsed > 0.5:
+                size = max(size // 2, self.MIN_CHUNK_SIZE)
+    
+    def _preallocate(self, f, size: int) -> None:
+        """Reserve disk space for a file so it doesn't fragment while it fills in"""
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+                return
+            except OSError:
+                pass
+        # Sparse file, e.g. on Windows or filesystems without fallocate
+        f.truncate(size)
+    
     def download_file(self, url: str, output_path: Path, 
                      progress_callback: Callable = None,
-                     callback_interval: int = 5) -> Optional[Path]:
+                     stop_check: Callable[[], bool] = None,
+                     segments: int = 1,
+                     segment_min_size: int = 0,
+                     expected_hashes: Dict = None,
+                     space_check: Callable[[int, Path], bool] = None,
+                     bandwidth_flow: Optional[Hashable] = None,
+                     library_folder: Optional[Path] = None) -> Optional[Path]:
         """
         Download a file with progress reporting
         
+        The file is written to a ".part" file next to the final path and only
+        renamed once complete. An existing ".part" file is resumed with a Range
+        request guarded by If-Range, so a file that changed on the server is
+        downloaded again from the start. When the size is known the ".part"
+        file is preallocated, and the number of bytes written is kept in the
+        resume state.
+        
+        Files of at least segment_min_size bytes are fetched over several
+        parallel range requests when the server advertises range support.
+        
+        When expected_hashes are given, the file is hashed while it downloads
+        and deleted if it doesn't match.
+        
         Args:
             url: URL to download
             output_path: Path to save the file
             progress_callback: Callback function for progress updates
-            callback_interval: How often to call the progress callback (percent)
+                (percent, bytes since last call, total bytes), called every
+                PROGRESS_INTERVAL seconds
+            stop_check: Callable returning True when the download should stop
+                early (e.g. paused or cancelled), checked for every chunk; the
+                response is closed and the partial file is kept for resuming
+            segments: Number of parallel connections for large files
+            segment_min_size: Minimum file size in bytes for a segmented download
+            expected_hashes: Hashes published for the file (SHA256 or BLAKE3)
+            space_check: Callable given the file size from Content-Length
+                and the path of the partial file before anything is written;
+                the download doesn't start if it returns False
+            bandwidth_flow: Key the transfer's bytes are counted under by the
+                bandwidth limiter, for priority-weighted sharing
+            library_folder: Folder the file is moved to when output_path is a
+                staging folder; a complete file already there is used instead
+                of downloading it again
             
         Returns:
             Path to downloaded file if successful, None otherwise
+            
+        Raises:
+            ChecksumMismatchError: If the downloaded file doesn't match its hash
         """
+        # Restarts go through the same admission check and reserve the same space again
+        retry_args = dict(
+            progress_callback=progress_callback,
+            stop_check=stop_check,
+            expected_hashes=expected_hashes,
+            space_check=space_check,
+            bandwidth_flow=bandwidth_flow
+        )
+        expected_hash, hasher = self._create_hasher(expected_hashes)
+        
         try:
-            r = requests.get(url, headers=self.get_headers(), stream=True)
+            r = self.get_session().get(url, headers=self.get_headers(), stream=True, timeout=30)
             r.raise_for_status()
             
             # Get filename from content-disposition or URL
@@ -307,47 +678,351 @@ class CivitaiAPI:
                 
             out_path = output_path / fname
             
-            # Check if file already exists
-            if out_path.exists():
-                logger.info(f"File already exists: {out_path}")
-                return out_path
+            # Check if file already exists (only complete files get the final name)
+            library_path = library_folder / fname if library_folder else None
+            existing_path = out_path if out_path.exists() else library_path
+            if existing_path and existing_path.exists():
+                r.close()
+                if hasher:
+                    self._hash_file_range(hasher, existing_path, 0, existing_path.stat().st_size)
+                    if hasher.hexdigest() != expected_hash:
+                        logger.warning(f"Existing file doesn't match its published hash, downloading again: {existing_path}")
+                        # A bad copy in the library is replaced when the new one is moved there
+                        if existing_path == out_path:
+                            out_path.unlink()
+                        return self.download_file(url, output_path, segments=segments,
+                                                  segment_min_size=segment_min_size, **retry_args)
+                logger.info(f"File already exists: {existing_path}")
+                return existing_path
+            
+            part_path = self.get_part_path(out_path)
+            state_path = part_path.with_name(part_path.name + ".json")
+            
+            # Resume an earlier partial download if we can validate it
+            offset = 0
+            state = self._load_part_state(state_path) if part_path.exists() else {}
+            validator = self._get_resume_validator(state)
+            
+            if validator and state.get("segments"):
+                r.close()
+                logger.info(f"Resuming segmented download of {fname}")
+                return self._finish_segmented(
+                    url, r.url, output_path, out_path, state_path, state,
+                    expected_hash, hasher, retry_args
+                )
+            
+            if validator:
+                # Preallocated files record how much was written, older ones are appended to
+                size = part_path.stat().st_size
+                offset = min(state.get("downloaded", size), size)
+            
+            if offset > 0:
+                r.close()
+                headers = self.get_headers()
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validator
+                r = self.get_session().get(url, headers=headers, stream=True, timeout=30)
+                
+                if r.status_code == 416:
+                    r.close()
+                    if offset == state.get("total"):
+                        # Everything was already transferred before the interruption
+                        if hasher:
+                            self._hash_file_range(hasher, part_path, 0, offset)
+                            self._verify_hash(hasher, expected_hash, part_path)
+                        part_path.replace(out_path)
+                        state_path.unlink(missing_ok=True)
+                        logger.info(f"Completed partial download: {out_path}")
+                        return out_path
+                    
+                    logger.warning(f"Partial file does not match remote file, restarting: {part_path}")
+                    offset = 0
+                    r = self.get_session().get(url, headers=self.get_headers(), stream=True, timeout=30)
+                elif r.status_code != 206:
+                    # File changed on the server or ranges are not supported
+                    logger.info(f"Server ignored resume request, restarting: {fname}")
+                    offset = 0
+                else:
+                    logger.info(f"Resuming download of {fname} at {offset} bytes")
+                
+                r.raise_for_status()
                 
             # Get file size for progress reporting
             total = int(r.headers.get('content-length', 0))
-            downloaded = 0
-            last_progress = 0
-            last_report_time = 0
-            current_chunk_size = 0  # To track bytes since last callback
-            
-            with open(out_path, 'wb') as f:
-                for chunk in r.iter_content(8192):
-                    if not chunk:
-                        continue
-                        
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    current_chunk_size += len(chunk)
+            if total:
+                total += offset
+            
+            if space_check and total and not space_check(total, part_path):
+                r.close()
+                return None
+                
+            state = self._new_part_state(r, total)
+            
+            # Split large files over several connections when the server allows it
+            if (offset == 0 and segments > 1 and total and total >= segment_min_size
+                    and r.headers.get("Accept-Ranges", "").lower() == "bytes"
+                    and self._get_resume_validator(state)):
+                r.close()
+                state["segments"] = self._split_segments(total, segments)
+                
+                # Size the file up front so every segment can write into its region
+                with open(part_path, 'wb') as f:
+                    self._preallocate(f, total)
+                self._save_part_state(state_path, state)
+                
+                logger.info(f"Downloading {fname} in {segments} segments")
+                return self._finish_segmented(
+                    url, r.url, output_path, out_path, state_path, state,
+                    expected_hash, hasher, retry_args
+                )
+            
+            downloaded = offset
+            state["downloaded"] = downloaded
+            self._save_part_state(state_path, state)
+            
+            # The hash has to cover the bytes we already have
+            if hasher and offset:
+                self._hash_file_range(hasher, part_path, 0, offset)
+            
+            reported = downloaded  # Bytes already passed to the progress callback
+            last_report_time = time.monotonic()
+            
+            with open(part_path, 'r+b' if offset else 'wb') as f:
+                if offset:
+                    f.seek(offset)
+                elif total:
+                    self._preallocate(f, total)
                     
-                    if progress_callback and total:
-                        progress = int(downloaded / total * 100)
-                        
-                        # Call the callback at every interval or if this is the first or last update
-                        now = time.time()
-                        if (progress >= 100 or 
-                            progress - last_progress >= callback_interval or
-                            now - last_report_time >= 1.0):  # Also update at least every second
+                # Disk writes happen behind the network reads
+                out = self.disk_writer.attach(f)
+                try:
+                    with out:
+                        for chunk in self._read_chunks(r):
+                            if stop_check and stop_check():
+                                r.close()
+                                logger.info(f"Download stopped at {downloaded} bytes: {fname}")
+                                return None
+                                
+                            self.throttle(len(chunk), bandwidth_flow)
+                            out.write(chunk)
+                            if hasher:
+                                hasher.update(chunk)
+                            downloaded += len(chunk)
                             
-                            progress_callback(progress, current_chunk_size, total)
-                            last_progress = progress
-                            last_report_time = now
-                            current_chunk_size = 0  # Reset chunk counter
+                            # Progress work runs on a fixed interval, not per chunk
+                            now = time.monotonic()
+                            if now - last_report_time >= self.PROGRESS_INTERVAL:
+                                last_report_time = now
+                                state["downloaded"] = offset + out.written
+                                self._save_part_state(state_path, state)
+                                if progress_callback and total:
+                                    progress_callback(int(downloaded / total * 100), downloaded - reported, total)
+                                    reported = downloaded
+                finally:
+                    # Keep the resume point however the transfer ended, counting only bytes in the file
+                    state["downloaded"] = offset + out.written
+                    self._save_part_state(state_path, state)
             
+            if progress_callback and total and downloaded > reported:
+                progress_callback(int(downloaded / total * 100), downloaded - reported, total)
+            
+            if total and downloaded < total:
+                logger.error(f"Download incomplete ({downloaded}/{total} bytes), keeping partial file: {part_path}")
+                return None
+            
+            if hasher:
+                state_path.unlink(missing_ok=True)
+                self._verify_hash(hasher, expected_hash, part_path)
+                
+            part_path.replace(out_path)
+            state_path.unlink(missing_ok=True)
             return out_path
             
+        except ChecksumMismatchError:
+            raise
         except Exception as e:
             logger.error(f"Error downloading file: {str(e)}")
             return None
     
+    def _finish_segmented(self, url: str, segment_url: str, output_path: Path,
+                          out_path: Path, state_path: Path, state: Dict,
+                          expected_hash: Optional[str], hasher: Any,
+                          retry_args: Dict) -> Optional[Path]:
+        """Run a segmented download, verify it and move the file into place"""
+        part_path = self.get_part_path(out_path)
+        complete = self._download_segments(
+            url, segment_url, part_path, state_path, state, hasher,
+            retry_args["progress_callback"], retry_args["stop_check"],
+            retry_args["bandwidth_flow"]
+        )
+        
+        if complete is None:
+            # Server no longer honours the ranges, start over with a single stream
+            part_path.unlink(missing_ok=True)
+            state_path.unlink(missing_ok=True)
+            return self.download_file(url, output_path, **retry_args)
+        if not complete:
+            return None
+            
+        state_path.unlink(missing_ok=True)
+        if hasher:
+            self._verify_hash(hasher, expected_hash, part_path)
+            
+        part_path.replace(out_path)
+        return out_path
+    
+    def _download_segments(self, url: str, segment_url: str, part_path: Path,
+                           state_path: Path, state: Dict, hasher: Any = None,
+                           progress_callback: Callable = None,
+                           stop_check: Callable[[], bool] = None,
+                           bandwidth_flow: Optional[Hashable] = None) -> Optional[bool]:
+        """
+        Fetch the remaining byte ranges of a segmented download in parallel
+        
+        Each segment writes into its own region of the partial file. Progress
+        is reported from the calling thread only, and the per-segment progress
+        is saved with the resume state so a stopped download can continue.
+        The hasher is fed the contiguous prefix of the file as it fills in,
+        while those pages are still in the OS cache.
+        
+        Args:
+            url: Original download URL
+            segment_url: Resolved URL (after redirects) to request the ranges from
+            part_path: Path of the preallocated partial file
+            state_path: Path of the resume state file
+            state: Resume state with validators and [start, end, done] segments
+            hasher: Optional hasher to feed the downloaded bytes in file order
+            progress_callback: Callback function for progress updates
+            stop_check: Callable returning True when the download should stop early
+            bandwidth_flow: Key the bytes are counted under by the bandwidth limiter
+            
+        Returns:
+            True if complete, False if stopped or failed (partial file is kept),
+            None if the server no longer honours the ranges
+        """
+        total = state["total"]
+        validator = self._get_resume_validator(state)
+        
+        # Don't leak the API key to a CDN host we were redirected to
+        headers = self.get_headers()
+        if urlparse(segment_url).netloc != urlparse(url).netloc:
+            headers.pop("Authorization", None)
+        
+        stop_event = threading.Event()
+        lock = threading.Lock()
+        transferred = [0]  # Bytes fetched since the last progress callback
+        rejected = []
+        hashed = [0]  # Length of the file prefix already fed to the hasher
+        
+        def fetch_segment(segment: List[int]):
+            start, end, done = segment
+            if start + done > end:
+                return
+                
+            segment_headers = dict(headers)
+            segment_headers["Range"] = f"bytes={start + done}-{end}"
+            segment_headers["If-Range"] = validator
+            
+            with self.get_session().get(segment_url, headers=segment_headers, stream=True, timeout=30) as sr:
+                if sr.status_code != 206:
+                    rejected.append(sr.status_code)
+                    stop_event.set()
+                    return
+                    
+                def on_written(n):
+                    # Progress saved for resuming only counts bytes that are in the file
+                    with lock:
+                        segment[2] += n
+                        
+                # Unbuffered, so written bytes are visible to the hashing reader
+                received = done
+                with open(part_path, 'r+b', buffering=0) as f:
+                    f.seek(start + done)
+                    with self.disk_writer.attach(f, on_written) as out:
+                        for chunk in self._read_chunks(sr):
+                            if stop_event.is_set():
+                                return
+                                
+                            # Never write past the end of this segment
+                            chunk = chunk[:end + 1 - (start + received)]
+                            self.throttle(len(chunk), bandwidth_flow)
+                            out.write(chunk)
+                            received += len(chunk)
+                            with lock:
+                                transferred[0] += len(chunk)
+                                
+            if start + segment[2] <= end:
+                raise IOError(f"Segment {start}-{end} ended early")
+        
+        def report_progress():
+            with lock:
+                current = transferred[0]
+                transferred[0] = 0
+                downloaded = sum(seg[2] for seg in state["segments"])
+            if progress_callback and total:
+                progress_callback(int(downloaded / total * 100), current, total)
+        
+        def update_hash():
+            # Hash up to the end of the first segment that is still filling in
+            with lock:
+                frontier = 0
+                for start, end, done in state["segments"]:
+                    frontier = start + done
+                    if start + done <= end:
+                        break
+            if frontier > hashed[0]:
+                self._hash_file_range(hasher, part_path, hashed[0], frontier)
+                hashed[0] = frontier
+        
+        last_report_time = time.monotonic()
+        errors = []
+        
+        try:
+            with ThreadPoolExecutor(max_workers=len(state["segments"])) as executor:
+                futures = [executor.submit(fetch_segment, seg) for seg in state["segments"]]
+                pending = set(futures)
+                
+                while pending:
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_EXCEPTION)
+                    
+                    for future in done:
+                        if future.exception():
+                            errors.append(future.exception())
+                            stop_event.set()
+                            
+                    if stop_check and stop_check():
+                        stop_event.set()
+                    
+                    if hasher:
+                        update_hash()
+                    
+                    now = time.monotonic()
+                    if now - last_report_time >= self.PROGRESS_INTERVAL:
+                        report_progress()
+                        self._save_part_state(state_path, state)
+                        last_report_time = now
+        finally:
+            self._save_part_state(state_path, state)
+        
+        report_progress()
+        
+        if rejected:
+            logger.info(f"Server ignored segment range request (HTTP {rejected[0]}), restarting: {part_path.name}")
+            return None
+            
+        downloaded = sum(seg[2] for seg in state["segments"])
+        if downloaded < total:
+            if errors:
+                logger.error(f"Segmented download failed, keeping partial file: {errors[0]}")
+            else:
+                logger.info(f"Download stopped at {downloaded} bytes: {part_path.name}")
+            return False
+            
+        if hasher:
+            update_hash()
+            
+        return True
+    
     def search_models(self, query: str, tags: List[str] = None, types: List[str] = None,
                      base_models: List[str] = None, nsfw: bool = None, 
                      limit: int = 20) -> List[Dict]:
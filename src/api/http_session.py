@@ -0,0 +1,228 @@
+"""
+Shared HTTP connection pools for the API client and all downloads
+"""
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, NamedTuple, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class MediaStream(NamedTuple):
+    """Streamed response of an image or video fetch"""
+    headers: Dict[str, str]
+    iter_content: Callable[[int], Iterator[bytes]]  # Yields body chunks of up to the given size
+    http_version: str  # Protocol the server answered with, e.g. "HTTP/2"
+
+
+class HttpSessionPool:
+    """
+    Keep-alive connection pools shared by every thread of the application
+
+    requests.Session is not guaranteed to be thread-safe, so each thread gets
+    its own session, but all sessions mount the same adapters and therefore
+    reuse the same pooled connections. Pool sizes can be set per host prefix.
+
+    Images and videos can optionally be fetched over HTTP/2 through httpx,
+    which multiplexes the concurrent fetches to a host over one connection.
+    Hosts that don't negotiate h2 are served over HTTP/1.1 by the same
+    client, and without the httpx and h2 packages media fetches use the
+    requests sessions.
+    """
+
+    def __init__(self, pool_sizes: Optional[Dict[str, int]] = None, default_pool_size: int = 10,
+                 http2: bool = False, http2_max_connections: int = 10):
+        """
+        Initialize the session pool
+
+        Args:
+            pool_sizes: Maximum kept-alive connections per URL prefix
+                (e.g. {"https://image.civitai.com": 5})
+            default_pool_size: Maximum kept-alive connections per host for
+                all other hosts (e.g. the CDNs model files are served from)
+            http2: Fetch media over HTTP/2 when httpx and h2 are installed
+            http2_max_connections: Maximum connections of the HTTP/2 client,
+                which bounds concurrent fetches to hosts falling back to HTTP/1.1
+        """
+        self.default_adapter = HTTPAdapter(pool_connections=20, pool_maxsize=default_pool_size)
+        self.prefix_adapters = {
+            prefix: HTTPAdapter(pool_connections=4, pool_maxsize=size)
+            for prefix, size in (pool_sizes or {}).items()
+        }
+        self._local = threading.local()
+        self.response_listeners = []
+        self.http2_client = self._create_http2_client(http2_max_connections) if http2 else None
+        self.media_versions = {}  # host -> HTTP version its media was last served with
+
+    def get_session(self) -> requests.Session:
+        """Get the session of the calling thread"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", self.default_adapter)
+            session.mount("http://", self.default_adapter)
+            # requests picks the longest matching prefix
+            for prefix, adapter in self.prefix_adapters.items():
+                session.mount(prefix, adapter)
+            session.hooks["response"].append(self._notify_response)
+            self._local.session = session
+        return session
+
+    def _create_http2_client(self, max_connections: int):
+        """Create the shared HTTP/2 client, or None if httpx or h2 is missing"""
+        try:
+            import httpx
+            import h2  # noqa: F401  httpx needs it for HTTP/2
+        except ImportError:
+            logger.warning("HTTP/2 for media needs the httpx and h2 packages (pip install httpx[http2]), using HTTP/1.1")
+            return None
+
+        # httpx clients are thread-safe, so all media fetch threads share one
+        return httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            event_hooks={"response": [lambda response: self._notify_response(response)]},
+            follow_redirects=True
+        )
+
+    @contextmanager
+    def open_media_stream(self, url: str, headers: Optional[Dict[str, str]] = None,
+                          timeout: float = 30) -> Iterator[MediaStream]:
+        """
+        Open a streamed GET for an image or video
+
+        Errors are raised as requests exceptions whichever client is used.
+
+        Args:
+            url: URL to fetch
+            headers: Request headers
+            timeout: Connect and read timeout in seconds
+
+        Yields:
+            MediaStream of the response; the connection is released when
+            the block is left
+        """
+        if self.http2_client is None:
+            with self.get_session().get(url, headers=headers, stream=True, timeout=timeout) as r:
+                r.raise_for_status()
+                version = getattr(r.raw, "version", 11)
+                yield MediaStream(r.headers, r.iter_content, f"HTTP/{version // 10}.{version % 10}")
+            return
+
+        import httpx
+        try:
+            with self.http2_client.stream("GET", url, headers=headers, timeout=timeout) as r:
+                if r.status_code >= 400:
+                    raise requests.HTTPError(f"{r.status_code} error for url: {url}")
+                self._record_media_version(url, r.http_version)
+                yield MediaStream(r.headers, r.iter_bytes, r.http_version)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+    def _record_media_version(self, url: str, http_version: str):
+        """Log the protocol a media host negotiated the first time and when it changes"""
+        host = urlparse(url).hostname or ""
+        if self.media_versions.get(host) == http_version:
+            return
+        self.media_versions[host] = http_version
+        if http_version == "HTTP/2":
+            logger.info(f"{host}: media fetches multiplexed over HTTP/2")
+        else:
+            logger.info(f"{host}: HTTP/2 not negotiated, media fetches use {http_version}")
+
+    def add_response_listener(self, listener: Callable[[int], None]):
+        """
+        Register a callback receiving the status code of every response
+        
+        Args:
+            listener: Callback taking the HTTP status code
+        """
+        self.response_listeners.append(listener)
+    
+    def _notify_response(self, response, *args, **kwargs):
+        for listener in self.response_listeners:
+            listener(response.status_code)
+    
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get connection statistics per host
+
+        Only hosts whose pool is still cached are included.
+
+        Returns:
+            Dictionary of host -> {"requests", "new_connections", "reused_connections"}
+        """
+        stats = {}
+        adapters = [self.default_adapter] + list(self.prefix_adapters.values())
+        for adapter in adapters:
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+
+                host = stats.setdefault(pool.host, {
+                    "requests": 0,
+                    "new_connections": 0,
+                    "reused_connections": 0
+                })
+                host["requests"] += pool.num_requests
+                host["new_connections"] += pool.num_connections
+                host["reused_connections"] += max(0, pool.num_requests - pool.num_connections)
+        return stats
+
+    def log_stats(self):
+        """Log connection statistics for diagnostics"""
+        for host, host_stats in self.get_stats().items():
+            logger.debug(
+                f"{host}: {host_stats['requests']} requests, "
+                f"{host_stats['new_connections']} new connections, "
+                f"{host_stats['reused_connections']} reused"
+            )
+
+    def close(self):
+        """Close all pooled connections"""
+        self.default_adapter.close()
+        for adapter in self.prefix_adapters.values():
+            adapter.close()
+        if self.http2_client is not None:
+            self.http2_client.close()
+
+
+def create_session_pool(config) -> HttpSessionPool:
+    """
+    Create a session pool sized from the download configuration
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        HttpSessionPool with pools for the API, the image CDN and model CDNs
+    """
+    download_threads = config.get("download_threads", 3)
+    concurrent_downloads = config.get("max_concurrent_downloads", 3)
+    segments = config.get("download_segments", 4)
+    
+    # Leave room for the largest concurrency the adaptive controller may pick
+    if config.get("adaptive_concurrency", False):
+        download_threads = max(download_threads, config.get("adaptive_max_image_threads", 8))
+        concurrent_downloads = max(concurrent_downloads, config.get("adaptive_max_downloads", 8))
+
+    return HttpSessionPool(
+        pool_sizes={
+            # Metadata and image pages, two parallel fetches per model
+            "https://civitai.com": 2 * concurrent_downloads,
+            "https://image.civitai.com": download_threads * concurrent_downloads,
+        },
+        default_pool_size=max(segments, 1) * concurrent_downloads,
+        http2=config.get("media_http2", False),
+        # Every fetch of the shared media pool may be on an HTTP/1.1 fallback host
+        http2_max_connections=max(download_threads, 1)
+    )
@@ -7,11 +7,45 @@ Constants for the application
 DOWNLOAD_STATUS = {
     "QUEUED": "queued",
     "DOWNLOADING": "downloading",
+    "PAUSED": "paused",
     "COMPLETED": "completed",
     "FAILED": "failed",
     "CANCELED": "canceled"
 }
 
+# Download scheduling policies
+SCHEDULING_POLICIES = {
+    "fifo": "Queue order",
+    "sjf": "Smallest first",
+    "largest": "Largest first",
+    "mixed": "One large, rest smallest first"
+}
+
+# When written model files are synced to disk
+DISK_FLUSH_POLICIES = {
+    "none": "Leave to the OS",
+    "close": "When a transfer ends",
+    "periodic": "Every few seconds"
+}
+
+# Model file variant preferences, matched against files[].metadata
+FILE_FORMAT_PREFERENCES = {
+    "any": "Any",
+    "SafeTensor": "SafeTensors",
+    "PickleTensor": "Pickle (.ckpt)"
+}
+FILE_SIZE_PREFERENCES = {
+    "any": "Any",
+    "pruned": "Pruned",
+    "full": "Full"
+}
+FILE_FP_PREFERENCES = {
+    "any": "Any",
+    "fp16": "fp16",
+    "bf16": "bf16",
+    "fp32": "fp32"
+}
+
 # Model types
 MODEL_TYPES = {
     "Checkpoint": "checkpoints",
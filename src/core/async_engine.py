@@ -0,0 +1,314 @@
+"""
+Asyncio download engine
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class AsyncDownloadEngine:
+    """
+    Runs downloads as coroutines on a single event loop thread
+
+    Instead of one thread per URL, every download is a coroutine and the
+    blocking steps (metadata fetches, model transfers and local file work)
+    run on one shared, bounded executor, while images go through the
+    workers' shared media pool. The semaphores cap how many of each step run
+    at once across all downloads, and the executor has a thread for every
+    slot, so no step can starve another and the number of threads stays
+    fixed however long the queue is. Waiting for another download of the
+    same version doesn't hold a thread.
+
+    The number of transfer slots follows the download limit, which the
+    adaptive concurrency and the schedule rules change while downloads run;
+    see set_transfer_limit.
+    """
+
+    def __init__(self, config: Dict, transfer_slots: Optional[int] = None):
+        """
+        Initialize the engine
+
+        Args:
+            config: Application configuration
+            transfer_slots: Number of model transfers run at once
+                (defaults to max_concurrent_downloads)
+        """
+        self.config = config
+        self.metadata_slots = config.get("async_metadata_slots", 2)
+        self.transfer_slots = transfer_slots or config.get("max_concurrent_downloads", 3)
+        self.local_slots = config.get("post_process_workers", 1)
+        self.running_transfers = 0  # Downloads holding a transfer slot, only changed on the loop
+
+        self.executor_size = self.metadata_slots + self.transfer_slots + self.local_slots
+        self.executor = ThreadPoolExecutor(max_workers=self.executor_size, thread_name_prefix="download-io")
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, name="async-download-engine", daemon=True)
+        self.thread.start()
+
+        # Semaphores must be created on the loop that uses them
+        self.metadata_semaphore = None
+        self.transfer_condition = None  # Notified when a transfer slot is freed or added
+        self.local_semaphore = None  # Folder checks, folder creation and post-processing
+        asyncio.run_coroutine_threadsafe(self._create_semaphores(), self.loop).result()
+
+    def _run_loop(self):
+        """Run the event loop until the engine is shut down"""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _create_semaphores(self):
+        self.metadata_semaphore = asyncio.Semaphore(self.metadata_slots)
+        self.transfer_condition = asyncio.Condition()
+        self.local_semaphore = asyncio.Semaphore(self.local_slots)
+
+    @asynccontextmanager
+    async def transfer_slot(self):
+        """Hold one of the transfer slots, checking the current limit on every acquire"""
+        async with self.transfer_condition:
+            await self.transfer_condition.wait_for(lambda: self.running_transfers < self.transfer_slots)
+            self.running_transfers += 1
+        try:
+            yield
+        finally:
+            async with self.transfer_condition:
+                self.running_transfers -= 1
+                self.transfer_condition.notify()
+
+    def set_transfer_limit(self, limit: int):
+        """
+        Change the number of model transfers run at once; safe to call from any thread
+
+        A lower limit lets the running transfers finish and holds back new
+        ones, a higher one starts waiting downloads right away.
+
+        Args:
+            limit: New number of transfer slots
+        """
+        asyncio.run_coroutine_threadsafe(self._resize_transfers(max(1, limit)), self.loop)
+
+    async def _resize_transfers(self, limit: int):
+        """Apply a new transfer limit on the loop"""
+        size = self.metadata_slots + limit + self.local_slots
+        if size > self.executor_size:
+            # Calls already on the old executor finish there
+            old_executor = self.executor
+            self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="download-io")
+            self.executor_size = size
+            old_executor.shutdown(wait=False)
+        async with self.transfer_condition:
+            self.transfer_slots = limit
+            self.transfer_condition.notify_all()
+
+    async def run_blocking(self, func: Callable, *args):
+        """Run a blocking call on the shared executor"""
+        return await self.loop.run_in_executor(self.executor, func, *args)
+
+    def submit(self, worker) -> "AsyncDownloadJob":
+        """
+        Schedule a download on the event loop
+
+        Args:
+            worker: DownloadWorker (not started) holding the URL, settings and
+                callbacks; its steps are run by the engine
+
+        Returns:
+            AsyncDownloadJob handle
+        """
+        job = AsyncDownloadJob(self, worker)
+        job.future = asyncio.run_coroutine_threadsafe(job.run(), self.loop)
+        return job
+
+    def shutdown(self, timeout: float = 5.0):
+        """
+        Cancel the downloads still on the loop, then stop the event loop and
+        the executor
+
+        Downloads should be paused or cancelled first; their coroutines are
+        cancelled at their next step and their partial files are kept.
+
+        Args:
+            timeout: Maximum number of seconds to wait for the loop to stop
+        """
+        if not self.thread.is_alive():
+            return
+        asyncio.run_coroutine_threadsafe(self._stop(), self.loop)
+        self.thread.join(timeout=timeout)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _stop(self):
+        """Cancel every other task on the loop, wait for them and stop the loop"""
+        tasks = [task for task in asyncio.all_tasks(self.loop) if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.loop.stop()
+
+
+class AsyncDownloadJob:
+    """Handle for a download running on the AsyncDownloadEngine"""
+
+    def __init__(self, engine: AsyncDownloadEngine, worker):
+        self.engine = engine
+        self.worker = worker
+        self.url = worker.url
+        self.task_id = worker.task_id
+        self.future = None
+
+    async def run(self):
+        """Run the download steps of the worker as a coroutine"""
+        worker = self.worker
+        try:
+            async with self.engine.metadata_semaphore:
+                model_info = await self.engine.run_blocking(worker.fetch_info)
+            if not model_info:
+                return
+
+            if not await self.claim_version(model_info):
+                return
+
+            async with self.engine.local_semaphore:
+                folder_path = await self.engine.run_blocking(worker.create_folder_structure, model_info)
+            if not folder_path:
+                worker.completion_callback(False, "Failed to create folder structure", None)
+                return
+
+            # Files are written to the staging folder, if one is set
+            async with self.engine.local_semaphore:
+                work_path = await self.engine.run_blocking(worker.create_staging_folder, folder_path)
+            if not work_path:
+                worker.completion_callback(False, "Failed to create staging folder", None)
+                return
+
+            await self.wait_for_previous()
+            async with self.engine.transfer_slot():
+                if not await self.engine.run_blocking(worker.download_model, model_info, work_path):
+                    return
+            worker.end_transfer()
+
+            images = worker.prepare_images(model_info)
+            if images:
+                await self.download_images(images, work_path)
+
+            async with self.engine.local_semaphore:
+                await self.engine.run_blocking(worker.finish, model_info, work_path, folder_path)
+
+        except Exception as e:
+            logger.error(f"Download error: {str(e)}")
+            worker.log(f"Error: {str(e)}", "error")
+            worker.completion_callback(False, str(e), None)
+        finally:
+            worker.release_version()
+            if not worker.moving:
+                worker.release_library_space()
+
+    async def wait_for_previous(self, timeout: float = 5.0):
+        """
+        Let a paused or cancelled download of the same URL finish its last
+        write, like DownloadWorker.wait_for_previous, before taking a
+        transfer slot
+
+        A previous download on this engine is awaited on the event loop, so
+        waiting holds neither an executor thread nor a slot it may need.
+        """
+        previous = self.worker.previous_worker
+        if isinstance(previous, AsyncDownloadJob) and previous.future is not None:
+            self.worker.previous_worker = None
+            await asyncio.wait({asyncio.wrap_future(previous.future)}, timeout=timeout)
+        elif previous is not None:
+            await self.engine.run_blocking(self.worker.wait_for_previous, timeout)
+
+    async def claim_version(self, model_info) -> bool:
+        """
+        Check the version against the library and other downloads, like
+        DownloadWorker.claim_version, waiting for another download of the
+        same version on the event loop instead of on an executor thread
+
+        Returns:
+            True if this download should fetch the version
+        """
+        worker = self.worker
+        async with self.engine.local_semaphore:
+            if await self.engine.run_blocking(worker.skip_installed, model_info):
+                return False
+
+        while not worker.is_stopped():
+            future = worker.join_version(model_info)
+            if future is None:
+                return True
+
+            # Wait without cancelling the shared future when this download stops
+            waiter = asyncio.wrap_future(future)
+            while not worker.is_stopped() and not waiter.done():
+                await asyncio.wait({waiter}, timeout=0.5)
+            result = waiter.result() if waiter.done() else None
+
+            if worker.share_result(result):
+                return False
+
+        return False
+
+    async def download_images(self, images: List[Dict], folder: Path):
+        """Download images as coroutines waiting on the shared media pool"""
+        worker = self.worker
+        images_folder = folder / 'images'
+        images_folder.mkdir(exist_ok=True)
+
+        total_images = len(images)
+        downloaded = 0
+        started = time.time()
+
+        async def fetch(img: Dict):
+            nonlocal downloaded
+            out_path = worker.get_image_path(images_folder, img)
+
+            # Skip if image already exists, here or in the library
+            existing_path = worker.find_existing_file(out_path)
+            if existing_path:
+                img['local_path'] = str(existing_path)
+            else:
+                if worker.is_cancelled or worker.is_paused:
+                    return
+                future = worker.media_pool.submit(worker, img['url'], worker.download_single_image, img['url'], out_path)
+                try:
+                    result = await asyncio.wrap_future(future)
+                except asyncio.CancelledError:
+                    return
+                if result:
+                    img['local_path'] = str(result)
+
+            downloaded += 1
+            worker.progress_callback("", -1, int(downloaded / total_images * 100), "", 0)
+
+        try:
+            await asyncio.gather(*(fetch(img) for img in images))
+        finally:
+            worker.media_pool.cancel_owner(worker)
+            worker.log_media_rate(time.time() - started)
+
+    def cancel(self):
+        """Cancel the download"""
+        self.worker.cancel()
+
+    def pause(self):
+        """Pause the download, keeping the partial model file for resuming"""
+        self.worker.pause()
+
+    def is_alive(self) -> bool:
+        """Check if the download is still running"""
+        return self.future is not None and not self.future.done()
+
+    def join(self, timeout: Optional[float] = None):
+        """Wait for the download to finish"""
+        if self.future is None:
+            return
+        try:
+            self.future.result(timeout=timeout)
+        except Exception:
+            pass
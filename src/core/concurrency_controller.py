@@ -0,0 +1,173 @@
+"""
+Adaptive download concurrency
+"""
+import threading
+import time
+from typing import Dict
+
+from src.utils.bandwidth_monitor import BandwidthMonitor
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class AdaptiveConcurrencyController:
+    """
+    AIMD controller for the number of model transfers and media fetches
+
+    Every adjustment interval the goodput measured by the BandwidthMonitor
+    and the HTTP responses seen since the last interval are compared:
+
+    - any 429 or an error rate above the threshold halves both limits
+      (multiplicative decrease);
+    - otherwise, while all download slots are busy, both limits grow by one
+      (additive increase);
+    - an increase that did not raise goodput by at least 5% is undone and
+      the controller holds for a few intervals before probing again.
+
+    All limits stay within the user-set minimum and maximum bounds.
+    """
+
+    def __init__(self, config: Dict, bandwidth_monitor: BandwidthMonitor,
+                 interval: float = 5.0, error_threshold: float = 0.1, hold_intervals: int = 6):
+        """
+        Initialize the controller
+
+        Args:
+            config: Application configuration
+            bandwidth_monitor: Monitor measuring the combined goodput
+            interval: Seconds between adjustments
+            error_threshold: Error rate above which the limits are halved
+            hold_intervals: Intervals to wait after an increase that did not help
+        """
+        self.config = config
+        self.bandwidth_monitor = bandwidth_monitor
+        self.interval = interval
+        self.error_threshold = error_threshold
+        self.hold_intervals = hold_intervals
+
+        self.download_limit = self._clamp_downloads(config.get("max_concurrent_downloads", 3))
+        self.image_limit = self._clamp_images(config.get("download_threads", 3))
+
+        self.responses = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.lock = threading.Lock()
+
+        self.last_update = time.time()
+        self.last_total_bytes = bandwidth_monitor.get_total_bytes()
+        self.goodput = 0.0
+        self.goodput_before_increase = None  # Set while an increase is being evaluated
+        self.hold = 0
+
+    def _clamp_downloads(self, value: int) -> int:
+        return min(max(value, self.config.get("adaptive_min_downloads", 1)),
+                   self.config.get("adaptive_max_downloads", 8))
+
+    def _clamp_images(self, value: int) -> int:
+        return min(max(value, self.config.get("adaptive_min_image_threads", 1)),
+                   self.config.get("adaptive_max_image_threads", 8))
+
+    def is_enabled(self) -> bool:
+        """Check if adaptive concurrency is turned on"""
+        return self.config.get("adaptive_concurrency", False)
+
+    def get_download_limit(self) -> int:
+        """Get the number of concurrent model downloads to run"""
+        if not self.is_enabled():
+            return self.config.get("max_concurrent_downloads", 3)
+        return self.download_limit
+
+    def get_image_limit(self) -> int:
+        """Get the number of image and video fetches across all downloads"""
+        if not self.is_enabled():
+            return self.config.get("download_threads", 3)
+        return self.image_limit
+
+    def record_response(self, status_code: int):
+        """
+        Count an HTTP response
+
+        Args:
+            status_code: HTTP status code of the response
+        """
+        with self.lock:
+            self.responses += 1
+            if status_code == 429:
+                self.rate_limited += 1
+            elif status_code >= 500:
+                self.errors += 1
+
+    def record_error(self):
+        """Count a request that failed without a response (timeout, connection reset)"""
+        with self.lock:
+            self.responses += 1
+            self.errors += 1
+
+    def _set_limits(self, download_limit: int, image_limit: int):
+        self.download_limit = self._clamp_downloads(download_limit)
+        self.image_limit = self._clamp_images(image_limit)
+
+    def update(self, active_downloads: int) -> bool:
+        """
+        Adjust the limits once per interval
+
+        Args:
+            active_downloads: Number of model downloads currently running
+
+        Returns:
+            True if a limit changed
+        """
+        if not self.is_enabled():
+            return False
+
+        now = time.time()
+        elapsed = now - self.last_update
+        if elapsed < self.interval:
+            return False
+
+        total_bytes = self.bandwidth_monitor.get_total_bytes()
+        self.goodput = (total_bytes - self.last_total_bytes) / elapsed
+        self.last_total_bytes = total_bytes
+        self.last_update = now
+
+        with self.lock:
+            responses, errors, rate_limited = self.responses, self.errors, self.rate_limited
+            self.responses = self.errors = self.rate_limited = 0
+
+        before = (self.download_limit, self.image_limit)
+
+        if rate_limited or (responses and errors / responses > self.error_threshold):
+            # Multiplicative decrease
+            self._set_limits(self.download_limit // 2, self.image_limit // 2)
+            self.goodput_before_increase = None
+            self.hold = self.hold_intervals
+            reason = f"{rate_limited} rate limited, {errors}/{responses} errors"
+
+        elif self.goodput_before_increase is not None:
+            # Keep the last increase only if it paid off
+            if self.goodput < self.goodput_before_increase * 1.05:
+                self._set_limits(self.download_limit - 1, self.image_limit - 1)
+                self.hold = self.hold_intervals
+            self.goodput_before_increase = None
+            reason = f"goodput {self.goodput / 1024:.0f} KB/s after increase"
+
+        elif self.hold > 0:
+            self.hold -= 1
+            return False
+
+        elif active_downloads >= self.download_limit:
+            # Additive increase while there is work waiting for a slot
+            self.goodput_before_increase = self.goodput
+            self._set_limits(self.download_limit + 1, self.image_limit + 1)
+            reason = f"probing at {self.goodput / 1024:.0f} KB/s"
+
+        else:
+            return False
+
+        changed = (self.download_limit, self.image_limit) != before
+        if changed:
+            logger.info(
+                f"Concurrency set to {self.download_limit} downloads, "
+                f"{self.image_limit} image fetches ({reason})"
+            )
+        return changed
@@ -0,0 +1,138 @@
+"""
+Disk space admission control for model downloads
+"""
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional
+
+from src.utils.formatting import format_size
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class DiskSpaceGuard:
+    """
+    Admits model transfers only when their file fits on the target volume
+
+    Every admitted transfer holds a reservation for its file size. The space
+    a reservation still needs is its size minus what its own partial file
+    already occupies on disk, so preallocated and resumed files are not
+    counted twice; files no reservation is waiting on, such as images,
+    count only through the free space they take. A transfer is admitted when its own remaining bytes fit
+    in the free space minus the other reservations on the same volume and
+    the configured minimum free space; otherwise it is refused with the
+    reason, before anything is written.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize the guard
+
+        Args:
+            config: Application configuration
+        """
+        self.config = config
+        self.reservations = {}  # owner -> (partial file path, size in bytes)
+        self.lock = threading.Lock()
+        self.admission_lock = threading.Lock()  # One check-and-reserve at a time
+
+    def _allocated(self, part_path: Path) -> int:
+        """Get the bytes already allocated by the partial file of a transfer"""
+        try:
+            stat = part_path.stat()
+        except OSError:
+            return 0
+        # st_blocks covers preallocated space, sparse files only count what was written
+        return stat.st_blocks * 512 if hasattr(stat, "st_blocks") else stat.st_size
+
+    def _remaining(self, part_path: Path, size: int) -> int:
+        """Get the bytes a transfer still has to claim on disk"""
+        return max(0, size - self._allocated(part_path))
+
+    def _device(self, path: Path) -> Optional[int]:
+        try:
+            return os.stat(path).st_dev
+        except OSError:
+            return None
+
+    def get_reserved_space(self, folder: Path, owner: Optional[Hashable] = None) -> int:
+        """
+        Get the bytes other transfers on the volume of a folder still need
+
+        Args:
+            folder: Folder on the target volume
+            owner: Transfer to leave out
+
+        Returns:
+            Sum of the remaining bytes of the other reservations
+        """
+        device = self._device(folder)
+        with self.lock:
+            reservations = [
+                (other_path, size) for other, (other_path, size) in self.reservations.items()
+                if other != owner
+            ]
+        return sum(
+            self._remaining(other_path, size)
+            for other_path, size in reservations
+            if self._device(other_path.parent) == device
+        )
+
+    def has_free_space(self, folder: Path) -> bool:
+        """
+        Check if a new transfer could start on the volume of a folder
+
+        Args:
+            folder: Folder on the target volume
+
+        Returns:
+            True if there is space beyond the minimum free space and the
+            active reservations
+        """
+        min_free = self.config.get("min_free_space_mb", 1024) * 1024 * 1024
+        return shutil.disk_usage(folder).free - min_free - self.get_reserved_space(folder) > 0
+
+    def reserve(self, owner: Hashable, part_path: Path, size: int) -> Optional[str]:
+        """
+        Reserve space for a transfer if its file fits
+
+        Args:
+            owner: Key of the transfer
+            part_path: Partial file the transfer writes to; its folder must exist
+            size: Size of the complete file in bytes
+
+        Returns:
+            None once reserved, otherwise the reason the file doesn't fit
+        """
+        part_path = Path(part_path)
+        folder = part_path.parent
+        with self.admission_lock:
+            needed = self._remaining(part_path, size)
+            reserved = self.get_reserved_space(folder, owner)
+            min_free = self.config.get("min_free_space_mb", 1024) * 1024 * 1024
+            available = shutil.disk_usage(folder).free - min_free - reserved
+            if needed <= available:
+                with self.lock:
+                    self.reservations[owner] = (part_path, size)
+                return None
+
+        reason = (
+            f"Not enough disk space: {format_size(needed)} needed, "
+            f"{format_size(max(0, available))} available in {folder}"
+        )
+        if reserved:
+            reason += f" ({format_size(reserved)} reserved by active downloads)"
+        logger.warning(reason)
+        return reason
+
+    def release(self, owner: Hashable):
+        """
+        Drop the reservation of a transfer
+
+        Args:
+            owner: Key of the transfer
+        """
+        with self.lock:
+            self.reservations.pop(owner, None)
@@ -5,10 +5,11 @@ import time
 import threading
 import shutil
 import html
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 from queue import Queue
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
 from typing import Dict, Optional, List, Callable, Any
 from urllib.parse import urlparse
 import requests
@@ -17,12 +18,24 @@ import logging
 
 from PySide6.QtCore import QObject, Signal
 
-from src.api.civitai_api import CivitaiAPI
+from src.api.civitai_api import CivitaiAPI, ChecksumMismatchError, DownloadStoppedError
+from src.api.http_session import create_session_pool
+from src.core.async_engine import AsyncDownloadEngine
+from src.core.concurrency_controller import AdaptiveConcurrencyController
+from src.core.disk_space import DiskSpaceGuard
+from src.core.media_pool import MediaFetchPool, create_media_pool
+from src.core.metadata_prefetcher import MetadataPrefetcher, create_metadata_prefetcher
+from src.core.single_flight import SingleFlight
+from src.core.staging_mover import StagingMover, create_staging_mover, get_copy_path, get_staging_folder
 from src.constants import MODEL_TYPES, DOWNLOAD_STATUS
+from src.db.queue_journal import PROGRESS_FIELDS
 from src.models.download_task import DownloadTask
 from src.models.model_info import ModelInfo
 from src.utils.logger import get_logger
 from src.utils.bandwidth_monitor import BandwidthMonitor
+from src.utils.bandwidth_limiter import BandwidthLimiter
+from src.utils.disk_writer import create_disk_writer
+from src.utils.indexed_queue import IndexedQueue
 
 logger = get_logger(__name__)
 
@@ -35,30 +48,86 @@ class DownloadQueue(QObject):
     task_updated = Signal(DownloadTask)  # task
     queue_reordered = Signal()  # Emitted when queue is reordered
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, journal=None, library=None):
         super().__init__(parent)
-        self.tasks = {}  # url -> DownloadTask
-        self.queue = []  # List of URL strings in queue order
-        self.current_url = None
-        self.is_processing = False
+        self.tasks = {}  # canonical url -> DownloadTask
+        self.task_ids = {}  # task_id -> url
+        self.queue = IndexedQueue()  # URL strings in queue order
+        self.journal = journal  # Optional QueueJournal persisting queue changes
+        self.library = library  # Optional ModelsDatabase for skipping installed versions
+    
+    def _journal(self, op, task, **data):
+        """Record a queue operation in the journal, if any"""
+        if self.journal:
+            self.journal.record(op, task.task_id, task.url, **data)
+    
+    def restore(self):
+        """
+        Rebuild the queue from the journal
+        
+        Returns:
+            Number of restored tasks
+        """
+        if not self.journal:
+            return 0
+            
+        restored = self.journal.load()
+        for entry in restored:
+            task = DownloadTask(
+                url=entry["url"],
+                status=entry["status"],
+                priority=entry["priority"],
+                model_progress=entry["model_progress"],
+                image_progress=entry["image_progress"],
+                bytes_downloaded=entry["bytes_downloaded"],
+                size=entry["size"],
+                task_id=entry["task_id"]
+            )
+            self.tasks[task.url] = task
+            self.task_ids[task.task_id] = task.url
+            if task.status == DOWNLOAD_STATUS["QUEUED"]:
+                self.queue.append(task.url)
+            self.task_updated.emit(task)
+            
+        self.journal.start()
+        self.queue_updated.emit(len(self.queue))
+        return len(restored)
     
     def add_url(self, url):
-        """Add a URL to the queue"""
-        url = url.strip()
+        """
+        Add a URL to the queue
+        
+        URLs are stored in canonical form, so different spellings of the
+        same model version are only queued once, and versions already in
+        the library are skipped.
+        
+        Returns:
+            True if a task was added, False otherwise
+        """
+        url = CivitaiAPI.canonical_url(url.strip())
         if not url:
             return False
             
-        if url in self.tasks and self.tasks[url].status in [DOWNLOAD_STATUS["QUEUED"], DOWNLOAD_STATUS["DOWNLOADING"]]:
+        model_id, version_id = CivitaiAPI.parse_url(url)
+        if self.library and self.library.has_version(model_id, version_id):
+            logger.info(f"Model version already in library, skipping: {url}")
+            return False
+            
+        if url in self.tasks and self.tasks[url].status in [DOWNLOAD_STATUS["QUEUED"], DOWNLOAD_STATUS["DOWNLOADING"], DOWNLOAD_STATUS["PAUSED"]]:
             # URL already in queue and active
             logger.info(f"URL already in queue: {url}")
             return False
             
+        # Create a new task, replacing a finished one for the same URL
+        if url in self.tasks:
+            self.task_ids.pop(self.tasks[url].task_id, None)
+        task = DownloadTask(url=url, priority=len(self.queue))
+        
         # Add to queue
         self.queue.append(url)
-        
-        # Create a new task
-        task = DownloadTask(url=url, priority=len(self.queue))
         self.tasks[url] = task
+        self.task_ids[task.task_id] = url
+        self._journal("add", task)
         self.task_updated.emit(task)
         self.queue_updated.emit(len(self.queue))
         return True
@@ -73,61 +142,86 @@ class DownloadQueue(QObject):
     
     def get_next_url(self):
         """Get the next URL from the queue based on priority"""
+        task = self.get_next_task()
+        return task.url if task else None
+    
+    def get_next_task(self, task=None):
+        """
+        Take the next task from the queue and mark it as downloading
+        
+        Args:
+            task: Queued task to take, as chosen by a scheduling policy;
+                defaults to the first task in queue order
+                
+        Returns:
+            DownloadTask, or None if the queue is empty
+        """
         if not self.queue:
             return None
             
-        # Get the highest priority URL (first in queue)
-        url = self.queue.pop(0)
-        self.current_url = url
+        if task is not None:
+            url = task.url
+            self.queue.remove(url)
+        else:
+            # Get the highest priority URL (first in queue)
+            url = self.queue.pop_first()
+        task = self.tasks.get(url)
         
         # Update task status
-        if url in self.tasks:
-            task = self.tasks[url]
+        if task:
             task.status = DOWNLOAD_STATUS["DOWNLOADING"]
             task.start_time = time.time()
+            self._journal("status", task, status=task.status)
             self.task_updated.emit(task)
             
         self.queue_updated.emit(len(self.queue))
-        return url
+        return task
+    
+    def get_task(self, task_id):
+        """
+        Get a task by its ID
+        
+        Args:
+            task_id: Task ID
+            
+        Returns:
+            DownloadTask, or None if the task was replaced or removed
+        """
+        url = self.task_ids.get(task_id)
+        return self.tasks.get(url) if url else None
     
     def move_to_position(self, url, position):
         """Move a URL to a specific position in the queue"""
         if url not in self.queue:
             return False
             
-        # Remove from current position
-        self.queue.remove(url)
-        
-        # Insert at new position, ensuring it's within bounds
-        position = min(max(0, position), len(self.queue))
-        self.queue.insert(position, url)
-        
-        # Update priorities
-        self._update_priorities()
+        # Move to the new position, ensuring it's within bounds
+        position = min(max(0, position), len(self.queue) - 1)
+        self.queue.move(url, position)
+        if url in self.tasks:
+            self.tasks[url].priority = position
+            self._journal("move", self.tasks[url], position=position)
         
+        # One notification for the whole reorder instead of one per task
         self.queue_reordered.emit()
         return True
     
-    def _update_priorities(self):
-        """Update task priorities based on queue order"""
-        for i, url in enumerate(self.queue):
-            if url in self.tasks:
-                self.tasks[url].priority = i
-                self.task_updated.emit(self.tasks[url])
-    
-    def update_task(self, url, **kwargs):
+    def update_task(self, task_id, **kwargs):
         """Update a task's properties"""
-        if url in self.tasks:
-            task = self.tasks[url]
+        task = self.get_task(task_id)
+        if task:
             for key, value in kwargs.items():
                 if hasattr(task, key):
                     setattr(task, key, value)
+            progress = {key: value for key, value in kwargs.items() if key in PROGRESS_FIELDS}
+            if progress:
+                self._journal("progress", task, **progress)
             self.task_updated.emit(task)
     
-    def complete_task(self, url, success, message=None, model_info=None):
+    def complete_task(self, task_id, success, message=None, model_info=None):
         """Mark a task as completed or failed"""
-        if url in self.tasks:
-            task = self.tasks[url]
+        task = self.get_task(task_id)
+        if task and task.status == DOWNLOAD_STATUS["DOWNLOADING"]:
             task.end_time = time.time()
             if success:
                 task.status = DOWNLOAD_STATUS["COMPLETED"]
@@ -137,8 +231,60 @@ class DownloadQueue(QObject):
             else:
                 task.status = DOWNLOAD_STATUS["FAILED"]
                 task.error_message = message or "Download failed"
+            self._journal("status", task, status=task.status)
             self.task_updated.emit(task)
     
+    def pause_task(self, url):
+        """Pause a queued or downloading task"""
+        if url not in self.tasks:
+            return False
+            
+        task = self.tasks[url]
+        if task.status not in [DOWNLOAD_STATUS["QUEUED"], DOWNLOAD_STATUS["DOWNLOADING"]]:
+            return False
+            
+        # Remove from queue if it's still there, remembering where it was
+        if url in self.queue:
+            task.priority = self.queue.index(url)
+            self.queue.remove(url)
+            self.queue_updated.emit(len(self.queue))
+            
+        task.status = DOWNLOAD_STATUS["PAUSED"]
+        self._journal("status", task, status=task.status, position=task.priority)
+        self.task_updated.emit(task)
+        return True
+    
+    def resume_task(self, url):
+        """Put a paused task back into the queue at its previous position"""
+        if url not in self.tasks or self.tasks[url].status != DOWNLOAD_STATUS["PAUSED"]:
+            return False
+            
+        task = self.tasks[url]
+        self.queue.insert(task.priority, url)
+        self.queue_reordered.emit()
+        
+        task.status = DOWNLOAD_STATUS["QUEUED"]
+        self._journal("status", task, status=task.status, position=task.priority)
+        self.task_updated.emit(task)
+        self.queue_updated.emit(len(self.queue))
+        return True
+    
+    def requeue_task(self, url):
+        """Put a downloading task back at the front of the queue, e.g. when a schedule rule lowers the limit"""
+        if url not in self.tasks or self.tasks[url].status != DOWNLOAD_STATUS["DOWNLOADING"]:
+            return False
+            
+        task = self.tasks[url]
+        task.priority = 0
+        self.queue.insert(0, url)
+        self.queue_reordered.emit()
+        
+        task.status = DOWNLOAD_STATUS["QUEUED"]
+        self._journal("status", task, status=task.status, position=task.priority)
+        self.task_updated.emit(task)
+        self.queue_updated.emit(len(self.queue))
+        return True
+    
     def cancel_task(self, url):
         """Cancel a task"""
         if url in self.tasks:
@@ -152,6 +298,7 @@ class DownloadQueue(QObject):
             # Update task status
             task.status = DOWNLOAD_STATUS["CANCELED"]
             task.end_time = time.time()
+            self._journal("status", task, status=task.status)
             self.task_updated.emit(task)
             
             return True
@@ -168,6 +315,8 @@ class DownloadQueue(QObject):
                 
         # Clear the queue list
         self.queue.clear()
+        if self.journal:
+            self.journal.record("clear")
         self.queue_updated.emit(0)
     
     def size(self):
@@ -182,9 +331,14 @@ class DownloadQueue(QObject):
         """Get all tasks"""
         return list(self.tasks.values())
     
-    def get_queued_tasks(self):
-        """Get all queued tasks in queue order"""
-        return [self.tasks[url] for url in self.queue if url in self.tasks]
+    def get_queued_tasks(self, limit=None):
+        """
+        Get the queued tasks in queue order
+        
+        Args:
+            limit: Only get the first limit tasks (defaults to all)
+        """
+        return [self.tasks[url] for url in islice(self.queue, limit) if url in self.tasks]
 
 
 class DownloadWorker(threading.Thread):
@@ -193,38 +347,49 @@ class DownloadWorker(threading.Thread):
     def __init__(self, url: str, config: Dict, 
                  progress_callback: Callable[[str, int, int, str, int], None],
                  completion_callback: Callable[[bool, str, Optional[ModelInfo]], None],
-                 bandwidth_monitor: BandwidthMonitor):
+                 bandwidth_monitor: BandwidthMonitor,
+                 api: CivitaiAPI,
+                 task_id: str = "",
+                 media_pool: Optional[MediaFetchPool] = None,
+                 disk_space: Optional[DiskSpaceGuard] = None,
+                 library: Any = None,
+                 single_flight: Optional[SingleFlight] = None,
+                 metadata: Optional[MetadataPrefetcher] = None,
+                 post_process_slots: Optional[threading.Semaphore] = None,
+                 mover: Optional[StagingMover] = None):
         super().__init__()
         self.url = url
+        self.task_id = task_id
         self.config = config
         self.progress_callback = progress_callback
         self.completion_callback = completion_callback
         self.is_cancelled = False
+        self.is_paused = False
         self.bandwidth_monitor = bandwidth_monitor
-        self.api = CivitaiAPI(
-            api_key=config.get("api_key", ""),
-            fetch_batch_size=config.get("fetch_batch_size", 100)
-        )
+        self.api = api  # Shared by all workers
+        self.media_pool = media_pool or create_media_pool(config)  # Shared by all workers when given
+        self.disk_space = disk_space or DiskSpaceGuard(config)  # Shared by all workers when given
+        self.disk_space_error = None  # Why the model file was refused, if it didn't fit
+        self.library = library  # Optional ModelsDatabase for skipping installed versions
+        self.single_flight = single_flight or SingleFlight()  # Shared by all workers when given
+        self.flight = None  # (version_id, future) while this worker leads a version's download
+        self.metadata = metadata  # Optional MetadataPrefetcher holding model info resolved ahead
+        self.post_process_slots = post_process_slots or threading.Semaphore(1)  # Shared by all workers when given
+        self.mover = mover  # Shared StagingMover when downloads are written to a staging folder
+        self.moving = False  # Set once the finished folder was handed to the mover
+        self.staging_folder = None  # Folder the files are written to when staging is enabled
+        self.library_folder = None  # Folder in the library the staged files are moved to
+        self.error_callback = None  # Called for requests failing without a response
+        self.transfer_done_callback = None  # Called once the model transfer has ended
+        self.previous_worker = None  # Paused or cancelled download of this URL that may still be writing
+        self.media_bytes = 0  # Bytes of images and videos taken from the per-model budget
+        self.media_versions = {}  # HTTP version -> images and videos fetched over it
+        self.media_lock = threading.Lock()
         
     def run(self):
         try:
-            self.log(f"Processing URL: {self.url}", "info")
-            model_id, version_id = self.api.parse_url(self.url)
-            
-            if not model_id:
-                self.log("Invalid URL format. Could not extract model ID.", "error")
-                self.completion_callback(False, "Invalid URL", None)
-                return
-                
-            # Fetch model info
-            model_info = self.api.fetch_model_info(
-                model_id, 
-                version_id,
-                max_images=self.config.get("top_image_count", 9)
-            )
-            
-            if not model_info:
-                self.completion_callback(False, "Failed to fetch model info", None)
+            model_info = self.fetch_info()
+            if not model_info or not self.claim_version(model_info):
                 return
                 
             # Create folder structure
@@ -233,43 +398,339 @@ class DownloadWorker(threading.Thread):
                 self.completion_callback(False, "Failed to create folder structure", None)
                 return
                 
-            # Download model file
-            if self.config.get("download_model", True) and model_info.download_url:
-                self.log(f"Downloading model file...", "download")
-                try:
-                    model_file = self.api.download_file(
-                        model_info.download_url, 
-                        folder_path, 
-                        progress_callback=lambda p, c, t: self.model_progress_callback(p, c, t),
-                        callback_interval=1  # Update progress every 1% for smoother updates
-                    )
-                    if model_file:
-                        model_info.size = model_file.stat().st_size
-                        self.log("Model file downloaded successfully", "success")
-                    else:
-                        self.log("Model file download failed", "error")
-                except Exception as e:
-                    self.log(f"Error downloading model file: {str(e)}", "error")
+            # Files are written to the staging folder, if one is set
+            work_path = self.create_staging_folder(folder_path)
+            if not work_path:
+                self.completion_callback(False, "Failed to create staging folder", None)
+                return
+                
+            self.wait_for_previous()
+            if not self.download_model(model_info, work_path):
+                return
+            self.end_transfer()
             
             # Download images
-            if self.config.get("download_images", True) and model_info.images:
-                # Skip NSFW images if configured
-                if not self.config.get("download_nsfw", True):
-                    original_count = len(model_info.images)
-                    model_info.images = [img for img in model_info.images if not img.get("nsfw", False)]
-                    self.log(f"Filtered out {original_count - len(model_info.images)} NSFW images", "info")
-                
-                self.log(f"Downloading {len(model_info.images)} images...", "download")
+            images = self.prepare_images(model_info)
+            if images and not self.is_stopped():
                 self.download_images(
-                    model_info.images, 
-                    folder_path, 
+                    images, 
+                    work_path, 
                     progress_callback=lambda p: self.progress_callback("", -1, p, "", 0)
                 )
                 
-                # Set thumbnail from first image if available
-                if model_info.images and len(model_info.images) > 0 and "local_path" in model_info.images[0]:
-                    model_info.thumbnail = model_info.images[0]["local_path"]
+            self.finish(model_info, work_path, folder_path)
+            
+        except Exception as e:
+            logger.error(f"Download error: {str(e)}")
+            self.log(f"Error: {str(e)}", "error")
+            self.completion_callback(False, str(e), None)
+        finally:
+            self.release_version()
+            if not self.moving:
+                self.release_library_space()
+    
+    def fetch_info(self) -> Optional[ModelInfo]:
+        """Resolve the URL and fetch model info, reporting failure to the completion callback"""
+        self.log(f"Processing URL: {self.url}", "info")
+        model_id, version_id = self.api.parse_url(self.url)
+        
+        if not model_id:
+            self.log("Invalid URL format. Could not extract model ID.", "error")
+            self.completion_callback(False, "Invalid URL", None)
+            return None
+            
+        # Use the model info resolved ahead while this URL was queued, if any
+        model_info = self.metadata.take(self.url, self.is_stopped) if self.metadata else None
+        if model_info is None and not self.is_stopped():
+            model_info = self.api.fetch_model_info(
+                model_id, 
+                version_id,
+                max_images=self.config.get("top_image_count", 9),
+                stop_check=self.is_stopped
+            )
+        
+        if self.is_stopped():
+            # Cancelled or paused while fetching, the queue already knows
+            return None
+            
+        if not model_info:
+            self.completion_callback(False, "Failed to fetch model info", None)
+            return None
+            
+        return model_info
+    
+    def claim_version(self, model_info: ModelInfo) -> bool:
+        """
+        Check the resolved version against the library and other downloads
+        
+        A version that is already installed completes right away. If another
+        download is already fetching the same version, this one waits and
+        completes with its result instead of transferring the files again;
+        if that download stops without a result, this one takes over.
+        
+        Returns:
+            True if this worker should download the version, False if the
+            download was completed (or stopped) without it
+        """
+        if self.skip_installed(model_info):
+            return False
+            
+        while not self.is_stopped():
+            future = self.join_version(model_info)
+            if future is None:
+                return True
+                
+            result = None
+            while not self.is_stopped():
+                try:
+                    result = future.result(timeout=0.5)
+                    break
+                except FuturesTimeoutError:
+                    continue
+                    
+            if self.share_result(result):
+                return False
+                
+        return False
+    
+    def skip_installed(self, model_info: ModelInfo) -> bool:
+        """
+        Complete the download right away if its version is already installed
+        
+        Returns:
+            True if the version is in the library and the download was completed
+        """
+        if self.library and self.library.has_version(model_info.id, model_info.version_id):
+            self.log(f"{model_info.name} ({model_info.version_name}) is already in the library", "info")
+            self.completion_callback(True, f"{model_info.name} is already in the library", None)
+            return True
+        return False
+    
+    def join_version(self, model_info: ModelInfo) -> Optional[Future]:
+        """
+        Join the flight for the resolved version
+        
+        Returns:
+            None if this worker leads the flight (or the version is unknown)
+            and should download it, otherwise the leader's future, resolving
+            to its (success, message) or to None if it stopped without one
+        """
+        if model_info.version_id is None:
+            return None
+            
+        leader, future = self.single_flight.join(model_info.version_id)
+        if leader:
+            self.flight = (model_info.version_id, future)
+            
+            # Hand the outcome to downloads waiting for this version
+            completion_callback = self.completion_callback
+            def complete(success, message, result_info):
+                self.release_version((success, message))
+                completion_callback(success, message, result_info)
+            self.completion_callback = complete
+            return None
+            
+        self.log(f"Version {model_info.version_id} is already downloading, sharing that transfer", "info")
+        return future
+    
+    def share_result(self, result) -> bool:
+        """
+        Complete the download with the result of the flight it waited for
+        
+        Args:
+            result: (success, message) of the leading download, or None if it
+                stopped without a result
+            
+        Returns:
+            True if the download was completed, False if it should join again
+        """
+        if result is None:
+            return False
+        success, message = result
+        self.completion_callback(success, message, None)
+        return True
+    
+    def release_version(self, result=None):
+        """
+        End this worker's flight for its version, if it leads one
+        
+        Args:
+            result: (success, message) of the download, or None if it stopped
+                without a result
+        """
+        if result is None and self.moving:
+            # The flight ends with the result of the move into the library
+            return
+        if self.flight is not None:
+            version_id, future = self.flight
+            self.flight = None
+            self.single_flight.finish(version_id, future, result)
+    
+    def download_model(self, model_info: ModelInfo, folder_path: Path) -> bool:
+        """
+        Download the model file
+        
+        Returns:
+            False if the download should not continue (paused, cancelled,
+            not enough disk space, transfer incomplete or checksum mismatch),
+            True otherwise
+        """
+        if self.is_stopped():
+            return False
+            
+        if not (self.config.get("download_model", True) and model_info.download_url):
+            return True
+            
+        self.log(f"Downloading model file...", "download")
+        try:
+            model_file = self.api.download_file(
+                model_info.download_url, 
+                folder_path, 
+                progress_callback=lambda p, c, t: self.model_progress_callback(p, c, t),
+                stop_check=self.is_stopped,
+                segments=self.config.get("download_segments", 4),
+                segment_min_size=self.config.get("segment_min_size_mb", 100) * 1024 * 1024,
+                expected_hashes=model_info.file_hashes,
+                space_check=lambda size, part_path: self.reserve_disk_space(part_path, size),
+                bandwidth_flow=self.url,
+                library_folder=self.library_folder
+            )
+            if self.disk_space_error:
+                return False
+            if self.is_cancelled:
+                self.discard_partial(folder_path)
+                return False
+            if self.is_paused:
+                # Partial file is kept, the task is resumed by a new worker
+                self.log("Download paused", "warning")
+                return False
+            if not model_file:
+                # Only the partial file is left; adding the URL again resumes it
+                message = "Model file download did not complete, add the URL again to resume it"
+                self.log(message, "error")
+                self.completion_callback(False, message, None)
+                return False
                 
+            model_info.size = model_file.stat().st_size
+            sha256 = {k.upper(): v for k, v in model_info.file_hashes.items()}.get("SHA256")
+            if sha256:
+                model_info.sha256 = sha256.lower()
+            self.log("Model file downloaded successfully", "success")
+        except ChecksumMismatchError as e:
+            # The corrupt file has been deleted, don't report the model as installed
+            self.log(str(e), "error")
+            self.completion_callback(False, str(e), None)
+            return False
+        except Exception as e:
+            self.log(f"Error downloading model file: {str(e)}", "error")
+            self.completion_callback(False, f"Error downloading model file: {str(e)}", None)
+            return False
+        finally:
+            self.disk_space.release(self)
+            
+        return True
+    
+    def wait_for_previous(self, timeout: float = 5.0):
+        """
+        Let a paused or cancelled download of the same URL finish its last
+        write before this one opens the partial file
+        
+        Args:
+            timeout: Maximum number of seconds to wait
+        """
+        previous, self.previous_worker = self.previous_worker, None
+        if previous is not None and previous.is_alive():
+            previous.join(timeout=timeout)
+    
+    def end_transfer(self):
+        """Report that the model transfer has ended, so its slot can take the next download"""
+        callback, self.transfer_done_callback = self.transfer_done_callback, None
+        if callback:
+            callback()
+    
+    def reserve_disk_space(self, part_path: Path, size: int) -> bool:
+        """
+        Reserve space for the model file, failing the download if it doesn't fit
+        
+        A staged download also reserves the file's size on the library volume
+        when that is another file system, held until the mover has copied it.
+        
+        Args:
+            part_path: Partial file the model file is written to
+            size: Size of the model file in bytes
+            
+        Returns:
+            True if the file fits, False otherwise
+        """
+        try:
+            self.disk_space_error = self.disk_space.reserve(self, part_path, size)
+            if (not self.disk_space_error and self.library_folder
+                    and os.stat(self.library_folder).st_dev != os.stat(part_path.parent).st_dev):
+                # The mover fills this reservation with its copy of the file
+                copy_path = get_copy_path(self.library_folder / part_path.with_suffix("").name)
+                self.disk_space_error = self.disk_space.reserve((self, "library"), copy_path, size)
+        except Exception as e:
+            # Don't block the download if the volume can't be queried
+            logger.error(f"Error checking disk space for {part_path.parent}: {e}")
+            return True
+            
+        if self.disk_space_error:
+            self.log(self.disk_space_error, "error")
+            self.completion_callback(False, self.disk_space_error, None)
+            return False
+        return True
+    
+    def release_library_space(self):
+        """Drop the reservation on the library volume once the move ended or won't happen"""
+        self.disk_space.release((self, "library"))
+    
+    def prepare_images(self, model_info: ModelInfo) -> List[Dict]:
+        """Get the images to download, applying the image settings"""
+        if not (self.config.get("download_images", True) and model_info.images):
+            return []
+            
+        # Skip NSFW images if configured
+        if not self.config.get("download_nsfw", True):
+            original_count = len(model_info.images)
+            model_info.images = [img for img in model_info.images if not img.get("nsfw", False)]
+            self.log(f"Filtered out {original_count - len(model_info.images)} NSFW images", "info")
+        
+        self.log(f"Downloading {len(model_info.images)} images...", "download")
+        return model_info.images
+    
+    def finish(self, model_info: ModelInfo, folder_path: Path, target_path: Optional[Path] = None) -> None:
+        """
+        Write the HTML summary and metadata and report completion
+        
+        Args:
+            model_info: Model info of the download
+            folder_path: Folder the files were written to
+            target_path: Folder in the library the files belong in, if they
+                were written to a staging folder; completion is reported once
+                the mover has moved them there
+        """
+        if self.is_cancelled:
+            return
+        if self.is_paused:
+            self.log("Download paused", "warning")
+            return
+            
+        staged = target_path is not None and target_path != folder_path
+        if staged:
+            # Record the paths the files will have in the library
+            for img in model_info.images:
+                # Images found in the library already have their final path
+                if "local_path" in img and Path(img["local_path"]).is_relative_to(folder_path):
+                    img["local_path"] = str(target_path / Path(img["local_path"]).relative_to(folder_path))
+        else:
+            target_path = folder_path
+            
+        # Set thumbnail from first image if available
+        if model_info.images and len(model_info.images) > 0 and "local_path" in model_info.images[0]:
+            model_info.thumbnail = model_info.images[0]["local_path"]
+            
+        # Post-processing shares a small pool with the other downloads
+        with self.post_process_slots:
             # Create HTML summary
             if self.config.get("create_html", False):
                 html_path = self.save_html(folder_path, model_info)
@@ -284,17 +745,31 @@ class DownloadWorker(threading.Thread):
             # Set download date and path
             model_info.download_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             model_info.last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            model_info.path = str(folder_path)
+            model_info.path = str(target_path)
             
             # Save model metadata
             self.save_metadata(folder_path, model_info)
+        
+        self.api.session_pool.log_stats()
+        self.api.disk_writer.log_stats()
+        
+        if staged:
+            def on_moved(success, message):
+                self.release_library_space()
+                if success:
+                    self.log(f"Moved {model_info.name} into the library", "success")
+                    self.completion_callback(True, f"Successfully downloaded {model_info.name}", model_info)
+                else:
+                    self.log(message, "error")
+                    self.completion_callback(False, message, None)
+                    
+            # The move can't be paused or cancelled any more, the files are complete
+            self.moving = True
+            self.log(f"Moving {model_info.name} into the library...", "info")
+            self.mover.submit(folder_path, target_path, on_moved)
+            return
             
-            self.completion_callback(True, f"Successfully downloaded {model_info.name}", model_info)
-            
-        except Exception as e:
-            logger.error(f"Download error: {str(e)}")
-            self.log(f"Error: {str(e)}", "error")
-            self.completion_callback(False, str(e), None)
+        self.completion_callback(True, f"Successfully downloaded {model_info.name}", model_info)
     
     def model_progress_callback(self, progress, current_bytes, total_bytes):
         """Handle model download progress with bandwidth tracking"""
@@ -305,10 +780,44 @@ class DownloadWorker(threading.Thread):
         self.bandwidth_monitor.add_data_point(current_bytes)
     
     def cancel(self):
-        """Cancel the download"""
+        """
+        Cancel the download
+        
+        The running transfers notice it on their next chunk and close their
+        connections; queued image fetches are dropped right away.
+        """
         self.is_cancelled = True
+        self.media_pool.cancel_owner(self)
         self.log("Download cancelled", "warning")
     
+    def pause(self):
+        """Pause the download, keeping the partial model file for resuming"""
+        self.is_paused = True
+        self.media_pool.cancel_owner(self)
+    
+    def is_stopped(self) -> bool:
+        """Check if the download was cancelled or paused"""
+        return self.is_cancelled or self.is_paused
+    
+    def discard_partial(self, folder_path: Path) -> None:
+        """
+        Delete the partial model file of a cancelled download
+        
+        Nothing is deleted when keep_partial_on_cancel is set, so adding the
+        URL again resumes where the cancelled download stopped.
+        """
+        if self.config.get("keep_partial_on_cancel", False):
+            self.log("Download cancelled, partial file kept", "warning")
+            return
+            
+        try:
+            for pattern in ("*.part", "*.part.json"):
+                for path in folder_path.glob(pattern):
+                    path.unlink(missing_ok=True)
+            self.log("Download cancelled, partial file deleted", "warning")
+        except Exception as e:
+            logger.error(f"Error deleting partial files in {folder_path}: {e}")
+    
     def log(self, message, status="info"):
         """Log a message"""
         logger.log(getattr(logging, status.upper(), logging.INFO), message)
@@ -342,6 +851,30 @@ class DownloadWorker(threading.Thread):
             self.log(f"Error creating folder structure: {str(e)}", "error")
             return None
     
+    def create_staging_folder(self, folder_path: Path) -> Optional[Path]:
+        """
+        Create the staging folder the files of a library folder are written to
+        
+        Args:
+            folder_path: Folder in the library the download belongs in
+            
+        Returns:
+            The staging folder, folder_path itself if staging is disabled, or
+            None if the folder couldn't be created
+        """
+        staging_folder = get_staging_folder(self.config, folder_path) if self.mover else None
+        if staging_folder is None:
+            return folder_path
+            
+        try:
+            staging_folder.mkdir(parents=True, exist_ok=True)
+            self.staging_folder = staging_folder
+            self.library_folder = folder_path
+            return staging_folder
+        except Exception as e:
+            self.log(f"Error creating staging folder: {str(e)}", "error")
+            return None
+    
     def download_images(self, images: List[Dict], folder: Path, 
                        progress_callback = None) -> None:
         """Download images with progress reporting"""
@@ -351,36 +884,33 @@ class DownloadWorker(threading.Thread):
         total_images = len(images)
         downloaded = 0
         
-        with ThreadPoolExecutor(max_workers=self.config.get("download_threads", 3)) as executor:
-            futures = []
-            
-            for img in images:
-                if self.is_cancelled:
-                    break
-                    
-                url = img['url']
-                fname = Path(urlparse(url).path).name
-                out_path = images_folder / fname
-                
-                # Skip if image already exists
-                if out_path.exists():
-                    img['local_path'] = str(out_path)
-                    downloaded += 1
-                    if progress_callback:
-                        progress_callback(int(downloaded / total_images * 100))
-                    continue
+        futures = []
+        started = time.time()
+        
+        for img in images:
+            if self.is_stopped():
+                break
                 
-                # Submit download task
-                future = executor.submit(
-                    self.download_single_image, 
-                    url, 
-                    out_path
-                )
-                futures.append((future, img))
+            url = img['url']
+            out_path = self.get_image_path(images_folder, img)
+            
+            # Skip if image already exists, here or in the library
+            existing_path = self.find_existing_file(out_path)
+            if existing_path:
+                img['local_path'] = str(existing_path)
+                downloaded += 1
+                if progress_callback:
+                    progress_callback(int(downloaded / total_images * 100))
+                continue
             
+            # Queue on the shared media pool, which interleaves all active models
+            future = self.media_pool.submit(self, url, self.download_single_image, url, out_path)
+            futures.append((future, img))
+        
+        try:
             # Process results
             for future, img in futures:
-                if self.is_cancelled:
+                if self.is_stopped():
                     break
                     
                 try:
@@ -393,23 +923,133 @@ class DownloadWorker(threading.Thread):
                 downloaded += 1
                 if progress_callback:
                     progress_callback(int(downloaded / total_images * 100))
+        finally:
+            # Don't leave fetches of a stopped download in the pool
+            self.media_pool.cancel_owner(self)
+            self.log_media_rate(time.time() - started)
+    
+    def log_media_rate(self, elapsed: float) -> None:
+        """
+        Log the images per second fetched for this model, per HTTP version
+        
+        Args:
+            elapsed: Seconds spent fetching the images
+        """
+        with self.media_lock:
+            versions = dict(self.media_versions)
+        count = sum(versions.values())
+        if not count:
+            return
+        transports = ", ".join(f"{version} ({n})" for version, n in sorted(versions.items()))
+        logger.info(
+            f"Fetched {count} images in {elapsed:.1f}s "
+            f"({count / max(elapsed, 0.001):.1f} images/s) over {transports}"
+        )
+    
+    def get_image_path(self, images_folder: Path, img: Dict) -> Path:
+        """Get the local path for an image"""
+        return images_folder / Path(urlparse(img['url']).path).name
+    
+    def find_existing_file(self, path: Path) -> Optional[Path]:
+        """
+        Find an already downloaded copy of a file
+        
+        Args:
+            path: Path the file is written to
+            
+        Returns:
+            path if it exists, the file's place in the library if a staged
+            download finds it there, or None
+        """
+        if path.exists():
+            return path
+        if self.staging_folder and path.is_relative_to(self.staging_folder):
+            library_path = self.library_folder / path.relative_to(self.staging_folder)
+            if library_path.exists():
+                return library_path
+        return None
+    
+    def reserve_media_bytes(self, size: int) -> bool:
+        """
+        Take bytes from the per-model media budget
+        
+        Args:
+            size: Number of bytes the item needs
+            
+        Returns:
+            True if the budget allows the item, False otherwise
+        """
+        model_cap = self.config.get("max_media_per_model_mb", 0) * 1024 * 1024
+        with self.media_lock:
+            if model_cap and self.media_bytes + size > model_cap:
+                return False
+            self.media_bytes += size
+            return True
     
     def download_single_image(self, url: str, out_path: Path) -> Optional[Path]:
-        """Download a single image"""
+        """
+        Download a single image or video
+        
+        The body is streamed to a temporary file that is renamed into place
+        once complete. Items larger than the per-item cap, or that don't fit
+        in the per-model budget, are skipped based on their Content-Length
+        before the body is transferred.
+        
+        Returns:
+            Path to the downloaded file, or None if it failed or was skipped
+        """
+        item_cap = self.config.get("max_media_size_mb", 0) * 1024 * 1024
+        temp_path = out_path.with_name(out_path.name + ".part")
+        reserved = 0
         try:
             headers = {}
             if self.config.get("api_key"):
                 headers["Authorization"] = f"Bearer {self.config.get('api_key')}"
                 
-            r = requests.get(url, headers=headers, timeout=30)
-            r.raise_for_status()
-            
-            with open(out_path, 'wb') as f:
-                f.write(r.content)
+            with self.api.session_pool.open_media_stream(url, headers=headers, timeout=30) as r:
+                length = int(r.headers.get("content-length", 0))
+                if item_cap and length > item_cap:
+                    self.log(f"Skipping {out_path.name}: {length / 1024 / 1024:.1f} MB is over the size limit", "warning")
+                    return None
+                if not self.reserve_media_bytes(length):
+                    self.log(f"Skipping {out_path.name}: media size limit for this model reached", "warning")
+                    return None
+                reserved = length
                 
+                size = 0
+                with open(temp_path, 'wb') as f:
+                    for chunk in r.iter_content(65536):
+                        if self.is_stopped():
+                            # Leaving the with block closes the connection
+                            raise DownloadStoppedError(url)
+                            
+                        size += len(chunk)
+                        
+                        # Servers without Content-Length are checked as the body arrives
+                        if not length:
+                            if (item_cap and size > item_cap) or not self.reserve_media_bytes(len(chunk)):
+                                raise IOError("over the size limit")
+                            reserved += len(chunk)
+                            
+                        self.api.throttle(len(chunk), self.url)
+                        f.write(chunk)
+                        
+            temp_path.replace(out_path)
+            self.bandwidth_monitor.add_data_point(size)
+            with self.media_lock:
+                self.media_versions[r.http_version] = self.media_versions.get(r.http_version, 0) + 1
             return out_path
             
         except Exception as e:
+            temp_path.unlink(missing_ok=True)
+            
+            # Give the budget back, nothing was kept
+            with self.media_lock:
+                self.media_bytes -= reserved
+            if isinstance(e, DownloadStoppedError):
+                return None
+            if self.error_callback and isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                self.error_callback()
             self.log(f"Failed to download image {url}: {str(e)}", "error")
             return None
     
@@ -630,36 +1270,138 @@ document.addEventListener('keydown', (e) => {
 class DownloadManager:
     """Manager for downloading models from Civitai"""
     
-    def __init__(self, config):
-        """Initialize the download manager"""
+    def __init__(self, config, library=None):
+        """
+        Initialize the download manager
+        
+        Args:
+            config: Application configuration
+            library: Optional ModelsDatabase for skipping installed versions
+        """
         self.config = config
-        self.active_downloads = {}  # url -> DownloadWorker
+        self.library = library
+        self.active_downloads = {}  # url -> DownloadWorker or AsyncDownloadJob holding a transfer slot
+        self.finishing_downloads = {}  # url -> download fetching images or post-processing after its transfer
+        self.lock = threading.Lock()  # Guards active_downloads against worker threads finishing
+        self.stopping_workers = {}  # url -> worker still winding down after pause or cancel
+        self.download_order = []  # URLs of the running downloads, highest bandwidth priority first
+        self.async_engine = None  # Created on first use when the asyncio engine is selected
+        self.transfer_limit = None  # Download limit last set by the scheduler
         self.bandwidth_monitor = BandwidthMonitor(window_seconds=60, sample_rate=1)
         
-    def start_download(self, url, progress_callback, completion_callback):
+        # Shared by every transfer so the limit applies to the whole process
+        self.bandwidth_limiter = BandwidthLimiter()
+        self.set_bandwidth_limit(config.get("bandwidth_limit_kbps", 0) * 1024)
+        
+        # One API client, one set of keep-alive connection pools and one
+        # write-behind disk writer for all workers
+        self.session_pool = create_session_pool(config)
+        self.disk_writer = create_disk_writer(config)
+        self.api = CivitaiAPI(
+            api_key=config.get("api_key", ""),
+            fetch_batch_size=config.get("fetch_batch_size", 100),
+            bandwidth_limiter=self.bandwidth_limiter,
+            session_pool=self.session_pool,
+            disk_writer=self.disk_writer
+        )
+        
+        # Resolves the model info of the next queued downloads while the slots are busy
+        self.metadata = create_metadata_prefetcher(self.api, config)
+        self.apply_file_preferences()
+        
+        # Adjusts the number of downloads and image fetches when enabled
+        self.concurrency = AdaptiveConcurrencyController(config, self.bandwidth_monitor)
+        self.session_pool.add_response_listener(self.concurrency.record_response)
+        
+        # One bounded, host-aware pool for the images and videos of all downloads
+        self.media_pool = create_media_pool(config)
+        self.media_pool.set_limit(self.concurrency.get_image_limit())
+        
+        # Keeps model files that don't fit on the target volume from starting
+        self.disk_space = DiskSpaceGuard(config)
+        
+        # Lets downloads of the same model version share one transfer
+        self.version_flights = SingleFlight()
+        
+        # Bounds the HTML summaries and metadata files written at once
+        self.post_process_slots = threading.Semaphore(max(1, config.get("post_process_workers", 1)))
+        
+        # Moves downloads finished in the staging folder into the models folder
+        self.mover = create_staging_mover(config)
+        
+    def start_download(self, task_id, url, progress_callback, completion_callback,
+                       transfer_done_callback=None):
         """
         Start downloading a model
         
+        Once the model file is transferred the download gives up its slot
+        while its images and post-processing finish, unless media_stage_backlog
+        downloads are already at that stage.
+        
         Args:
+            task_id: ID of the download task, passed back to the callbacks
             url: URL to download
-            progress_callback: Callback for progress updates (message, model_progress, image_progress, status, bytes)
-            completion_callback: Callback for download completion (success, message, model_info)
+            progress_callback: Callback for progress updates (task_id, message, model_progress, image_progress, status, bytes)
+            completion_callback: Callback for download completion (task_id, success, message, model_info)
+            transfer_done_callback: Callback when the download gave up its slot (task_id)
             
         Returns:
             True if download started successfully, False otherwise
         """
-        if url in self.active_downloads:
-            logger.warning(f"Download already in progress for {url}")
-            return False
+        with self.lock:
+            if url in self.active_downloads or url in self.finishing_downloads:
+                logger.warning(f"Download already in progress for {url}")
+                return False
             
         # Create download worker
-        worker = DownloadWorker(url, self.config, progress_callback, completion_callback, self.bandwidth_monitor)
+        # Pick up API key changes made in the settings
+        self.api.api_key = self.config.get("api_key", "")
+        
+        def on_progress(message, model_progress, image_progress, status, bytes_transferred):
+            progress_callback(task_id, message, model_progress, image_progress, status, bytes_transferred)
+            
+        def on_transfer_done():
+            # Hand the slot to the next download while images and post-processing run
+            with self.lock:
+                active = self.active_downloads.get(url)
+                if active is None or active.task_id != task_id:
+                    return
+                if len(self.finishing_downloads) >= self.config.get("media_stage_backlog", 4):
+                    return
+                self.finishing_downloads[url] = self.active_downloads.pop(url)
+            if transfer_done_callback:
+                transfer_done_callback(task_id)
+            
+        def on_complete(success, message, model_info):
+            # Free the slot before reporting so the next task can start right away
+            with self.lock:
+                for downloads in (self.active_downloads, self.finishing_downloads):
+                    active = downloads.get(url)
+                    if active is not None and active.task_id == task_id:
+                        del downloads[url]
+            self.update_bandwidth_weights()
+            completion_callback(task_id, success, message, model_info)
         
-        # Store worker
-        self.active_downloads[url] = worker
+        worker = DownloadWorker(url, self.config, on_progress, on_complete,
+                                self.bandwidth_monitor, self.api, task_id, self.media_pool,
+                                self.disk_space, self.library, self.version_flights,
+                                self.metadata, self.post_process_slots, self.mover)
+        worker.error_callback = self.concurrency.record_error
+        worker.transfer_done_callback = on_transfer_done
+        # The new download waits for it before reusing the same partial file
+        worker.previous_worker = self.stopping_workers.pop(url, None)
         
-        # Start download
-        worker.start()
+        # Store worker before starting it so a quick failure can remove it again
+        with self.lock:
+            if self.config.get("download_engine", "threads") == "asyncio":
+                # Run the worker's steps as a coroutine instead of its own thread
+                if self.async_engine is None:
+                    self.async_engine = AsyncDownloadEngine(self.config, self.transfer_limit)
+                self.active_downloads[url] = self.async_engine.submit(worker)
+            else:
+                self.active_downloads[url] = worker
+                worker.start()
+        self.update_bandwidth_weights()
         logger.info(f"Started download: {url}")
         
         return True
@@ -674,28 +1416,248 @@ class DownloadManager:
         Returns:
             True if cancelled successfully, False otherwise
         """
-        if url in self.active_downloads:
-            self.active_downloads[url].cancel()
-            del self.active_downloads[url]
+        worker = self._pop_download(url)
+        if worker:
+            # The slot is free now; the worker closes its connections on its next chunk
+            worker.cancel()
+            self.stopping_workers[url] = worker
             logger.info(f"Download cancelled: {url}")
             return True
         return False
     
+    def pause_download(self, url):
+        """
+        Pause a download
+        
+        Args:
+            url: URL to pause
+            
+        Returns:
+            True if paused successfully, False otherwise
+        """
+        worker = self._pop_download(url)
+        if worker:
+            worker.pause()
+            self.stopping_workers[url] = worker
+            logger.info(f"Download paused: {url}")
+            return True
+        return False
+    
+    def _pop_download(self, url):
+        """Remove a download from whichever stage it is in and return it"""
+        with self.lock:
+            worker = self.active_downloads.pop(url, None)
+            if worker is None:
+                worker = self.finishing_downloads.pop(url, None)
+        self.update_bandwidth_weights()
+        return worker
+    
+    def move_download(self, url, position):
+        """
+        Move a running download in the bandwidth priority order
+        
+        Args:
+            url: URL of the download
+            position: New position among the running downloads (0 is the top)
+            
+        Returns:
+            True if the download was moved, False if it isn't running
+        """
+        with self.lock:
+            if url not in self.download_order:
+                return False
+            self.download_order.remove(url)
+            position = min(max(0, position), len(self.download_order))
+            self.download_order.insert(position, url)
+        self.update_bandwidth_weights()
+        return True
+    
+    def get_download_order(self):
+        """Get the URLs of the running downloads, highest bandwidth priority first"""
+        with self.lock:
+            return list(self.download_order)
+    
+    def update_bandwidth_weights(self):
+        """
+        Weight the bandwidth shares of the running downloads by their priority
+        
+        With priority_bandwidth enabled, the top of n running downloads gets
+        weight n, the next n - 1 and so on down to 1; the shares only apply
+        while a bandwidth limit is set. Without it all downloads share equally.
+        """
+        with self.lock:
+            running = list(self.active_downloads) + list(self.finishing_downloads)
+            self.download_order = [url for url in self.download_order if url in running]
+            self.download_order += [url for url in running if url not in self.download_order]
+            order = list(self.download_order)
+            
+        if self.config.get("priority_bandwidth", True):
+            weights = {url: len(order) - i for i, url in enumerate(order)}
+        else:
+            weights = {}
+        self.bandwidth_limiter.set_weights(weights)
+    
+    def pause_all_downloads(self):
+        """Pause all active downloads, keeping their partial files"""
+        with self.lock:
+            urls = list(self.active_downloads.keys()) + list(self.finishing_downloads.keys())
+        for url in urls:
+            self.pause_download(url)
+    
     def cancel_all_downloads(self):
         """Cancel all active downloads"""
-        for url, worker in list(self.active_downloads.items()):
+        with self.lock:
+            workers = {**self.active_downloads, **self.finishing_downloads}
+            self.active_downloads.clear()
+            self.finishing_downloads.clear()
+        self.update_bandwidth_weights()
+        for url, worker in workers.items():
             worker.cancel()
-        self.active_downloads.clear()
+            self.stopping_workers[url] = worker
         logger.info("All downloads cancelled")
     
+    def wait_for_stopped(self, timeout=5.0):
+        """
+        Wait for paused and cancelled workers to stop writing
+        
+        Args:
+            timeout: Maximum number of seconds to wait for all of them
+        """
+        deadline = time.time() + timeout
+        for url, worker in list(self.stopping_workers.items()):
+            if worker.is_alive():
+                worker.join(timeout=max(0, deadline - time.time()))
+            if not worker.is_alive():
+                self.stopping_workers.pop(url, None)
+    
+    def shutdown(self):
+        """Stop the background work once the downloads were paused or cancelled"""
+        self.metadata.shutdown()
+        self.mover.shutdown()
+        if self.async_engine is not None:
+            self.async_engine.shutdown()
+    
+    def has_disk_space(self):
+        """
+        Check if the models folder, and the staging folder if one is set,
+        have room for another download
+        
+        Returns:
+            True if a download may start, False while a volume is full
+        """
+        # Staged downloads need room on the staging volume and, for the move, in the library
+        paths = [Path(path) for path in (self.config.get("staging_path", ""), self.config.get("comfy_path", "")) if path]
+        for path in paths:
+            if not path.exists():
+                # The worker reports the missing folder
+                continue
+            try:
+                if not self.disk_space.has_free_space(path):
+                    return False
+            except Exception as e:
+                logger.error(f"Error checking disk space for {path}: {e}")
+        return True
+    
+    def prefetch_metadata(self, urls):
+        """
+        Resolve the model info of the downloads expected to start next
+        
+        Args:
+            urls: URLs of the upcoming downloads, in order
+        """
+        self.metadata.prefetch(urls, keep=self.get_active_urls())
+    
+    def get_active_urls(self):
+        """Get the URLs of the downloads holding a transfer slot"""
+        with self.lock:
+            return list(self.active_downloads.keys())
+    
     def get_active_downloads_count(self):
-        """Get the number of active downloads"""
+        """Get the number of downloads holding a transfer slot"""
         return len(self.active_downloads)
     
+    def get_max_concurrent_downloads(self):
+        """Get the number of downloads that may run at once"""
+        return self.concurrency.get_download_limit()
+    
+    def set_transfer_limit(self, limit):
+        """
+        Set the number of model transfers the asyncio engine runs at once
+        
+        Args:
+            limit: Download limit in effect, including schedule rules
+        """
+        if limit == self.transfer_limit:
+            return
+        self.transfer_limit = limit
+        if self.async_engine is not None:
+            self.async_engine.set_transfer_limit(limit)
+    
+    def update_concurrency(self):
+        """
+        Let the adaptive controller adjust the concurrency
+        
+        Returns:
+            True if the limits changed
+        """
+        changed = self.concurrency.update(self.get_active_downloads_count())
+        
+        # Also picks up a changed download_threads setting when not adaptive
+        self.media_pool.set_limit(self.concurrency.get_image_limit())
+        return changed
+    
+    def get_concurrency(self):
+        """
+        Get the effective concurrency
+        
+        Returns:
+            Tuple of (downloads, image fetches across all downloads, adaptive)
+        """
+        return (self.concurrency.get_download_limit(),
+                self.concurrency.get_image_limit(),
+                self.concurrency.is_enabled())
+    
     def get_bandwidth_stats(self):
         """Get bandwidth statistics for graphing"""
         return self.bandwidth_monitor.get_bandwidth_history()
     
+    def set_bandwidth_limit(self, bytes_per_second):
+        """
+        Set the bandwidth limit for all downloads, including running ones
+        
+        Args:
+            bytes_per_second: Maximum combined rate (0 for unlimited)
+        """
+        self.bandwidth_limiter.set_rate(bytes_per_second)
+        self.bandwidth_monitor.set_limit(self.bandwidth_limiter.get_rate())
+        logger.info(f"Bandwidth limit set to {bytes_per_second} B/s" if bytes_per_second else "Bandwidth limit removed")
+    
+    def get_bandwidth_limit(self):
+        """Get the bandwidth limit in bytes per second (0 for unlimited)"""
+        return self.bandwidth_monitor.get_limit()
+    
+    def get_connection_stats(self):
+        """Get keep-alive connection statistics per host for diagnostics"""
+        return self.session_pool.get_stats()
+    
+    def apply_file_preferences(self):
+        """Pass the preferred model file variant from the settings to the API client"""
+        self.api.file_preferences = {
+            "format": self.config.get("preferred_file_format", "any"),
+            "size": self.config.get("preferred_file_size", "any"),
+            "fp": self.config.get("preferred_file_fp", "any"),
+        }
+        # Prefetched model info may point at another file variant
+        self.metadata.clear()
+    
+    def get_mover_stats(self):
+        """Get staging mover statistics (backlog in bytes, folders waiting, ...)"""
+        return self.mover.get_stats()
+    
+    def get_writer_stats(self):
+        """Get write-behind statistics (buffered bytes, reader stall time, ...) for diagnostics"""
+        return self.disk_writer.get_stats()
+    
     def reset_bandwidth_monitor(self):
         """Reset the bandwidth monitor"""
         self.bandwidth_monitor.reset()
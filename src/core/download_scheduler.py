@@ -0,0 +1,288 @@
+"""
+Event-driven download scheduler
+"""
+import threading
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from PySide6.QtCore import QObject, Signal, Qt
+
+from src.constants import DOWNLOAD_STATUS
+from src.core.schedule_rules import ScheduleRule, get_active_rule, get_next_change, parse_rules
+from src.core.scheduling_policy import select_task, upcoming_tasks
+from src.core.size_prober import SizeProber
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class DownloadScheduler(QObject):
+    """
+    Starts queued downloads as soon as a slot is free
+
+    Instead of polling, the scheduler runs whenever the queue changes or a
+    download finishes and fills every free slot up to the concurrency limit.
+    Wake-ups from worker threads are delivered to the GUI thread through a
+    queued signal, and wake-ups arriving before the pass runs are coalesced
+    into it, so queuing many URLs at once costs one pass. While the models
+    volume is down to its minimum free space, tasks stay queued until a
+    later pass finds room again.
+
+    Which queued task starts next is decided by the scheduling_policy
+    setting; the size-aware policies use model file sizes probed in the
+    background as tasks are queued.
+
+    After a pass that changed the queue or the running downloads, the next
+    metadata_lookahead tasks, in the order the policy will start them, have
+    their model info resolved in the background, so a freed slot starts
+    transferring right away.
+
+    Time-of-day rules from the schedule_rules setting can lower or lift
+    the bandwidth limit and the number of downloads for a window of the
+    day; they are applied by apply_schedule.
+    """
+    wake_requested = Signal()
+    metadata_resolved = Signal(str, int)  # url, model file size in bytes
+
+    def __init__(self, download_queue, download_manager, config,
+                 progress_callback: Callable, completion_callback: Callable, parent=None):
+        """
+        Initialize the scheduler
+
+        Args:
+            download_queue: DownloadQueue to take tasks from
+            download_manager: DownloadManager running the downloads
+            config: Application configuration
+            progress_callback: Progress callback passed to started downloads
+            completion_callback: Completion callback passed to started downloads
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.download_queue = download_queue
+        self.download_manager = download_manager
+        self.config = config
+        self.progress_callback = progress_callback
+        self.completion_callback = completion_callback
+        self.is_scheduling = False
+        self.wake_pending = False  # A pass is posted and hasn't started yet
+        self.wake_lock = threading.Lock()
+        self.is_waiting_for_space = False
+        self.lookahead_stale = True  # The queue or the running downloads changed since the last prefetch
+        self.lookahead_settings = None  # (policy, lookahead, large_size) of the last prefetch
+        self.schedule_lines = None  # schedule_rules setting the rules were parsed from
+        self.schedule_rules = []
+        self.active_rule = None
+
+        self.size_prober = SizeProber(download_manager.api, self)
+        self.size_prober.size_probed.connect(self.on_size_probed)
+        self.download_queue.task_updated.connect(self.on_task_updated)
+
+        self.metadata_resolved.connect(self.on_metadata_resolved, Qt.QueuedConnection)
+        self.download_manager.metadata.resolved_callback = (
+            lambda url, model_info: self.metadata_resolved.emit(url, model_info.size)
+        )
+
+        self.wake_requested.connect(self.schedule, Qt.QueuedConnection)
+        self.download_queue.queue_updated.connect(self.wake)
+        self.download_queue.queue_updated.connect(self.invalidate_lookahead)
+        self.download_queue.queue_reordered.connect(self.invalidate_lookahead)
+
+        # Pick up tasks queued before the scheduler existed (e.g. restored ones)
+        self.wake()
+
+    def wake(self, *args):
+        """Request a scheduling pass; safe to call from any thread"""
+        with self.wake_lock:
+            if self.wake_pending:
+                return
+            self.wake_pending = True
+        self.wake_requested.emit()
+
+    def invalidate_lookahead(self, *args):
+        """Have the next pass predict the upcoming tasks again"""
+        self.lookahead_stale = True
+
+    def get_download_limit(self) -> int:
+        """Get the number of downloads that may run, lowered by the active schedule rule"""
+        max_downloads = self.download_manager.get_max_concurrent_downloads()
+        if self.active_rule and self.active_rule.max_downloads is not None:
+            return min(max_downloads, self.active_rule.max_downloads)
+        return max_downloads
+
+    def get_free_slots(self) -> int:
+        """Get the number of downloads that can be started right now"""
+        return self.get_download_limit() - self.download_manager.get_active_downloads_count()
+
+    def schedule(self):
+        """Start queued downloads until all slots are busy or the queue is empty"""
+        # Starting a download updates the queue, which wakes the scheduler again
+        if self.is_scheduling:
+            return
+
+        # Wake-ups from here on need another pass
+        with self.wake_lock:
+            self.wake_pending = False
+
+        self.is_scheduling = True
+        try:
+            # The asyncio engine sizes its transfer slots by the same limit
+            self.download_manager.set_transfer_limit(self.get_download_limit())
+            while self.get_free_slots() > 0 and not self.download_queue.is_empty():
+                if not self.download_manager.has_disk_space():
+                    if not self.is_waiting_for_space:
+                        logger.warning("Not enough free disk space, queued downloads are waiting")
+                        self.is_waiting_for_space = True
+                    break
+                self.is_waiting_for_space = False
+
+                task = self.download_queue.get_next_task(self.select_task())
+                if not task:
+                    break
+
+                started = self.download_manager.start_download(
+                    task.task_id,
+                    task.url,
+                    self.progress_callback,
+                    self.on_download_complete,
+                    self.on_transfer_done
+                )
+                if not started:
+                    # The URL is still held by another download; requeueing it
+                    # would only be taken again by this pass
+                    self.completion_callback(task.task_id, False, "Download already in progress", None)
+
+            self.prefetch_metadata()
+        except Exception as e:
+            logger.error(f"Error processing download queue: {e}")
+        finally:
+            self.is_scheduling = False
+
+    def get_policy(self) -> str:
+        """Get the name of the selected scheduling policy"""
+        return self.config.get("scheduling_policy", "fifo")
+
+    def select_task(self):
+        """
+        Choose the queued task to start next
+
+        Returns:
+            DownloadTask chosen by the policy, or None for the first in queue order
+        """
+        policy = self.get_policy()
+        if policy == "fifo":
+            return None
+
+        queued = self.download_queue.get_queued_tasks()
+        for task in queued:
+            if not task.size:
+                self.size_prober.probe(task)
+
+        large_size = self.config.get("large_file_threshold_mb", 2048) * 1024 * 1024
+        return select_task(policy, queued, self.get_active_tasks(), large_size)
+
+    def get_active_tasks(self):
+        """Get the tasks holding a transfer slot"""
+        return [
+            self.download_queue.tasks[url] for url in self.download_manager.get_active_urls()
+            if url in self.download_queue.tasks
+        ]
+
+    def prefetch_metadata(self):
+        """Resolve the model info of the tasks expected to start next, unless they are unchanged"""
+        policy = self.get_policy()
+        lookahead = self.config.get("metadata_lookahead", 5)
+        large_size = self.config.get("large_file_threshold_mb", 2048) * 1024 * 1024
+        settings = (policy, lookahead, large_size)
+        if not self.lookahead_stale and settings == self.lookahead_settings:
+            return
+        self.lookahead_stale = False
+        self.lookahead_settings = settings
+
+        # FIFO starts the head of the queue, the other policies may pick any task
+        queued = self.download_queue.get_queued_tasks(lookahead if policy == "fifo" else None)
+        upcoming = upcoming_tasks(policy, queued, self.get_active_tasks(), large_size, lookahead)
+        self.download_manager.prefetch_metadata([task.url for task in upcoming])
+
+    def on_metadata_resolved(self, url, size):
+        """Store the model file size found by a metadata prefetch with its task"""
+        if not size:
+            return
+        self.size_prober.sizes[url] = size
+        task = self.download_queue.tasks.get(url)
+        if task and not task.size:
+            self.download_queue.update_task(task.task_id, size=size)
+
+    def on_task_updated(self, task):
+        """Probe the size of newly queued tasks while a size-aware policy is selected"""
+        if task.status != DOWNLOAD_STATUS["QUEUED"]:
+            return
+        # A new size can change the order of the size-aware policies
+        self.invalidate_lookahead()
+        if self.get_policy() != "fifo" and not task.size:
+            self.size_prober.probe(task)
+
+    def on_size_probed(self, task_id, size):
+        """Store a probed size with its task"""
+        task = self.download_queue.get_task(task_id)
+        if task and not task.size:
+            self.download_queue.update_task(task_id, size=size)
+
+    def get_schedule_rules(self):
+        """Get the parsed schedule rules, parsing them again when the setting changed"""
+        lines = self.config.get("schedule_rules", [])
+        if lines != self.schedule_lines:
+            self.schedule_lines = list(lines)
+            self.schedule_rules = parse_rules(lines)
+        return self.schedule_rules
+
+    def apply_schedule(self, now: Optional[datetime] = None) -> Tuple[Optional[ScheduleRule], Optional[Tuple]]:
+        """
+        Apply the schedule rule in effect; called about once a second
+
+        The bandwidth limit of the rule replaces the bandwidth setting while
+        its window lasts. When the rule allows fewer downloads than are
+        transferring, the most recently started ones are paused and put
+        back at the front of the queue, keeping their partial files, so
+        they resume as soon as a later window allows them.
+
+        Args:
+            now: Local time (defaults to now)
+
+        Returns:
+            Tuple of (active rule or None, next change as returned by get_next_change)
+        """
+        now = now or datetime.now()
+        rules = self.get_schedule_rules()
+        rule = get_active_rule(rules, now)
+        if rule != self.active_rule:
+            logger.info(f"Schedule rule {rule.describe()} in effect" if rule else "No schedule rule in effect")
+            self.active_rule = rule
+            # A higher limit fills the new slots right away
+            self.wake()
+
+        if rule is None or rule.bandwidth_kbps is None:
+            bandwidth = self.config.get("bandwidth_limit_kbps", 0) * 1024
+        else:
+            bandwidth = rule.bandwidth_kbps * 1024
+        if bandwidth != self.download_manager.get_bandwidth_limit():
+            self.download_manager.set_bandwidth_limit(bandwidth)
+
+        excess = self.download_manager.get_active_downloads_count() - self.get_download_limit()
+        if excess > 0:
+            # Requeued in reverse so they keep their order at the front of the queue
+            for url in reversed(self.download_manager.get_active_urls()[-excess:]):
+                if self.download_manager.pause_download(url):
+                    self.download_queue.requeue_task(url)
+                    logger.info(f"Paused {url} until the schedule allows it again")
+
+        return rule, get_next_change(rules, now)
+
+    def on_transfer_done(self, task_id):
+        """Start the next task once a download has moved on from its transfer"""
+        self.invalidate_lookahead()
+        self.wake()
+
+    def on_download_complete(self, task_id, success, message, model_info):
+        """Report the completion and refill the freed slot"""
+        self.completion_callback(task_id, success, message, model_info)
+        self.invalidate_lookahead()
+        self.wake()
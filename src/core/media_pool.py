@@ -0,0 +1,188 @@
+"""
+Application-wide pool for image and video downloads
+"""
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+from urllib.parse import urlparse
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class MediaFetchPool:
+    """
+    Shared, host-aware pool for media fetches of all active downloads
+
+    Every download submits its fetches under its own owner key. Idle
+    threads take jobs from the owners in round-robin order so a model with
+    hundreds of previews can't starve the others, and a job only starts
+    while its host is below its connection limit. The total number of
+    running fetches is capped by the pool limit, which can be changed at
+    runtime (e.g. by the adaptive concurrency controller).
+    """
+
+    def __init__(self, limit: int = 3, host_limits: Optional[Dict[str, int]] = None,
+                 default_host_limit: int = 4):
+        """
+        Initialize the pool
+
+        Args:
+            limit: Maximum number of fetches running at once
+            host_limits: Maximum concurrent fetches per host name
+            default_host_limit: Maximum concurrent fetches for other hosts
+        """
+        self.limit = max(1, limit)
+        self.host_limits = host_limits or {}
+        self.default_host_limit = default_host_limit
+
+        self.jobs = {}  # owner -> deque of (host, future, func, args)
+        self.owners = deque()  # Round-robin order of owners with queued jobs
+        self.active = 0
+        self.active_by_host = {}  # host -> running fetches
+        self.threads = []
+        self.is_shutdown = False
+        self.condition = threading.Condition()
+
+    def _host_limit(self, host: str) -> int:
+        return self.host_limits.get(host, self.default_host_limit)
+
+    def _ensure_threads(self):
+        """Start threads up to the current limit (condition must be held)"""
+        while len(self.threads) < self.limit:
+            thread = threading.Thread(target=self._run, name=f"media-fetch-{len(self.threads)}", daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    def set_limit(self, limit: int):
+        """
+        Change the maximum number of fetches running at once
+
+        Args:
+            limit: New limit; extra threads simply stay idle when it shrinks
+        """
+        with self.condition:
+            self.limit = max(1, limit)
+            self._ensure_threads()
+            self.condition.notify_all()
+
+    def get_limit(self) -> int:
+        """Get the maximum number of fetches running at once"""
+        return self.limit
+
+    def submit(self, owner: Hashable, url: str, func: Callable, *args) -> Future:
+        """
+        Queue a fetch
+
+        Args:
+            owner: Key of the download the fetch belongs to
+            url: URL being fetched, used for the per-host limit
+            func: Callable doing the fetch
+            *args: Arguments for func
+
+        Returns:
+            Future with the result of func
+        """
+        future = Future()
+        host = urlparse(url).hostname or ""
+        with self.condition:
+            if self.is_shutdown:
+                raise RuntimeError("media pool is shut down")
+            if owner not in self.jobs:
+                self.jobs[owner] = deque()
+                self.owners.append(owner)
+            self.jobs[owner].append((host, future, func, args))
+            self._ensure_threads()
+            self.condition.notify()
+        return future
+
+    def cancel_owner(self, owner: Hashable):
+        """
+        Drop the queued fetches of a download; running ones finish normally
+
+        Args:
+            owner: Key of the download
+        """
+        with self.condition:
+            queued = self.jobs.pop(owner, None)
+            if queued is None:
+                return
+            self.owners.remove(owner)
+        for _, future, _, _ in queued:
+            future.cancel()
+
+    def _take_job(self):
+        """Get the next job that may start, in round-robin owner order (condition must be held)"""
+        if self.active >= self.limit:
+            return None
+
+        for _ in range(len(self.owners)):
+            owner = self.owners[0]
+            self.owners.rotate(-1)
+            queued = self.jobs[owner]
+            host = queued[0][0]
+            if self.active_by_host.get(host, 0) >= self._host_limit(host):
+                continue
+
+            job = queued.popleft()
+            if not queued:
+                del self.jobs[owner]
+                self.owners.remove(owner)
+            return job
+        return None
+
+    def _run(self):
+        """Thread loop running jobs as limits allow"""
+        while True:
+            with self.condition:
+                job = self._take_job()
+                while job is None:
+                    if self.is_shutdown:
+                        return
+                    self.condition.wait()
+                    job = self._take_job()
+
+                host, future, func, args = job
+                self.active += 1
+                self.active_by_host[host] = self.active_by_host.get(host, 0) + 1
+
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(func(*args))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self.condition:
+                    self.active -= 1
+                    self.active_by_host[host] -= 1
+                    self.condition.notify_all()
+
+    def shutdown(self):
+        """Cancel queued fetches and stop the threads once running fetches finish"""
+        with self.condition:
+            self.is_shutdown = True
+            queued = [job for jobs in self.jobs.values() for job in jobs]
+            self.jobs.clear()
+            self.owners.clear()
+            self.condition.notify_all()
+        for _, future, _, _ in queued:
+            future.cancel()
+
+
+def create_media_pool(config: Dict[str, Any]) -> MediaFetchPool:
+    """
+    Create the media pool from the download configuration
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        MediaFetchPool limited to download_threads fetches in total
+    """
+    return MediaFetchPool(
+        limit=config.get("download_threads", 3),
+        host_limits=config.get("media_host_limits", {"civitai.com": 2, "image.civitai.com": 6}),
+        default_host_limit=config.get("media_default_host_limit", 4)
+    )
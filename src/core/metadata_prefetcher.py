@@ -0,0 +1,141 @@
+"""
+Metadata lookahead for queued downloads
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+from src.api.civitai_api import CivitaiAPI
+from src.models.model_info import ModelInfo
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class MetadataPrefetcher:
+    """
+    Resolves the model info of the next queued downloads ahead of time
+
+    The scheduler passes the URLs it expects to start next; their model
+    info (versions, file selection and image pages) is fetched on a small
+    bounded pool while the transfer slots are still busy. A starting
+    download takes its prefetched info instead of fetching it again.
+    Entries that drop out of the lookahead window are cancelled, so the
+    pool never works on more than the window.
+    """
+
+    def __init__(self, api: CivitaiAPI, config: Dict[str, Any], workers: int = 2):
+        """
+        Initialize the prefetcher
+
+        Args:
+            api: API client used for the fetches
+            config: Application configuration
+            workers: Number of fetches running at once
+        """
+        self.api = api
+        self.config = config
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="metadata-prefetch")
+        self.entries = {}  # url -> (Future of ModelInfo or None, stop Event)
+        self.lock = threading.Lock()
+        self.resolved_callback = None  # Called with (url, model_info) when a prefetch succeeds
+
+    def prefetch(self, urls: List[str], keep: Optional[List[str]] = None):
+        """
+        Set the lookahead window
+
+        Args:
+            urls: URLs expected to start next, in order
+            keep: URLs whose finished entries should be kept although they
+                are no longer in the window (e.g. downloads just started)
+        """
+        window = set(urls) | set(keep or [])
+        dropped = []
+        with self.lock:
+            for url in list(self.entries):
+                if url not in window:
+                    dropped.append(self.entries.pop(url))
+            for url in urls:
+                if url not in self.entries:
+                    stop = threading.Event()
+                    future = self.executor.submit(self._fetch, url, stop)
+                    self.entries[url] = (future, stop)
+
+        for future, stop in dropped:
+            stop.set()
+            future.cancel()
+
+    def _fetch(self, url: str, stop: threading.Event) -> Optional[ModelInfo]:
+        """Fetch the model info of a URL"""
+        model_id, version_id = self.api.parse_url(url)
+        if not model_id:
+            return None
+
+        try:
+            model_info = self.api.fetch_model_info(
+                model_id,
+                version_id,
+                max_images=self.config.get("top_image_count", 9),
+                stop_check=stop.is_set
+            )
+        except Exception as e:
+            logger.error(f"Error prefetching model info for {url}: {e}")
+            return None
+
+        if model_info and not stop.is_set() and self.resolved_callback:
+            self.resolved_callback(url, model_info)
+        return model_info
+
+    def take(self, url: str, stop_check: Callable[[], bool]) -> Optional[ModelInfo]:
+        """
+        Take the prefetched model info of a URL, waiting if it is being fetched
+
+        A prefetch that hasn't started yet is cancelled, so the caller
+        doesn't wait behind the rest of the window and fetches it itself.
+
+        Args:
+            url: URL of the download
+            stop_check: Callable returning True when waiting should stop
+
+        Returns:
+            ModelInfo, or None if the URL wasn't prefetched, the prefetch
+            failed or waiting was stopped
+        """
+        with self.lock:
+            entry = self.entries.pop(url, None)
+        if entry is None:
+            return None
+
+        future, _ = entry
+        if future.cancel():
+            return None
+        while not stop_check():
+            try:
+                return future.result(timeout=0.5)
+            except FuturesTimeoutError:
+                continue
+            except Exception:
+                return None
+        return None
+
+    def clear(self):
+        """Drop all entries, e.g. after settings affecting the model info changed"""
+        self.prefetch([])
+
+    def shutdown(self):
+        """Cancel the prefetches and stop the pool"""
+        self.clear()
+        self.executor.shutdown(wait=False)
+
+
+def create_metadata_prefetcher(api: CivitaiAPI, config: Dict[str, Any]) -> MetadataPrefetcher:
+    """
+    Create the metadata prefetcher from the download configuration
+
+    Args:
+        api: API client used for the fetches
+        config: Application configuration
+
+    Returns:
+        MetadataPrefetcher running metadata_workers fetches at once
+    """
+    return MetadataPrefetcher(api, config, workers=config.get("metadata_workers", 2))
@@ -0,0 +1,157 @@
+"""
+Time-of-day rules for download bandwidth and concurrency
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RULE_PATTERN = re.compile(
+    r"^\s*(\d{1,2}):(\d{2})\s*[-–—]\s*(\d{1,2}):(\d{2})"  # Window, e.g. 09:00-19:00
+    r"(?:\s+(unlimited|(\d+(?:\.\d+)?)\s*(KB/s|MB/s)))?"  # Bandwidth
+    r"(?:\s+(?:max\s+(\d+)|(paused)))?\s*$",  # Concurrent models
+    re.IGNORECASE
+)
+
+@dataclass
+class ScheduleRule:
+    """A daily window with its own bandwidth limit and number of downloads"""
+    start: int  # Minutes after midnight
+    end: int  # Minutes after midnight; before start for windows past midnight
+    bandwidth_kbps: Optional[int] = None  # None keeps the bandwidth setting, 0 is unlimited
+    max_downloads: Optional[int] = None  # None keeps the concurrency setting, 0 pauses
+
+    def contains(self, minute: int) -> bool:
+        """Check if a minute of the day falls in the window"""
+        if self.start == self.end:
+            # 00:00-24:00 and the like cover the whole day
+            return True
+        if self.start < self.end:
+            return self.start <= minute < self.end
+        return minute >= self.start or minute < self.end
+
+    def describe(self) -> str:
+        """Describe the rule in the format it is written in"""
+        end = self.end or 24 * 60  # Midnight ends a window as 24:00
+        parts = [f"{self.start // 60:02d}:{self.start % 60:02d}-{end // 60:02d}:{end % 60:02d}"]
+        if self.bandwidth_kbps == 0:
+            parts.append("unlimited")
+        elif self.bandwidth_kbps is not None:
+            if self.bandwidth_kbps % 1024 == 0:
+                parts.append(f"{self.bandwidth_kbps // 1024} MB/s")
+            else:
+                parts.append(f"{self.bandwidth_kbps} KB/s")
+        if self.max_downloads == 0:
+            parts.append("paused")
+        elif self.max_downloads is not None:
+            parts.append(f"max {self.max_downloads}")
+        return " ".join(parts)
+
+
+def parse_rule(text: str) -> ScheduleRule:
+    """
+    Parse a schedule rule
+
+    Rules look like "00:00-07:00 unlimited", "09:00-19:00 2 MB/s max 1"
+    or "12:00-13:00 paused". A window ending before it starts runs past
+    midnight, one ending where it starts covers the whole day.
+
+    Args:
+        text: Rule text
+
+    Returns:
+        ScheduleRule
+
+    Raises:
+        ValueError: If the text is not a valid rule
+    """
+    match = RULE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Invalid schedule rule: {text!r} (expected e.g. \"09:00-19:00 2 MB/s max 1\")")
+
+    start_h, start_m, end_h, end_m, bandwidth, amount, unit, max_downloads, paused = match.groups()
+    start_h, start_m, end_h, end_m = int(start_h), int(start_m), int(end_h), int(end_m)
+    if start_h > 23 or end_h > 24 or start_m > 59 or end_m > 59 or (end_h == 24 and end_m):
+        raise ValueError(f"Invalid time in schedule rule: {text!r}")
+
+    rule = ScheduleRule(start=start_h * 60 + start_m, end=(end_h * 60 + end_m) % (24 * 60))
+    if bandwidth:
+        if amount is None:
+            rule.bandwidth_kbps = 0
+        else:
+            rule.bandwidth_kbps = max(1, int(float(amount) * (1024 if unit.upper() == "MB/S" else 1)))
+    if paused:
+        rule.max_downloads = 0
+    elif max_downloads is not None:
+        rule.max_downloads = int(max_downloads)
+    return rule
+
+
+def parse_rules(lines: List[str]) -> List[ScheduleRule]:
+    """
+    Parse the rules of the schedule_rules setting, skipping invalid ones
+
+    Args:
+        lines: Rule texts
+
+    Returns:
+        Valid rules in their original order
+    """
+    rules = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            rules.append(parse_rule(line))
+        except ValueError as e:
+            logger.error(str(e))
+    return rules
+
+
+def get_active_rule(rules: List[ScheduleRule], now: datetime) -> Optional[ScheduleRule]:
+    """
+    Get the rule in effect at a time
+
+    Args:
+        rules: Rules in order; the first matching window wins
+        now: Local time
+
+    Returns:
+        The active rule, or None outside all windows
+    """
+    minute = now.hour * 60 + now.minute
+    return next((rule for rule in rules if rule.contains(minute)), None)
+
+
+def get_next_change(rules: List[ScheduleRule], now: datetime) -> Optional[Tuple[datetime, Optional[ScheduleRule]]]:
+    """
+    Find when the active rule changes next
+
+    Args:
+        rules: Rules in order
+        now: Local time
+
+    Returns:
+        Tuple of (time of the change, rule taking over or None), or None if
+        the rule never changes
+    """
+    current = get_active_rule(rules, now)
+    start = now.replace(second=0, microsecond=0)
+    minute = start.hour * 60 + start.minute
+
+    # Minutes from now to every window boundary within the next day
+    offsets = set()
+    for rule in rules:
+        for boundary in (rule.start, rule.end):
+            offsets.add((boundary - minute) % (24 * 60) or 24 * 60)
+
+    for offset in sorted(offsets):
+        moment = start + timedelta(minutes=offset)
+        rule = get_active_rule(rules, moment)
+        if rule is not current:
+            return moment, rule
+    return None
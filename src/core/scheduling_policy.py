@@ -0,0 +1,83 @@
+"""
+Size-aware policies choosing the next download
+"""
+from typing import List, Optional
+
+from src.models.download_task import DownloadTask
+
+def _smallest(tasks: List[DownloadTask]) -> Optional[DownloadTask]:
+    """Smallest known size first, unknown sizes after them in queue order"""
+    return min(tasks, key=lambda t: (t.size == 0, t.size), default=None)
+
+def _largest(tasks: List[DownloadTask]) -> Optional[DownloadTask]:
+    """Largest known size first, unknown sizes after them in queue order"""
+    return min(tasks, key=lambda t: (t.size == 0, -t.size), default=None)
+
+def select_task(policy: str, queued: List[DownloadTask], active: List[DownloadTask],
+                large_size: int) -> Optional[DownloadTask]:
+    """
+    Choose the next task to start
+
+    Policies:
+        fifo: queue order
+        sjf: smallest model file first, so the most models finish per hour
+        largest: largest model file first
+        mixed: one slot for a large file (in queue order) while the other
+            slots take small files smallest first; if only large files are
+            queued they use the free slots too
+
+    Ties and tasks whose size is still unknown keep their queue order.
+
+    Args:
+        policy: Name of the policy (see SCHEDULING_POLICIES)
+        queued: Queued tasks in queue order
+        active: Tasks currently downloading
+        large_size: Size in bytes from which a file counts as large
+
+    Returns:
+        The task to start, or None if nothing is queued
+    """
+    if not queued:
+        return None
+
+    if policy == "sjf":
+        return _smallest(queued)
+    if policy == "largest":
+        return _largest(queued)
+    if policy == "mixed":
+        large = [t for t in queued if t.size >= large_size]
+        small = [t for t in queued if t.size < large_size]
+        large_running = any(t.size >= large_size for t in active)
+        if large and (not large_running or not small):
+            return large[0]
+        return _smallest(small)
+
+    return queued[0]
+
+def upcoming_tasks(policy: str, queued: List[DownloadTask], active: List[DownloadTask],
+                   large_size: int, count: int) -> List[DownloadTask]:
+    """
+    Predict the order in which the policy will start queued tasks
+
+    Each pick is assumed to still be running when the next one is chosen,
+    which is what the mixed policy needs to know about large files.
+
+    Args:
+        policy: Name of the policy (see SCHEDULING_POLICIES)
+        queued: Queued tasks in queue order
+        active: Tasks currently downloading
+        large_size: Size in bytes from which a file counts as large
+        count: Maximum number of tasks to return
+
+    Returns:
+        Up to count tasks in the order they are expected to start
+    """
+    queued = list(queued)
+    active = list(active)
+    upcoming = []
+    while queued and len(upcoming) < count:
+        task = select_task(policy, queued, active, large_size)
+        upcoming.append(task)
+        queued.remove(task)
+        active.append(task)
+    return upcoming
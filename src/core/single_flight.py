@@ -0,0 +1,56 @@
+"""
+Single-flight coordination for downloads of the same model version
+"""
+import threading
+from concurrent.futures import Future
+from typing import Hashable, Tuple
+
+class SingleFlight:
+    """
+    Lets concurrent downloads of the same key share one transfer
+
+    The first download to join a key leads and does the work; later ones
+    get the leader's future and wait for its result instead of fetching the
+    same files again. The leader finishes the flight with its result, or
+    with None if it stopped without one, so a waiting download can take
+    over.
+    """
+
+    def __init__(self):
+        """Initialize with no flights"""
+        self.flights = {}  # key -> Future of the leading download
+        self.lock = threading.Lock()
+
+    def join(self, key: Hashable) -> Tuple[bool, Future]:
+        """
+        Join the flight for a key
+
+        Args:
+            key: Key of the work (e.g. a model version ID)
+
+        Returns:
+            Tuple of (is_leader, future); the future resolves to the
+            leader's result
+        """
+        with self.lock:
+            future = self.flights.get(key)
+            if future is not None:
+                return False, future
+            future = Future()
+            self.flights[key] = future
+            return True, future
+
+    def finish(self, key: Hashable, future: Future, result=None):
+        """
+        End a flight and hand its result to the waiting downloads
+
+        Args:
+            key: Key of the work
+            future: Future returned to the leader by join
+            result: Result of the work, or None if the leader stopped without one
+        """
+        with self.lock:
+            if self.flights.get(key) is future:
+                del self.flights[key]
+        if not future.done():
+            future.set_result(result)
@@ -0,0 +1,82 @@
+"""
+Background size probes for queued downloads
+"""
+import queue
+import threading
+
+from PySide6.QtCore import QObject, Signal
+
+from src.api.civitai_api import CivitaiAPI
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class SizeProber(QObject):
+    """
+    Looks up the model file size of queued tasks one at a time
+
+    Probes run on a background thread and results are cached per URL, so a
+    task is only probed once. Each result is delivered through the
+    size_probed signal, which reaches GUI-thread receivers queued.
+    """
+    size_probed = Signal(str, int)  # task_id, size in bytes
+
+    def __init__(self, api: CivitaiAPI, parent=None):
+        """
+        Initialize the prober
+
+        Args:
+            api: API client used for the probes
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.api = api
+        self.sizes = {}  # url -> size in bytes (0 if it couldn't be determined)
+        self.pending = set()  # URLs queued for probing
+        self.requests = queue.Queue()
+        self.thread = None
+
+    def probe(self, task):
+        """
+        Queue a size probe for a task unless its size is known or being probed
+
+        Args:
+            task: DownloadTask to probe
+        """
+        if task.url in self.sizes:
+            if self.sizes[task.url]:
+                self.size_probed.emit(task.task_id, self.sizes[task.url])
+            return
+        if task.url in self.pending:
+            return
+
+        self.pending.add(task.url)
+        self.requests.put((task.task_id, task.url))
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="size-prober", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        """Probe queued tasks until stopped"""
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+
+            task_id, url = request
+            try:
+                size = self.api.fetch_file_size(url)
+            except Exception as e:
+                logger.error(f"Error probing size of {url}: {e}")
+                size = 0
+
+            self.sizes[url] = size
+            self.pending.discard(url)
+            if size:
+                self.size_probed.emit(task_id, size)
+
+    def stop(self):
+        """Stop the background thread after the current probe"""
+        if self.thread is not None:
+            self.requests.put(None)
+            self.thread = None
@@ -0,0 +1,217 @@
+"""
+Background mover for downloads finished in a staging folder
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class StagingMover:
+    """
+    Moves finished model folders from a staging folder into the library
+
+    Downloads write to a fast local staging folder and hand the finished,
+    verified folder to the mover, which moves it into the models folder on a
+    small bounded pool. Files are renamed when both folders are on the same
+    file system and copied in chunks otherwise; a copy goes to a temporary
+    name first, so the library never holds a partial file. Files are moved
+    smallest first, so the model file only leaves the staging folder once
+    everything else has, and an interrupted move resumes from the staging
+    folder on the next run.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, workers: int = 1):
+        """
+        Initialize the mover
+
+        Args:
+            workers: Number of folders moved at once
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="staging-mover")
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+        # Statistics
+        self.backlog_bytes = 0  # Bytes still to be moved, including queued folders
+        self.pending_folders = 0
+        self.moved_bytes = 0
+        self.copied_bytes = 0  # Part of moved_bytes that had to be copied across file systems
+
+    def submit(self, staging_folder: Path, target_folder: Path,
+               done_callback: Callable[[bool, str], None]):
+        """
+        Queue a finished folder to be moved into the library
+
+        Args:
+            staging_folder: Folder the download was written to
+            target_folder: Folder in the library the files belong in
+            done_callback: Called with (success, error message) once the move
+                ended; not called if the mover was stopped first
+        """
+        size = sum(path.stat().st_size for path in staging_folder.rglob("*") if path.is_file())
+        with self.lock:
+            self.backlog_bytes += size
+            self.pending_folders += 1
+        self.executor.submit(self._run, staging_folder, target_folder, size, done_callback)
+
+    def _run(self, staging_folder: Path, target_folder: Path, size: int,
+             done_callback: Callable[[bool, str], None]):
+        """Move a folder and report the outcome"""
+        remaining = [size]  # Bytes of this folder still counted in the backlog
+        try:
+            self._move_folder(staging_folder, target_folder, remaining)
+        except Exception as e:
+            if self.stop_event.is_set():
+                # The staging folder is kept and moved again next time
+                logger.info(f"Move of {staging_folder} stopped")
+                return
+            logger.error(f"Error moving {staging_folder} to {target_folder}: {e}")
+            done_callback(False, f"Failed to move the download into the library: {e}")
+            return
+        finally:
+            with self.lock:
+                self.backlog_bytes -= remaining[0]
+                self.pending_folders -= 1
+
+        logger.info(f"Moved {staging_folder} to {target_folder}")
+        done_callback(True, "")
+
+    def _move_folder(self, staging_folder: Path, target_folder: Path, remaining: list):
+        """Move every file of a folder, smallest first, and remove the emptied folders"""
+        files = sorted(
+            (path for path in staging_folder.rglob("*") if path.is_file()),
+            key=lambda path: path.stat().st_size
+        )
+        target_folder.mkdir(parents=True, exist_ok=True)
+        same_device = os.stat(staging_folder).st_dev == os.stat(target_folder).st_dev
+
+        for source in files:
+            if self.stop_event.is_set():
+                raise InterruptedError("mover stopped")
+            target = target_folder / source.relative_to(staging_folder)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            size = source.stat().st_size
+            if same_device:
+                os.replace(source, target)
+                self._count(size, remaining, copied=False)
+            else:
+                self._copy_file(source, target, remaining)
+                source.unlink()
+
+        # Deepest folders first so their parents are empty when they are removed
+        try:
+            for folder in sorted((p for p in staging_folder.rglob("*") if p.is_dir()), reverse=True):
+                folder.rmdir()
+            staging_folder.rmdir()
+        except OSError as e:
+            # The files are in the library, a leftover folder is harmless
+            logger.warning(f"Could not remove staging folder {staging_folder}: {e}")
+
+    def _copy_file(self, source: Path, target: Path, remaining: list):
+        """Stream a file to another file system through a temporary name"""
+        temp_path = get_copy_path(target)
+        try:
+            with open(source, "rb") as src, open(temp_path, "wb") as dst:
+                while True:
+                    if self.stop_event.is_set():
+                        raise InterruptedError("mover stopped")
+                    chunk = src.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    self._count(len(chunk), remaining, copied=True)
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            if temp_path.stat().st_size != source.stat().st_size:
+                raise IOError(f"copy of {source.name} is incomplete")
+            os.replace(temp_path, target)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+    def _count(self, size: int, remaining: list, copied: bool):
+        """Take moved bytes off the backlog"""
+        with self.lock:
+            self.backlog_bytes -= size
+            self.moved_bytes += size
+            if copied:
+                self.copied_bytes += size
+        remaining[0] -= size
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get mover statistics
+
+        Returns:
+            Dictionary with backlog_bytes (bytes still to be moved),
+            pending_folders, moved_bytes and copied_bytes
+        """
+        with self.lock:
+            return {
+                "backlog_bytes": self.backlog_bytes,
+                "pending_folders": self.pending_folders,
+                "moved_bytes": self.moved_bytes,
+                "copied_bytes": self.copied_bytes,
+            }
+
+    def shutdown(self):
+        """Stop the running moves after their current chunk and drop the queued ones"""
+        self.stop_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_staging_folder(config: Dict[str, Any], target_folder: Path) -> Optional[Path]:
+    """
+    Get the staging folder mirroring a library folder
+
+    Args:
+        config: Application configuration
+        target_folder: Folder in the models folder the download belongs in
+
+    Returns:
+        Folder under staging_path with the same relative path, or None if
+        staging is disabled
+    """
+    staging_path = config.get("staging_path", "")
+    if not staging_path:
+        return None
+    base_path = Path(config.get("comfy_path", ""))
+    try:
+        relative = target_folder.relative_to(base_path)
+    except ValueError:
+        relative = Path(target_folder.name)
+    return Path(staging_path) / relative
+
+
+def get_copy_path(target: Path) -> Path:
+    """
+    Get the temporary name a file is copied to across file systems
+
+    Args:
+        target: Final path of the file in the library
+
+    Returns:
+        Path the copy is written to before it is renamed into place
+    """
+    return target.with_name(target.name + ".moving")
+
+
+def create_staging_mover(config: Dict[str, Any]) -> StagingMover:
+    """
+    Create the staging mover from the download configuration
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        StagingMover moving mover_workers folders at once
+    """
+    return StagingMover(workers=config.get("mover_workers", 1))
@@ -185,6 +185,22 @@ class ModelsDatabase:
         """Get a model by ID"""
         return self.models.get(model_id, {})
     
+    def has_version(self, model_id: int, version_id: Optional[int]) -> bool:
+        """
+        Check if a model version is already in the library
+        
+        Args:
+            model_id: Model ID
+            version_id: Version ID
+            
+        Returns:
+            True if the model is stored with this version and its folder still exists
+        """
+        model = self.models.get(str(model_id))
+        if not model or version_id is None or model.get("version_id") != version_id:
+            return False
+        return not model.get("path") or Path(model["path"]).exists()
+    
     def add_model(self, model_info: ModelInfo) -> None:
         """Add or update a model in the database"""
         model_id = str(model_info.id)
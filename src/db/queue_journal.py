@@ -0,0 +1,272 @@
+"""
+Write-ahead journal persisting the download queue
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from src.constants import DOWNLOAD_STATUS
+from src.utils.indexed_queue import IndexedQueue
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Statuses after which a task is no longer restored
+FINISHED_STATUSES = [DOWNLOAD_STATUS["COMPLETED"], DOWNLOAD_STATUS["FAILED"], DOWNLOAD_STATUS["CANCELED"]]
+
+# Task fields carried by "progress" entries
+PROGRESS_FIELDS = ["model_progress", "image_progress", "bytes_downloaded", "size"]
+
+class QueueJournal:
+    """
+    Append-only SQLite journal of download queue operations
+
+    Every queue change is appended as one row (add, move, status, progress,
+    clear). Rows are buffered in memory and written by a background thread
+    in one transaction per batch, so recording never blocks the caller;
+    progress rows for the same task within a batch are coalesced. At startup
+    the journal is replayed to rebuild the queue and then compacted to a
+    snapshot of the unfinished tasks.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, flush_interval: float = 1.0):
+        """
+        Initialize the journal
+
+        Args:
+            db_path: Path of the journal database (defaults to queue.db next to models.db)
+            flush_interval: Seconds between batched writes
+        """
+        if db_path is None:
+            db_dir = Path.home() / ".civitai_manager" / "db"
+            db_dir.mkdir(parents=True, exist_ok=True)
+            db_path = db_dir / "queue.db"
+
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue()
+        self.stop_event = threading.Event()
+        self.writer = None
+
+        self._init_sqlite()
+
+    def _init_sqlite(self):
+        """Initialize SQLite database"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            # WAL keeps appends cheap and survives crashes mid-write
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS queue_journal (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp REAL NOT NULL,
+                op TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                data TEXT NOT NULL
+            )
+            ''')
+
+            conn.commit()
+            conn.close()
+
+        except Exception as e:
+            logger.error(f"Error initializing queue journal: {e}")
+
+    def record(self, op: str, task_id: str = "", url: str = "", **data):
+        """
+        Append an operation to the journal without waiting for the write
+
+        Args:
+            op: Operation (add, move, status, progress or clear)
+            task_id: ID of the task the operation applies to
+            url: URL of the task
+            **data: Operation details (position, status, progress fields)
+        """
+        self.pending.put((time.time(), op, task_id, url, data))
+
+    def start(self):
+        """Start the background writer"""
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write_loop, name="queue-journal", daemon=True)
+            self.writer.start()
+
+    def close(self):
+        """Write everything still buffered and stop the background writer"""
+        self.stop_event.set()
+        if self.writer is not None:
+            self.writer.join(timeout=5)
+            self.writer = None
+
+    def _write_loop(self):
+        """Write buffered operations in batches until closed"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            while not self.stop_event.wait(self.flush_interval):
+                self._flush(conn)
+            self._flush(conn)
+        finally:
+            conn.close()
+
+    def _flush(self, conn):
+        """Write all buffered operations in one transaction"""
+        batch = []
+        while True:
+            try:
+                batch.append(self.pending.get_nowait())
+            except queue.Empty:
+                break
+        if not batch:
+            return
+
+        # Only the last progress entry of each task matters
+        last_progress = {}
+        for i, (_, op, task_id, _, _) in enumerate(batch):
+            if op == "progress":
+                last_progress[task_id] = i
+        rows = [
+            (timestamp, op, task_id, url, json.dumps(data))
+            for i, (timestamp, op, task_id, url, data) in enumerate(batch)
+            if op != "progress" or last_progress[task_id] == i
+        ]
+
+        try:
+            with conn:
+                conn.executemany(
+                    'INSERT INTO queue_journal (timestamp, op, task_id, url, data) VALUES (?, ?, ?, ?, ?)',
+                    rows
+                )
+        except Exception as e:
+            logger.error(f"Error writing queue journal: {e}")
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        Rebuild the unfinished tasks from the journal and compact it
+
+        Tasks that were downloading are returned as queued at the front of
+        the queue so they resume from their partial files.
+
+        Returns:
+            List of task dicts (task_id, url, status, priority and progress
+            fields): queued tasks in queue order, then paused tasks
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            rows = conn.execute('SELECT op, task_id, url, data FROM queue_journal ORDER BY seq').fetchall()
+        except Exception as e:
+            logger.error(f"Error loading queue journal: {e}")
+            return []
+
+        tasks = self._replay(rows)
+        try:
+            self._compact(conn, tasks)
+        except Exception as e:
+            logger.error(f"Error compacting queue journal: {e}")
+        finally:
+            conn.close()
+
+        if tasks:
+            logger.info(f"Restored {len(tasks)} download tasks from the queue journal")
+        return tasks
+
+    def _replay(self, rows) -> List[Dict[str, Any]]:
+        """Apply journal rows in order and return the unfinished tasks"""
+        tasks = {}  # task_id -> task dict
+        task_by_url = {}  # url -> task_id
+        order = IndexedQueue()  # task_ids of queued tasks
+
+        for op, task_id, url, data in rows:
+            data = json.loads(data)
+
+            if op == "clear":
+                for queued_id in list(order):
+                    del tasks[queued_id]
+                order.clear()
+                continue
+
+            if op == "add":
+                # A URL added again replaces its finished task
+                old_id = task_by_url.pop(url, None)
+                if old_id in tasks:
+                    del tasks[old_id]
+                    if old_id in order:
+                        order.remove(old_id)
+                tasks[task_id] = {
+                    "task_id": task_id,
+                    "url": url,
+                    "status": DOWNLOAD_STATUS["QUEUED"],
+                    "priority": len(order),
+                    "model_progress": 0,
+                    "image_progress": 0,
+                    "bytes_downloaded": 0,
+                    "size": 0,
+                }
+                task_by_url[url] = task_id
+                order.append(task_id)
+                continue
+
+            task = tasks.get(task_id)
+            if task is None:
+                continue
+
+            if op == "move":
+                if task_id in order:
+                    order.move(task_id, data.get("position", 0))
+                task["priority"] = data.get("position", 0)
+
+            elif op == "progress":
+                for key in PROGRESS_FIELDS:
+                    if key in data:
+                        task[key] = data[key]
+
+            elif op == "status":
+                status = data.get("status")
+                if task_id in order:
+                    order.remove(task_id)
+
+                if status in FINISHED_STATUSES:
+                    del tasks[task_id]
+                    task_by_url.pop(url, None)
+                    continue
+
+                task["status"] = status
+                if "position" in data:
+                    task["priority"] = data["position"]
+                if status == DOWNLOAD_STATUS["QUEUED"]:
+                    order.insert(task["priority"], task_id)
+
+        # Interrupted downloads go first, then the queue, then paused tasks
+        downloading = [t for t in tasks.values() if t["status"] == DOWNLOAD_STATUS["DOWNLOADING"]]
+        for task in downloading:
+            task["status"] = DOWNLOAD_STATUS["QUEUED"]
+        queued = downloading + [tasks[task_id] for task_id in order]
+        for position, task in enumerate(queued):
+            task["priority"] = position
+        paused = [t for t in tasks.values() if t["status"] == DOWNLOAD_STATUS["PAUSED"]]
+
+        return queued + paused
+
+    def _compact(self, conn, tasks: List[Dict[str, Any]]):
+        """Replace the journal with a snapshot of the restored tasks"""
+        now = time.time()
+        rows = []
+        for task in tasks:
+            rows.append((now, "add", task["task_id"], task["url"], "{}"))
+            progress = {key: task[key] for key in PROGRESS_FIELDS}
+            rows.append((now, "progress", task["task_id"], task["url"], json.dumps(progress)))
+            if task["status"] == DOWNLOAD_STATUS["PAUSED"]:
+                status = {"status": task["status"], "position": task["priority"]}
+                rows.append((now, "status", task["task_id"], task["url"], json.dumps(status)))
+
+        with conn:
+            conn.execute('DELETE FROM queue_journal')
+            conn.executemany(
+                'INSERT INTO queue_journal (timestamp, op, task_id, url, data) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
@@ -1,6 +1,7 @@
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import time
+import uuid
 from typing import Optional, Dict
 
 from src.constants import DOWNLOAD_STATUS
@@ -16,10 +17,13 @@ class DownloadTask:
     model_info: Optional[ModelInfo] = None
     model_progress: int = 0
     image_progress: int = 0
+    bytes_downloaded: int = 0
+    size: int = 0  # Size of the model file in bytes from a size probe, 0 if unknown
     error_message: str = ""
     start_time: float = 0
     end_time: float = 0
     priority: int = 0  # Lower number = higher priority
+    task_id: str = field(default_factory=lambda: uuid.uuid4().hex)  # Stable across retries of the same task
     
     def get_duration(self) -> float:
         """Get the duration of the download in seconds"""
@@ -37,5 +41,7 @@ class DownloadTask:
             return theme["danger"]
         elif self.status == DOWNLOAD_STATUS["DOWNLOADING"]:
             return theme["accent"]
+        elif self.status == DOWNLOAD_STATUS["PAUSED"]:
+            return theme["warning"]
         else:
             return theme["text_secondary"]
@@ -30,6 +30,8 @@ class ModelInfo:
     path: str = ""
     rating: int = 0
     dependencies: List[Dict] = field(default_factory=list)
+    file_hashes: Dict = field(default_factory=dict)  # Hashes published for the model file
+    sha256: str = ""  # Verified SHA256 of the downloaded model file
     
     def to_dict(self) -> Dict:
         """Convert model info to dictionary"""
@@ -54,7 +56,9 @@ class ModelInfo:
             "favorite": self.favorite,
             "path": self.path,
             "rating": self.rating,
-            "dependencies": self.dependencies
+            "dependencies": self.dependencies,
+            "file_hashes": self.file_hashes,
+            "sha256": self.sha256
         }
 
     @classmethod
@@ -81,7 +85,9 @@ class ModelInfo:
             favorite=data.get("favorite", False),
             path=data.get("path", ""),
             rating=data.get("rating", 0),
-            dependencies=data.get("dependencies", [])
+            dependencies=data.get("dependencies", []),
+            file_hashes=data.get("file_hashes", {}),
+            sha256=data.get("sha256", "")
         )
     
     def calculate_overall_rating(self):
@@ -55,6 +55,12 @@ class BandwidthGraph(QWidget):
             pen=pg.mkPen(color=self.theme["accent"], width=2)
         )
         
+        # Bandwidth limit line (hidden while unlimited)
+        self.limit_plot = self.graph_widget.plot(
+            [], [],
+            pen=pg.mkPen(color=self.theme["warning"], width=1, style=Qt.DashLine)
+        )
+        
         # Set axis labels
         self.graph_widget.setLabel('left', 'Speed', 'B/s')
         self.graph_widget.setLabel('bottom', 'Time', 's')
@@ -70,7 +76,7 @@ class BandwidthGraph(QWidget):
         layout.addWidget(self.bandwidth_label)
         layout.addWidget(self.graph_widget)
         
-    def update_data(self, times, values):
+    def update_data(self, times, values, limit=0):
         """Update graph with new data"""
         if not times or not values:
             return
@@ -79,13 +85,21 @@ class BandwidthGraph(QWidget):
         if values and max(values) > 0:
             # Use current bandwidth for label
             current_bw = values[-1] if values else 0
-            self.bandwidth_label.setText(f"{format_size(current_bw)}/s")
+            if limit:
+                self.bandwidth_label.setText(f"{format_size(current_bw)}/s (limit {format_size(limit)}/s)")
+            else:
+                self.bandwidth_label.setText(f"{format_size(current_bw)}/s")
             
             # Update plot data
             self.plot.setData(times, values)
             
+            if limit:
+                self.limit_plot.setData([times[0], times[-1]], [limit, limit])
+            else:
+                self.limit_plot.setData([], [])
+            
             # Update y axis range with some padding
-            max_value = max(values) * 1.1  # 10% padding
+            max_value = max(max(values), limit) * 1.1  # 10% padding
             self.graph_widget.setYRange(0, max_value)
     
     def set_theme(self, theme):
@@ -109,6 +123,7 @@ class BandwidthGraph(QWidget):
         # Update graph appearance
         self.graph_widget.setBackground(self.theme["secondary"])
         self.plot.setPen(pg.mkPen(color=self.theme["accent"], width=2))
+        self.limit_plot.setPen(pg.mkPen(color=self.theme["warning"], width=1, style=Qt.DashLine))
         
         # Update axis colors
         axis_pen = pg.mkPen(color=self.theme["text_secondary"])
@@ -119,4 +134,5 @@ class BandwidthGraph(QWidget):
     def clear(self):
         """Clear the graph"""
         self.plot.clear()
+        self.limit_plot.clear()
         self.bandwidth_label.setText("0 B/s")
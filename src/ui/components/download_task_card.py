@@ -131,8 +131,8 @@ class DownloadTaskCard(QWidget):
         
         layout.addWidget(self.info_label)
         
-        # Cancel button (only for queued or downloading tasks)
-        if self.task.status in [DOWNLOAD_STATUS["QUEUED"], DOWNLOAD_STATUS["DOWNLOADING"]]:
+        # Cancel button (only for queued, downloading or paused tasks)
+        if self.task.status in [DOWNLOAD_STATUS["QUEUED"], DOWNLOAD_STATUS["DOWNLOADING"], DOWNLOAD_STATUS["PAUSED"]]:
             self.cancel_btn = QPushButton("Cancel")
             self.cancel_btn.setStyleSheet(f"""
                 QPushButton {{
@@ -236,7 +236,7 @@ class DownloadTaskCard(QWidget):
         
         # Update cancel button visibility
         if hasattr(self, 'cancel_btn'):
-            if self.task.status not in [DOWNLOAD_STATUS["QUEUED"], DOWNLOAD_STATUS["DOWNLOADING"]]:
+            if self.task.status not in [DOWNLOAD_STATUS["QUEUED"], DOWNLOAD_STATUS["DOWNLOADING"], DOWNLOAD_STATUS["PAUSED"]]:
                 self.cancel_btn.setVisible(False)
     
     def update_info_label(self):
@@ -2,7 +2,8 @@
 """
 Smart queue widget with drag and drop functionality
 """
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 import time
 
 from PySide6.QtWidgets import (
@@ -13,15 +14,18 @@ from PySide6.QtCore import Qt, Signal, QEvent, QMimeData, QPoint, QTimer
 from PySide6.QtGui import QDrag, QMouseEvent
 
 from src.constants import DOWNLOAD_STATUS
+from src.core.schedule_rules import ScheduleRule
 from src.models.download_task import DownloadTask
 from src.ui.components.download_task_card import DownloadTaskCard
 from src.ui.components.bandwidth_graph import BandwidthGraph
-from src.utils.formatting import format_duration
+from src.utils.formatting import format_duration, format_size
 
 class SmartQueueWidget(QWidget):
     """Smart queue widget with bandwidth monitoring and ETA"""
     
     cancel_requested = Signal(str)  # url
+    pause_requested = Signal(str)  # url
+    resume_requested = Signal(str)  # url
     clear_requested = Signal()
     move_requested = Signal(str, int)  # url, new_position
     
@@ -110,8 +114,43 @@ class SmartQueueWidget(QWidget):
         eta_layout.addWidget(self.eta_value)
         eta_layout.addStretch()
         
+        # Effective concurrency display
+        concurrency_label = QLabel("Concurrency:")
+        concurrency_label.setStyleSheet(f"color: {self.theme['text_secondary']};")
+        
+        self.concurrency_value = QLabel("-")
+        self.concurrency_value.setStyleSheet(f"color: {self.theme['text']};")
+        
+        eta_layout.addWidget(concurrency_label)
+        eta_layout.addWidget(self.concurrency_value)
+        
         stats_layout.addLayout(eta_layout)
         
+        # Active schedule rule and the next change
+        schedule_layout = QHBoxLayout()
+        
+        schedule_label = QLabel("Schedule:")
+        schedule_label.setStyleSheet(f"color: {self.theme['text_secondary']};")
+        
+        self.schedule_value = QLabel("-")
+        self.schedule_value.setStyleSheet(f"color: {self.theme['text']};")
+        
+        schedule_layout.addWidget(schedule_label)
+        schedule_layout.addWidget(self.schedule_value)
+        schedule_layout.addStretch()
+        
+        # Bytes waiting to be moved from the staging folder into the library
+        mover_label = QLabel("Moving:")
+        mover_label.setStyleSheet(f"color: {self.theme['text_secondary']};")
+        
+        self.mover_value = QLabel("-")
+        self.mover_value.setStyleSheet(f"color: {self.theme['text']};")
+        
+        schedule_layout.addWidget(mover_label)
+        schedule_layout.addWidget(self.mover_value)
+        
+        stats_layout.addLayout(schedule_layout)
+        
         # Bandwidth graph
         self.bandwidth_graph = BandwidthGraph(self.theme)
         stats_layout.addWidget(self.bandwidth_graph)
@@ -152,9 +191,9 @@ class SmartQueueWidget(QWidget):
                 child.setStyleSheet(f"font-size: 16px; font-weight: bold; color: {self.theme['text']};")
             elif child == self.queue_count:
                 child.setStyleSheet(f"color: {self.theme['text_secondary']};")
-            elif child == self.eta_value:
+            elif child in (self.eta_value, self.concurrency_value, self.schedule_value, self.mover_value):
                 child.setStyleSheet(f"color: {self.theme['text']};")
-            elif "Estimated Time" in child.text():
+            elif child.text() in ("Estimated Time:", "Concurrency:", "Schedule:"):
                 child.setStyleSheet(f"color: {self.theme['text_secondary']};")
         
         # Update clear button
@@ -212,10 +251,68 @@ class SmartQueueWidget(QWidget):
             else:
                 self.tasks_layout.insertWidget(position, card)
     
+    def reorder_tasks(self, tasks: List[DownloadTask]):
+        """
+        Reorder the cards of a group of tasks in one pass
+        
+        Args:
+            tasks: Tasks in their new order (e.g. the queued tasks in queue order)
+        """
+        cards = [self.task_cards[task.url] for task in tasks if task.url in self.task_cards]
+        
+        # Reuse the layout slots the queued cards already occupy
+        slots = sorted(self.tasks_layout.indexOf(card) for card in cards)
+        for card in cards:
+            self.tasks_layout.removeWidget(card)
+        for slot, card in zip(slots, cards):
+            self.tasks_layout.insertWidget(slot, card)
+    
+    def set_concurrency(self, downloads: int, image_threads: int, adaptive: bool):
+        """
+        Show the effective concurrency
+        
+        Args:
+            downloads: Number of concurrent model downloads
+            image_threads: Number of image fetches across all downloads
+            adaptive: Whether the values are picked by the adaptive controller
+        """
+        text = f"{downloads} downloads, {image_threads} image fetches"
+        if adaptive:
+            text += " (adaptive)"
+        self.concurrency_value.setText(text)
+    
+    def set_schedule(self, rule: Optional[ScheduleRule], next_change: Optional[Tuple[datetime, Optional[ScheduleRule]]]):
+        """
+        Show the schedule rule in effect and when it changes next
+        
+        Args:
+            rule: Active rule, or None outside all windows
+            next_change: Tuple of (time, rule taking over or None), or None
+                if the rule never changes
+        """
+        text = rule.describe() if rule else "No rule (settings apply)"
+        if next_change:
+            moment, next_rule = next_change
+            text += f", at {moment.strftime('%H:%M')}: {next_rule.describe() if next_rule else 'no rule'}"
+        self.schedule_value.setText(text)
+    
+    def set_mover_backlog(self, backlog_bytes: int, pending_folders: int):
+        """
+        Show what the staging mover still has to move into the library
+        
+        Args:
+            backlog_bytes: Bytes still to be moved
+            pending_folders: Number of folders being moved or waiting
+        """
+        if pending_folders:
+            self.mover_value.setText(f"{format_size(backlog_bytes)} in {pending_folders} folders")
+        else:
+            self.mover_value.setText("-")
+    
     def update_tasks(self, tasks: List[DownloadTask]):
         """Update all tasks"""
         # Update active task count
-        active_count = sum(1 for task in tasks if task.status in [DOWNLOAD_STATUS["QUEUED"], DOWNLOAD_STATUS["DOWNLOADING"]])
+        active_count = sum(1 for task in tasks if task.status in [DOWNLOAD_STATUS["QUEUED"], DOWNLOAD_STATUS["DOWNLOADING"], DOWNLOAD_STATUS["PAUSED"]])
         self.queue_count.setText(f"{active_count} items")
         
         # Update task cards
@@ -273,9 +370,9 @@ class SmartQueueWidget(QWidget):
         eta_text = format_duration(remaining)
         self.eta_value.setText(eta_text)
     
-    def update_bandwidth_graph(self, times, values):
+    def update_bandwidth_graph(self, times, values, limit=0):
         """Update bandwidth graph with new data"""
-        self.bandwidth_graph.update_data(times, values)
+        self.bandwidth_graph.update_data(times, values, limit)
     
     def mousePressEvent(self, event: QMouseEvent):
         """Handle mouse press events for drag and drop"""
@@ -372,9 +469,23 @@ class SmartQueueWidget(QWidget):
             task_url = watched.task.url
             task = watched.task
             
+            # Paused tasks can only be resumed or cancelled
+            if task.status == DOWNLOAD_STATUS["PAUSED"]:
+                resume_action = menu.addAction("Resume")
+                resume_action.triggered.connect(lambda: self.resume_requested.emit(task_url))
+                
+                cancel_action = menu.addAction("Cancel")
+                cancel_action.triggered.connect(lambda: self.cancel_requested.emit(task_url))
+                
+                menu.exec(event.globalPos())
+                return True
+            
             # Only show menu for queued or downloading tasks
             if task.status in [DOWNLOAD_STATUS["QUEUED"], DOWNLOAD_STATUS["DOWNLOADING"]]:
                 # Add context menu actions
+                pause_action = menu.addAction("Pause")
+                pause_action.triggered.connect(lambda: self.pause_requested.emit(task_url))
+                
                 cancel_action = menu.addAction("Cancel")
                 cancel_action.triggered.connect(lambda: self.cancel_requested.emit(task_url))
                 
@@ -383,18 +494,20 @@ class SmartQueueWidget(QWidget):
                 move_top = menu.addAction("Move to Top")
                 move_top.triggered.connect(lambda: self.move_requested.emit(task_url, 0))
                 
+                # Running downloads move among themselves, which sets their bandwidth share
+                cards = [self.tasks_layout.itemAt(i).widget() for i in range(self.tasks_layout.count())]
+                if task.status == DOWNLOAD_STATUS["DOWNLOADING"]:
+                    cards = [card for card in cards
+                             if isinstance(card, DownloadTaskCard) and card.task.status == DOWNLOAD_STATUS["DOWNLOADING"]]
+                
                 # If this isn't the first task
-                current_index = -1
-                for i in range(self.tasks_layout.count()):
-                    if self.tasks_layout.itemAt(i).widget() == watched:
-                        current_index = i
-                        break
+                current_index = cards.index(watched) if watched in cards else -1
                 
                 if current_index > 0:
                     move_up = menu.addAction("Move Up")
                     move_up.triggered.connect(lambda: self.move_requested.emit(task_url, current_index - 1))
                     
-                if current_index < self.tasks_layout.count() - 1 and current_index != -1:
+                if current_index < len(cards) - 1 and current_index != -1:
                     move_down = menu.addAction("Move Down")
                     move_down.triggered.connect(lambda: self.move_requested.emit(task_url, current_index + 1))
                 
@@ -16,8 +16,11 @@ import time
 from src.constants import BASE_MODELS, MODEL_TYPES
 from src.constants.theme import get_theme
 from src.core.download_manager import DownloadManager, DownloadQueue
+from src.core.download_scheduler import DownloadScheduler
 from src.core.storage_manager import StorageManager
 from src.db.models_db import ModelsDatabase
+from src.db.queue_journal import QueueJournal
+from src.models.model_info import ModelInfo
 from src.ui.components.toast_manager import ToastManager
 from src.ui.tabs.download_tab import DownloadTab
 from src.ui.tabs.gallery_tab import GalleryTab
@@ -31,10 +34,11 @@ logger = get_logger(__name__)
 class MainWindow(QMainWindow):
     """Main application window"""
     
-    def __init__(self, config):
+    def __init__(self, config_manager):
         super().__init__()
-        self.config = config
-        self.theme = get_theme(config.get("theme", "dark"))
+        self.config_manager = config_manager
+        self.config = config_manager.config  # Settings dict shared with the services
+        self.theme = get_theme(self.config.get("theme", "dark"))
         self.init_ui()
         self.setup_services()
     
@@ -112,19 +116,26 @@ class MainWindow(QMainWindow):
         comfy_path = self.config.get("comfy_path", "")
         self.storage_manager = StorageManager(comfy_path, self.config)
         
-        # Download queue
-        self.download_queue = DownloadQueue()
+        # Download queue, persisted so a crash or restart doesn't lose it
+        self.queue_journal = QueueJournal()
+        self.download_queue = DownloadQueue(journal=self.queue_journal, library=self.models_db)
         self.download_queue.queue_updated.connect(self.on_queue_updated)
         self.download_queue.task_updated.connect(self.on_task_updated)
+        self.download_queue.queue_reordered.connect(self.download_tab.reorder_queue)
+        restored = self.download_queue.restore()
         
         # Download manager
-        self.download_manager = DownloadManager(self.config)
+        self.download_manager = DownloadManager(self.config, library=self.models_db)
         
-        # Process downloads timer
-        self.process_timer = QTimer(self)
-        self.process_timer.setInterval(1000)  # Check every second
-        self.process_timer.timeout.connect(self.process_download_queue)
-        self.process_timer.start()
+        # Start downloads whenever the queue changes or a slot frees up
+        self.download_scheduler = DownloadScheduler(
+            self.download_queue,
+            self.download_manager,
+            self.config,
+            self.on_download_progress,
+            self.on_download_complete,
+            self
+        )
         
         # Bandwidth monitor update timer
         self.bandwidth_timer = QTimer(self)
@@ -144,6 +155,13 @@ class MainWindow(QMainWindow):
             "info",
             duration=5000
         )
+        
+        if restored:
+            self.toast_manager.show_toast(
+                f"Restored {restored} downloads from the previous session",
+                "info",
+                duration=5000
+            )
     
     def scan_for_models(self):
         """Scan for models in the ComfyUI directory"""
@@ -164,7 +182,7 @@ class MainWindow(QMainWindow):
         if model_data:
             model_id = model_data.get("id")
             if model_id:
-                self.models_db.add_or_update_model(model_id, model_data)
+                self.models_db.add_model(ModelInfo.from_dict(model_data))
     
     def on_queue_updated(self, queue_size):
         """Handle queue update signal"""
@@ -185,13 +203,12 @@ class MainWindow(QMainWindow):
         # If task was completed, add to database
         if task.status == "completed" and task.model_info:
             model_info = task.model_info
-            model_id = model_info.id
             
             # Convert to dictionary for database
             model_data = model_info.to_dict()
             
-            # Add to database
-            self.models_db.add_or_update_model(model_id, model_data)
+            # Add to database, which also lets the queue skip this version from now on
+            self.models_db.add_model(model_info)
             self.models_db.save()
             
             # Refresh gallery if needed
@@ -206,51 +223,8 @@ class MainWindow(QMainWindow):
                 action_text="View"
             )
     
-    def process_download_queue(self):
-        """Process downloads in the queue"""
-        # Skip if already processing
-        if self.download_queue.is_processing:
-            return
-            
-        # Skip if maximum active downloads reached
-        max_downloads = self.config.get("max_concurrent_downloads", 3)
-        if self.download_manager.get_active_downloads_count() >= max_downloads:
-            return
-            
-        # Skip if queue is empty
-        if self.download_queue.is_empty():
-            return
-            
-        # Set processing flag
-        self.download_queue.is_processing = True
-        
-        try:
-            # Get next URL from queue
-            url = self.download_queue.get_next_url()
-            if not url:
-                self.download_queue.is_processing = False
-                return
-                
-            # Start download
-            self.download_manager.start_download(
-                url,
-                self.on_download_progress,
-                self.on_download_complete
-            )
-            
-        except Exception as e:
-            logger.error(f"Error processing download queue: {e}")
-            self.download_queue.is_processing = False
-            
-        # Reset processing flag
-        self.download_queue.is_processing = False
-    
-    def on_download_progress(self, message, model_progress, image_progress, status, bytes_transferred):
+    def on_download_progress(self, task_id, message, model_progress, image_progress, status, bytes_transferred):
         """Handle download progress updates"""
-        url = self.download_queue.current_url
-        if not url:
-            return
-            
         # Update task with progress
         updates = {}
         if message:
@@ -262,17 +236,18 @@ class MainWindow(QMainWindow):
         if image_progress != -1:
             updates["image_progress"] = image_progress
             
+        if bytes_transferred:
+            task = self.download_queue.get_task(task_id)
+            if task:
+                updates["bytes_downloaded"] = task.bytes_downloaded + bytes_transferred
+            
         if updates:
-            self.download_queue.update_task(url, **updates)
+            self.download_queue.update_task(task_id, **updates)
     
-    def on_download_complete(self, success, message, model_info):
+    def on_download_complete(self, task_id, success, message, model_info):
         """Handle download completion"""
-        url = self.download_queue.current_url
-        if not url:
-            return
-            
         # Mark task as completed or failed
-        self.download_queue.complete_task(url, success, message, model_info)
+        self.download_queue.complete_task(task_id, success, message, model_info)
         
         # Log result
         if success:
@@ -286,9 +261,6 @@ class MainWindow(QMainWindow):
                 "error",
                 duration=8000
             )
-        
-        # Reset current URL
-        self.download_queue.current_url = None
     
     def start_batch_download(self, urls):
         """Start batch download of models"""
@@ -309,32 +281,64 @@ class MainWindow(QMainWindow):
     def cancel_download(self, url):
         """Cancel a download"""
         # Cancel active download if it's currently downloading
-        if url == self.download_queue.current_url:
-            self.download_manager.cancel_download(url)
+        if self.download_manager.cancel_download(url):
+            self.download_scheduler.wake()
             
         # Remove from queue
         self.download_queue.cancel_task(url)
     
+    def pause_download(self, url):
+        """Pause a download, keeping its partial file for resuming"""
+        # Stop the active worker if it's currently downloading
+        if self.download_manager.pause_download(url):
+            self.download_scheduler.wake()
+        
+        self.download_queue.pause_task(url)
+    
+    def resume_download(self, url):
+        """Resume a paused download"""
+        self.download_queue.resume_task(url)
+    
     def clear_download_queue(self):
         """Clear the download queue"""
         self.download_queue.clear()
     
     def move_download_in_queue(self, url, new_position):
-        """Move a download in the queue"""
+        """Move a download in the queue, or a running one in the bandwidth priority order"""
         if self.download_queue.move_to_position(url, new_position):
             self.toast_manager.show_toast(
                 "Queue order updated",
                 "info",
                 duration=2000
             )
+        elif self.download_manager.move_download(url, new_position):
+            self.download_tab.reorder_running()
+            self.toast_manager.show_toast(
+                "Download priority updated",
+                "info",
+                duration=2000
+            )
     
     def update_bandwidth_graph(self):
         """Update bandwidth graph with current data"""
+        # Apply the time-of-day rule first so the graph shows its limit
+        self.download_tab.set_schedule(*self.download_scheduler.apply_schedule())
+        
         # Get bandwidth history from download manager
         times, values = self.download_manager.get_bandwidth_stats()
+        limit = self.download_manager.get_bandwidth_limit()
         
         # Update graph in download tab
-        self.download_tab.update_bandwidth_graph(times, values)
+        self.download_tab.update_bandwidth_graph(times, values, limit)
+        
+        # Adapt the concurrency to the measured throughput and fill new slots,
+        # and look again for disk space while queued downloads wait for it
+        if self.download_manager.update_concurrency() or self.download_scheduler.is_waiting_for_space:
+            self.download_scheduler.wake()
+        self.download_tab.set_concurrency(*self.download_manager.get_concurrency())
+        
+        mover_stats = self.download_manager.get_mover_stats()
+        self.download_tab.set_mover_backlog(mover_stats["backlog_bytes"], mover_stats["pending_folders"])
     
     def show_model_details(self, model_data):
         """Show model details dialog"""
@@ -390,18 +394,22 @@ class MainWindow(QMainWindow):
         self.toast_manager.set_theme(self.theme)
         
         # Save config
-        self.config.save()
+        self.config_manager.save_config()
     
     def closeEvent(self, event):
         """Handle window close event"""
         # Save config
-        self.config.save()
+        self.config_manager.save_config()
         
         # Save database
         self.models_db.save()
         
-        # Cancel all active downloads
-        self.download_manager.cancel_all_downloads()
+        # Stop active downloads, keeping partial files and the journal so they resume next time
+        self.download_manager.pause_all_downloads()
+        self.download_manager.wait_for_stopped()
+        self.download_scheduler.size_prober.stop()
+        self.download_manager.shutdown()
+        self.queue_journal.close()
         
         # Accept the event
         event.accept()
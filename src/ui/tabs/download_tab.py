@@ -77,6 +77,8 @@ class DownloadTab(QWidget):
         # Queue widget
         self.queue_widget = SmartQueueWidget(self.theme)
         self.queue_widget.cancel_requested.connect(self.cancel_download)
+        self.queue_widget.pause_requested.connect(self.pause_download)
+        self.queue_widget.resume_requested.connect(self.resume_download)
         self.queue_widget.clear_requested.connect(self.clear_queue)
         self.queue_widget.move_requested.connect(self.move_in_queue)
         
@@ -311,10 +313,29 @@ class DownloadTab(QWidget):
         all_tasks = self.parent_window.download_queue.get_all_tasks()
         self.queue_widget.update_tasks(all_tasks)
     
+    def reorder_queue(self):
+        """Update the order of queued tasks in the queue widget"""
+        queued_tasks = self.parent_window.download_queue.get_queued_tasks()
+        self.queue_widget.reorder_tasks(queued_tasks)
+    
+    def reorder_running(self):
+        """Update the order of running downloads in the queue widget"""
+        tasks = self.parent_window.download_queue.tasks
+        running_tasks = [tasks[url] for url in self.parent_window.download_manager.get_download_order() if url in tasks]
+        self.queue_widget.reorder_tasks(running_tasks)
+    
     def cancel_download(self, url):
         """Signal to cancel a download"""
         self.parent_window.cancel_download(url)
     
+    def pause_download(self, url):
+        """Signal to pause a download"""
+        self.parent_window.pause_download(url)
+    
+    def resume_download(self, url):
+        """Signal to resume a paused download"""
+        self.parent_window.resume_download(url)
+    
     def clear_queue(self):
         """Signal to clear the download queue"""
         self.parent_window.clear_download_queue()
@@ -323,6 +344,18 @@ class DownloadTab(QWidget):
         """Signal to move a download in the queue"""
         self.parent_window.move_download_in_queue(url, new_position)
     
-    def update_bandwidth_graph(self, times, values):
+    def set_concurrency(self, downloads, image_threads, adaptive):
+        """Show the effective concurrency in the queue widget"""
+        self.queue_widget.set_concurrency(downloads, image_threads, adaptive)
+    
+    def set_schedule(self, rule, next_change):
+        """Show the active schedule rule and the next change in the queue widget"""
+        self.queue_widget.set_schedule(rule, next_change)
+    
+    def set_mover_backlog(self, backlog_bytes, pending_folders):
+        """Show the staging mover backlog in the queue widget"""
+        self.queue_widget.set_mover_backlog(backlog_bytes, pending_folders)
+    
+    def update_bandwidth_graph(self, times, values, limit=0):
         """Update bandwidth graph with new data"""
-        self.queue_widget.update_bandwidth_graph(times, values)
+        self.queue_widget.update_bandwidth_graph(times, values, limit)
@@ -8,7 +8,11 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Signal, Qt
 
-from src.constants import APP_THEMES, BASE_MODELS
+from src.constants import (
+    APP_THEMES, BASE_MODELS, SCHEDULING_POLICIES, DISK_FLUSH_POLICIES,
+    FILE_FORMAT_PREFERENCES, FILE_SIZE_PREFERENCES, FILE_FP_PREFERENCES
+)
+from src.core.schedule_rules import parse_rule
 
 class SettingsTab(QWidget):
     """Settings tab for configuring the application"""
@@ -362,6 +366,50 @@ class SettingsTab(QWidget):
         
         comfy_layout.addLayout(comfy_path_layout)
         
+        # Staging folder on a fast local disk
+        staging_group = self.create_styled_group_box("Staging Folder")
+        staging_layout = QVBoxLayout(staging_group)
+        
+        staging_label = QLabel("Download to this folder first and move finished models into the ComfyUI folder (optional):")
+        staging_label.setWordWrap(True)
+        staging_label.setStyleSheet(f"color: {self.theme['text']};")
+        
+        staging_path_layout = QHBoxLayout()
+        self.staging_path_input = QLineEdit()
+        if self.parent and hasattr(self.parent, "config"):
+            self.staging_path_input.setText(self.parent.config.get("staging_path", ""))
+        self.staging_path_input.setPlaceholderText("Fast local folder, leave empty to download directly...")
+        self.staging_path_input.setStyleSheet(f"""
+            QLineEdit {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px 8px;
+            }}
+        """)
+        
+        self.staging_path_btn = QPushButton("Browse")
+        self.staging_path_btn.setStyleSheet(f"""
+            QPushButton {{
+                background-color: {self.theme['text_tertiary']};
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 4px 8px;
+            }}
+            QPushButton:hover {{
+                background-color: {self.theme['text_secondary']};
+            }}
+        """)
+        self.staging_path_btn.clicked.connect(self.browse_staging_path)
+        
+        staging_path_layout.addWidget(self.staging_path_input)
+        staging_path_layout.addWidget(self.staging_path_btn)
+        
+        staging_layout.addWidget(staging_label)
+        staging_layout.addLayout(staging_path_layout)
+        
         # API Key
         api_group = self.create_styled_group_box("Civitai API Key")
         api_layout = QVBoxLayout(api_group)
@@ -387,6 +435,7 @@ class SettingsTab(QWidget):
         api_layout.addWidget(self.api_key_input)
         
         general_layout.addWidget(comfy_group)
+        general_layout.addWidget(staging_group)
         general_layout.addWidget(api_group)
         general_layout.addStretch()
         
@@ -431,6 +480,39 @@ class SettingsTab(QWidget):
             }}
         """)
         
+        # Size caps for images and videos (0 for unlimited)
+        self.max_media_size_input = QSpinBox()
+        self.max_media_size_input.setRange(0, 100000)
+        self.max_media_size_input.setSuffix(" MB")
+        self.max_media_size_input.setSpecialValueText("Unlimited")
+        if self.parent and hasattr(self.parent, "config"):
+            self.max_media_size_input.setValue(self.parent.config.get("max_media_size_mb", 0))
+        self.max_media_size_input.setStyleSheet(f"""
+            QSpinBox {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px;
+            }}
+        """)
+        
+        self.max_media_per_model_input = QSpinBox()
+        self.max_media_per_model_input.setRange(0, 1000000)
+        self.max_media_per_model_input.setSuffix(" MB")
+        self.max_media_per_model_input.setSpecialValueText("Unlimited")
+        if self.parent and hasattr(self.parent, "config"):
+            self.max_media_per_model_input.setValue(self.parent.config.get("max_media_per_model_mb", 0))
+        self.max_media_per_model_input.setStyleSheet(f"""
+            QSpinBox {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px;
+            }}
+        """)
+        
         # Checkboxes
         self.download_images_checkbox = QCheckBox("Download Images")
         if self.parent and hasattr(self.parent, "config"):
@@ -462,16 +544,330 @@ class SettingsTab(QWidget):
             self.auto_open_html_checkbox.setChecked(self.parent.config.get("auto_open_html", False))
         self.auto_open_html_checkbox.setStyleSheet(f"color: {self.theme['text']};")
         
+        # Preferred variant when a version has several model files
+        preferred_file_row = QHBoxLayout()
+        self.file_preference_combos = {}
+        for key, options in [("preferred_file_format", FILE_FORMAT_PREFERENCES),
+                             ("preferred_file_size", FILE_SIZE_PREFERENCES),
+                             ("preferred_file_fp", FILE_FP_PREFERENCES)]:
+            combo = QComboBox()
+            for value, label in options.items():
+                combo.addItem(label, value)
+            if self.parent and hasattr(self.parent, "config"):
+                index = combo.findData(self.parent.config.get(key, "any"))
+                combo.setCurrentIndex(max(0, index))
+            combo.setStyleSheet(f"""
+                QComboBox {{
+                    background-color: {self.theme['input_bg']};
+                    color: {self.theme['text']};
+                    border: 1px solid {self.theme['input_border']};
+                    border-radius: 4px;
+                    padding: 4px 8px;
+                }}
+            """)
+            self.file_preference_combos[key] = combo
+            preferred_file_row.addWidget(combo)
+        
         image_layout.addRow("Max Image Count:", self.top_image_count_input)
         image_layout.addRow("Download Threads:", self.download_threads_input)
+        image_layout.addRow("Max Size per Image/Video:", self.max_media_size_input)
+        image_layout.addRow("Max Media per Model:", self.max_media_per_model_input)
         image_layout.addRow(self.download_images_checkbox)
         image_layout.addRow(self.download_model_checkbox)
+        image_layout.addRow("Preferred Model File:", preferred_file_row)
         image_layout.addRow(self.create_html_checkbox)
         image_layout.addRow(self.download_nsfw_checkbox)
         image_layout.addRow(self.auto_organize_checkbox)
         image_layout.addRow(self.auto_open_html_checkbox)
         
+        # Transfer settings
+        transfer_group = self.create_styled_group_box("Transfer Settings")
+        transfer_layout = QFormLayout(transfer_group)
+        
+        # Parallel connections per model file
+        self.download_segments_input = QSpinBox()
+        self.download_segments_input.setRange(1, 16)
+        if self.parent and hasattr(self.parent, "config"):
+            self.download_segments_input.setValue(self.parent.config.get("download_segments", 4))
+        self.download_segments_input.setStyleSheet(f"""
+            QSpinBox {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px;
+            }}
+        """)
+        
+        # Minimum size for segmented downloads
+        self.segment_min_size_input = QSpinBox()
+        self.segment_min_size_input.setRange(1, 100000)
+        self.segment_min_size_input.setSuffix(" MB")
+        if self.parent and hasattr(self.parent, "config"):
+            self.segment_min_size_input.setValue(self.parent.config.get("segment_min_size_mb", 100))
+        self.segment_min_size_input.setStyleSheet(f"""
+            QSpinBox {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px;
+            }}
+        """)
+        
+        # Bandwidth limit shared by all downloads
+        self.bandwidth_limit_input = QSpinBox()
+        self.bandwidth_limit_input.setRange(0, 1000000)
+        self.bandwidth_limit_input.setSingleStep(256)
+        self.bandwidth_limit_input.setSuffix(" KB/s")
+        self.bandwidth_limit_input.setSpecialValueText("Unlimited")
+        if self.parent and hasattr(self.parent, "config"):
+            self.bandwidth_limit_input.setValue(self.parent.config.get("bandwidth_limit_kbps", 0))
+        self.bandwidth_limit_input.setStyleSheet(f"""
+            QSpinBox {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px;
+            }}
+        """)
+        
+        # Download engine
+        self.download_engine_combo = QComboBox()
+        self.download_engine_combo.addItem("Thread per download", "threads")
+        self.download_engine_combo.addItem("Asyncio (single event loop)", "asyncio")
+        if self.parent and hasattr(self.parent, "config"):
+            engine = self.parent.config.get("download_engine", "threads")
+            for i in range(self.download_engine_combo.count()):
+                if self.download_engine_combo.itemData(i) == engine:
+                    self.download_engine_combo.setCurrentIndex(i)
+                    break
+        self.download_engine_combo.setStyleSheet(f"""
+            QComboBox {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px 8px;
+            }}
+        """)
+        
+        # Order in which queued downloads start
+        self.scheduling_policy_combo = QComboBox()
+        for policy, label in SCHEDULING_POLICIES.items():
+            self.scheduling_policy_combo.addItem(label, policy)
+        if self.parent and hasattr(self.parent, "config"):
+            policy = self.parent.config.get("scheduling_policy", "fifo")
+            for i in range(self.scheduling_policy_combo.count()):
+                if self.scheduling_policy_combo.itemData(i) == policy:
+                    self.scheduling_policy_combo.setCurrentIndex(i)
+                    break
+        self.scheduling_policy_combo.setStyleSheet(f"""
+            QComboBox {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px 8px;
+            }}
+        """)
+        
+        # Size from which a model file takes the large slot of the mixed policy
+        self.large_file_threshold_input = QSpinBox()
+        self.large_file_threshold_input.setRange(1, 1000000)
+        self.large_file_threshold_input.setSingleStep(512)
+        self.large_file_threshold_input.setSuffix(" MB")
+        if self.parent and hasattr(self.parent, "config"):
+            self.large_file_threshold_input.setValue(self.parent.config.get("large_file_threshold_mb", 2048))
+        self.large_file_threshold_input.setStyleSheet(f"""
+            QSpinBox {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px;
+            }}
+        """)
+        
+        # Queued downloads whose model info is resolved ahead of their start
+        self.metadata_lookahead_input = QSpinBox()
+        self.metadata_lookahead_input.setRange(0, 100)
+        self.metadata_lookahead_input.setSuffix(" downloads")
+        self.metadata_lookahead_input.setSpecialValueText("Off")
+        if self.parent and hasattr(self.parent, "config"):
+            self.metadata_lookahead_input.setValue(self.parent.config.get("metadata_lookahead", 5))
+        self.metadata_lookahead_input.setStyleSheet(f"""
+            QSpinBox {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px;
+            }}
+        """)
+        
+        # Write-behind buffer between network reads and disk writes (used after a restart)
+        self.write_buffer_input = QSpinBox()
+        self.write_buffer_input.setRange(0, 4096)
+        self.write_buffer_input.setSingleStep(16)
+        self.write_buffer_input.setSuffix(" MB")
+        self.write_buffer_input.setSpecialValueText("Write directly")
+        if self.parent and hasattr(self.parent, "config"):
+            self.write_buffer_input.setValue(self.parent.config.get("write_buffer_mb", 64))
+        self.write_buffer_input.setStyleSheet(f"""
+            QSpinBox {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px;
+            }}
+        """)
+        
+        # When written model files are synced to disk
+        self.disk_flush_policy_combo = QComboBox()
+        for policy, label in DISK_FLUSH_POLICIES.items():
+            self.disk_flush_policy_combo.addItem(label, policy)
+        if self.parent and hasattr(self.parent, "config"):
+            policy = self.parent.config.get("disk_flush_policy", "none")
+            for i in range(self.disk_flush_policy_combo.count()):
+                if self.disk_flush_policy_combo.itemData(i) == policy:
+                    self.disk_flush_policy_combo.setCurrentIndex(i)
+                    break
+        self.disk_flush_policy_combo.setStyleSheet(f"""
+            QComboBox {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px 8px;
+            }}
+        """)
+        
+        # Space left free on the models volume
+        self.min_free_space_input = QSpinBox()
+        self.min_free_space_input.setRange(0, 1000000)
+        self.min_free_space_input.setSingleStep(512)
+        self.min_free_space_input.setSuffix(" MB")
+        if self.parent and hasattr(self.parent, "config"):
+            self.min_free_space_input.setValue(self.parent.config.get("min_free_space_mb", 1024))
+        self.min_free_space_input.setStyleSheet(f"""
+            QSpinBox {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px;
+            }}
+        """)
+        
+        # Partial files of cancelled downloads
+        self.keep_partial_checkbox = QCheckBox("Keep partial files of cancelled downloads")
+        if self.parent and hasattr(self.parent, "config"):
+            self.keep_partial_checkbox.setChecked(self.parent.config.get("keep_partial_on_cancel", False))
+        self.keep_partial_checkbox.setStyleSheet(f"color: {self.theme['text']};")
+        
+        # Running downloads share a bandwidth limit by their order in the queue
+        self.priority_bandwidth_checkbox = QCheckBox("Give downloads higher in the queue more of the bandwidth limit")
+        if self.parent and hasattr(self.parent, "config"):
+            self.priority_bandwidth_checkbox.setChecked(self.parent.config.get("priority_bandwidth", True))
+        self.priority_bandwidth_checkbox.setStyleSheet(f"color: {self.theme['text']};")
+        
+        # Multiplexes image fetches when httpx[http2] is installed (used after a restart)
+        self.media_http2_checkbox = QCheckBox("Fetch images over HTTP/2 (needs httpx[http2])")
+        if self.parent and hasattr(self.parent, "config"):
+            self.media_http2_checkbox.setChecked(self.parent.config.get("media_http2", False))
+        self.media_http2_checkbox.setStyleSheet(f"color: {self.theme['text']};")
+        
+        transfer_layout.addRow("Download Engine:", self.download_engine_combo)
+        transfer_layout.addRow("Connections per File:", self.download_segments_input)
+        transfer_layout.addRow("Segment Files Above:", self.segment_min_size_input)
+        transfer_layout.addRow("Bandwidth Limit:", self.bandwidth_limit_input)
+        transfer_layout.addRow("Download Order:", self.scheduling_policy_combo)
+        transfer_layout.addRow("Large Files From:", self.large_file_threshold_input)
+        transfer_layout.addRow("Prepare Ahead:", self.metadata_lookahead_input)
+        transfer_layout.addRow("Keep Free Space:", self.min_free_space_input)
+        transfer_layout.addRow("Write Buffer:", self.write_buffer_input)
+        transfer_layout.addRow("Sync to Disk:", self.disk_flush_policy_combo)
+        transfer_layout.addRow(self.keep_partial_checkbox)
+        transfer_layout.addRow(self.priority_bandwidth_checkbox)
+        transfer_layout.addRow(self.media_http2_checkbox)
+        
+        # Adaptive concurrency settings
+        adaptive_group = self.create_styled_group_box("Adaptive Concurrency")
+        adaptive_layout = QFormLayout(adaptive_group)
+        
+        self.adaptive_concurrency_checkbox = QCheckBox("Adjust concurrency to measured throughput")
+        if self.parent and hasattr(self.parent, "config"):
+            self.adaptive_concurrency_checkbox.setChecked(self.parent.config.get("adaptive_concurrency", False))
+        self.adaptive_concurrency_checkbox.setStyleSheet(f"color: {self.theme['text']};")
+        
+        # Bounds for downloads and image workers
+        spin_style = f"""
+            QSpinBox {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px;
+            }}
+        """
+        self.adaptive_bound_inputs = {}
+        for key, default in [("adaptive_min_downloads", 1), ("adaptive_max_downloads", 8),
+                             ("adaptive_min_image_threads", 1), ("adaptive_max_image_threads", 8)]:
+            spin_box = QSpinBox()
+            spin_box.setRange(1, 32)
+            if self.parent and hasattr(self.parent, "config"):
+                spin_box.setValue(self.parent.config.get(key, default))
+            spin_box.setStyleSheet(spin_style)
+            self.adaptive_bound_inputs[key] = spin_box
+        
+        downloads_row = QHBoxLayout()
+        downloads_row.addWidget(self.adaptive_bound_inputs["adaptive_min_downloads"])
+        downloads_row.addWidget(QLabel("to"))
+        downloads_row.addWidget(self.adaptive_bound_inputs["adaptive_max_downloads"])
+        
+        images_row = QHBoxLayout()
+        images_row.addWidget(self.adaptive_bound_inputs["adaptive_min_image_threads"])
+        images_row.addWidget(QLabel("to"))
+        images_row.addWidget(self.adaptive_bound_inputs["adaptive_max_image_threads"])
+        
+        adaptive_layout.addRow(self.adaptive_concurrency_checkbox)
+        adaptive_layout.addRow("Concurrent Downloads:", downloads_row)
+        adaptive_layout.addRow("Image Workers:", images_row)
+        
+        # Time-of-day windows overriding the bandwidth limit and concurrency
+        schedule_group = self.create_styled_group_box("Download Schedule")
+        schedule_layout = QVBoxLayout(schedule_group)
+        
+        schedule_label = QLabel(
+            "One rule per line, e.g. \"00:00-07:00 unlimited\" or \"09:00-19:00 2 MB/s max 1\".\n"
+            "The first matching rule applies; outside all rules the settings above apply."
+        )
+        schedule_label.setStyleSheet(f"color: {self.theme['text']};")
+        
+        self.schedule_rules_input = QPlainTextEdit()
+        self.schedule_rules_input.setMaximumHeight(100)
+        if self.parent and hasattr(self.parent, "config"):
+            self.schedule_rules_input.setPlainText("\n".join(self.parent.config.get("schedule_rules", [])))
+        self.schedule_rules_input.setStyleSheet(f"""
+            QPlainTextEdit {{
+                background-color: {self.theme['input_bg']};
+                color: {self.theme['text']};
+                border: 1px solid {self.theme['input_border']};
+                border-radius: 4px;
+                padding: 4px;
+            }}
+        """)
+        
+        schedule_layout.addWidget(schedule_label)
+        schedule_layout.addWidget(self.schedule_rules_input)
+        
         download_layout.addWidget(image_group)
+        download_layout.addWidget(transfer_group)
+        download_layout.addWidget(adaptive_group)
+        download_layout.addWidget(schedule_group)
         download_layout.addStretch()
         
         self.settings_stack.addWidget(download_page)
@@ -767,6 +1163,12 @@ class SettingsTab(QWidget):
         if directory:
             self.comfy_path_input.setText(directory)
     
+    def browse_staging_path(self):
+        """Browse for the staging directory"""
+        directory = QFileDialog.getExistingDirectory(self, "Select Staging Directory")
+        if directory:
+            self.staging_path_input.setText(directory)
+    
     def on_theme_changed(self, button):
         """Handle theme change"""
         theme_id = button.property("theme_id")
@@ -815,11 +1217,63 @@ class SettingsTab(QWidget):
         
         # General settings
         config["comfy_path"] = self.comfy_path_input.text()
+        config["staging_path"] = self.staging_path_input.text().strip()
         config["api_key"] = self.api_key_input.text()
         
         # Download settings
         config["top_image_count"] = self.top_image_count_input.value()
         config["download_threads"] = self.download_threads_input.value()
+        config["max_media_size_mb"] = self.max_media_size_input.value()
+        config["max_media_per_model_mb"] = self.max_media_per_model_input.value()
+        config["download_segments"] = self.download_segments_input.value()
+        config["segment_min_size_mb"] = self.segment_min_size_input.value()
+        config["bandwidth_limit_kbps"] = self.bandwidth_limit_input.value()
+        config["download_engine"] = self.download_engine_combo.currentData()
+        config["keep_partial_on_cancel"] = self.keep_partial_checkbox.isChecked()
+        config["priority_bandwidth"] = self.priority_bandwidth_checkbox.isChecked()
+        config["media_http2"] = self.media_http2_checkbox.isChecked()
+        config["min_free_space_mb"] = self.min_free_space_input.value()
+        config["scheduling_policy"] = self.scheduling_policy_combo.currentData()
+        config["large_file_threshold_mb"] = self.large_file_threshold_input.value()
+        config["metadata_lookahead"] = self.metadata_lookahead_input.value()
+        config["write_buffer_mb"] = self.write_buffer_input.value()
+        config["disk_flush_policy"] = self.disk_flush_policy_combo.currentData()
+        for key, combo in self.file_preference_combos.items():
+            config[key] = combo.currentData()
+        config["adaptive_concurrency"] = self.adaptive_concurrency_checkbox.isChecked()
+        for key, spin_box in self.adaptive_bound_inputs.items():
+            config[key] = spin_box.value()
+        
+        # Keep the bounds ordered
+        if config["adaptive_min_downloads"] > config["adaptive_max_downloads"]:
+            config["adaptive_max_downloads"] = config["adaptive_min_downloads"]
+        if config["adaptive_min_image_threads"] > config["adaptive_max_image_threads"]:
+            config["adaptive_max_image_threads"] = config["adaptive_min_image_threads"]
+        
+        # Get schedule rules
+        schedule_rules = self.schedule_rules_input.toPlainText().split("\n")
+        schedule_rules = [rule.strip() for rule in schedule_rules if rule.strip()]
+        config["schedule_rules"] = schedule_rules
+        invalid_rules = []
+        for rule in schedule_rules:
+            try:
+                parse_rule(rule)
+            except ValueError as e:
+                invalid_rules.append(str(e))
+        if invalid_rules:
+            from PySide6.QtWidgets import QMessageBox
+            
+            QMessageBox.warning(
+                self, "Download Schedule",
+                "These rules are ignored until they are fixed:\n\n" + "\n".join(invalid_rules)
+            )
+        
+        # Apply the bandwidth limit, or the schedule rule replacing it, to running downloads right away
+        if hasattr(self.parent, "download_scheduler"):
+            self.parent.download_scheduler.apply_schedule()
+        if hasattr(self.parent, "download_manager"):
+            self.parent.download_manager.apply_file_preferences()
+            self.parent.download_manager.update_bandwidth_weights()
         config["download_images"] = self.download_images_checkbox.isChecked()
         config["download_model"] = self.download_model_checkbox.isChecked()
         config["create_html"] = self.create_html_checkbox.isChecked()
@@ -841,5 +1295,5 @@ class SettingsTab(QWidget):
         config["auto_check_updates"] = self.auto_check_updates_checkbox.isChecked()
         
         # Save and signal
-        self.parent.config_manager.save()
+        self.parent.config_manager.save_config()
         self.settings_saved.emit()
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Bandwidth limiting utility
+"""
+import heapq
+import itertools
+import time
+import threading
+from typing import Dict, Hashable, Optional
+
+class BandwidthLimiter:
+    """
+    Token bucket limiting the combined transfer rate of all downloads
+
+    Callers may name the flow (transfer) their bytes belong to. While the
+    bucket is short, waiting callers are served in weighted fair order:
+    every request gets a virtual finish time of its size divided by its
+    flow's weight, counted from where the flow or the limiter left off,
+    and the earliest finish goes next. Backlogged flows therefore share the
+    rate in proportion to their weights, and a flow that has nothing to
+    send leaves its share to the others.
+    """
+
+    def __init__(self, rate=0, burst_seconds=1.0):
+        """
+        Initialize bandwidth limiter
+
+        Args:
+            rate: Maximum rate in bytes per second (0 for unlimited)
+            burst_seconds: How many seconds of unused rate may be saved up
+        """
+        self.rate = max(0, int(rate))
+        self.burst_seconds = burst_seconds
+        self.tokens = 0.0
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+
+        # Weighted fair queueing
+        self.weights = {}  # flow -> weight, 1 for flows not listed
+        self.finish_times = {}  # flow -> virtual finish time of its last request
+        self.virtual_time = 0.0  # Finish time of the request served last
+        self.waiting = []  # Heap of (finish time, sequence) of waiting requests
+        self.sequence = itertools.count()
+
+    def _refill(self):
+        """Add the tokens earned since the last refill (lock must be held)"""
+        now = time.monotonic()
+        capacity = self.rate * self.burst_seconds
+        self.tokens = min(capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def set_rate(self, rate):
+        """
+        Change the maximum rate, taking effect for transfers already running
+
+        Args:
+            rate: Maximum rate in bytes per second (0 for unlimited)
+        """
+        with self.condition:
+            self._refill()
+            self.rate = max(0, int(rate))
+            self.tokens = min(self.tokens, self.rate * self.burst_seconds)
+            self.condition.notify_all()
+
+    def get_rate(self):
+        """Get the maximum rate in bytes per second (0 for unlimited)"""
+        return self.rate
+
+    def is_limited(self):
+        """Check if a limit is set"""
+        return self.rate > 0
+
+    def set_weights(self, weights: Dict[Hashable, float]):
+        """
+        Set the bandwidth weights of the flows, taking effect for their next requests
+
+        Args:
+            weights: Weight per flow; flows not listed get a weight of 1
+        """
+        with self.condition:
+            self.weights = dict(weights)
+            # Forget flows that are gone
+            for flow in list(self.finish_times):
+                if flow not in self.weights:
+                    del self.finish_times[flow]
+
+    def consume(self, num_bytes, flow: Optional[Hashable] = None):
+        """
+        Take bytes from the bucket, blocking until the rate allows them
+
+        A request waits for its turn and for the bucket to be out of debt,
+        then takes all its bytes at once, which may put the bucket into debt
+        again, so reads larger than the bucket work.
+
+        Args:
+            num_bytes: Number of bytes transferred
+            flow: Key of the transfer the bytes belong to, for weighted sharing
+        """
+        with self.condition:
+            if self.rate <= 0:
+                return
+
+            weight = max(self.weights.get(flow, 1), 1e-3)
+            finish = max(self.virtual_time, self.finish_times.get(flow, 0.0)) + num_bytes / weight
+            self.finish_times[flow] = finish
+            entry = (finish, next(self.sequence))
+            heapq.heappush(self.waiting, entry)
+
+            try:
+                while True:
+                    if self.rate <= 0:
+                        return
+                    self._refill()
+                    if self.waiting[0] == entry and self.tokens >= 0:
+                        heapq.heappop(self.waiting)
+                        self.tokens -= num_bytes
+                        self.virtual_time = finish
+                        self.condition.notify_all()
+                        return
+                    # Wake up regularly so rate changes apply right away
+                    wait = min(-self.tokens / self.rate, 0.1) if self.tokens < 0 else 0.1
+                    self.condition.wait(wait)
+            finally:
+                if entry in self.waiting:
+                    # Left without being served (limit removed)
+                    self.waiting.remove(entry)
+                    heapq.heapify(self.waiting)
+                    self.condition.notify_all()
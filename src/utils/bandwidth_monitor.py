@@ -27,6 +27,7 @@ class BandwidthMonitor:
         
         self.total_bytes = 0
         self.started_at = time.time()
+        self.limit = 0  # Bandwidth limit in bytes per second (0 for unlimited)
         self.lock = threading.Lock()
     
     def add_data_point(self, bytes_transferred: int):
@@ -37,6 +38,21 @@ class BandwidthMonitor:
             self.bytes_values.append(bytes_transferred)
             self.total_bytes += bytes_transferred
     
+    def set_limit(self, bytes_per_second: int):
+        """Record the bandwidth limit currently applied to downloads"""
+        with self.lock:
+            self.limit = bytes_per_second
+    
+    def get_limit(self) -> int:
+        """
+        Get the bandwidth limit currently applied to downloads
+        
+        Returns:
+            Limit in bytes per second, 0 if unlimited
+        """
+        with self.lock:
+            return self.limit
+    
     def get_current_bandwidth(self) -> float:
         """
         Get current bandwidth in bytes per second
@@ -56,6 +72,16 @@ class BandwidthMonitor:
             bytes_sum = sum(self.bytes_values)
             return bytes_sum / time_diff
     
+    def get_total_bytes(self) -> int:
+        """
+        Get the number of bytes transferred since start
+        
+        Returns:
+            Total bytes
+        """
+        with self.lock:
+            return self.total_bytes
+    
     def get_average_bandwidth(self) -> float:
         """
         Get average bandwidth since start in bytes per second
@@ -33,6 +33,38 @@ class ConfigManager:
             "auto_open_html": False,
             "api_key": "",
             "download_threads": 3,
+            "media_host_limits": {"civitai.com": 2, "image.civitai.com": 6},
+            "media_default_host_limit": 4,
+            "media_http2": False,
+            "max_media_size_mb": 0,
+            "max_media_per_model_mb": 0,
+            "download_segments": 4,
+            "segment_min_size_mb": 100,
+            "bandwidth_limit_kbps": 0,
+            "schedule_rules": [],
+            "priority_bandwidth": True,
+            "keep_partial_on_cancel": False,
+            "min_free_space_mb": 1024,
+            "write_buffer_mb": 64,
+            "disk_writer_threads": 2,
+            "disk_flush_policy": "none",
+            "preferred_file_format": "any",
+            "preferred_file_size": "any",
+            "preferred_file_fp": "any",
+            "scheduling_policy": "fifo",
+            "large_file_threshold_mb": 2048,
+            "metadata_lookahead": 5,
+            "metadata_workers": 2,
+            "media_stage_backlog": 4,
+            "post_process_workers": 1,
+            "staging_path": "",
+            "mover_workers": 1,
+            "download_engine": "threads",
+            "adaptive_concurrency": False,
+            "adaptive_min_downloads": 1,
+            "adaptive_max_downloads": 8,
+            "adaptive_min_image_threads": 1,
+            "adaptive_max_image_threads": 8,
             "fetch_batch_size": 100,
             "log_level": "info"
         }
@@ -0,0 +1,260 @@
+"""
+Write-behind disk writer utility
+"""
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class FileWriter:
+    """
+    Write-behind handle for one open file
+
+    Writes are queued to the writer thread the handle is pinned to, so they
+    reach the file in order. written only counts bytes that were flushed to
+    the file, which makes it safe to use as a resume point.
+    """
+
+    def __init__(self, disk_writer: 'DiskWriter', f, writer_index: int,
+                 on_written: Optional[Callable[[int], None]] = None):
+        self.disk_writer = disk_writer
+        self.f = f
+        self.writer_index = writer_index
+        self.on_written = on_written
+        self.written = 0  # Bytes written to the file so far
+        self.pending = 0  # Writes queued but not done yet
+        self.error = None  # First write error, raised to the reader
+        self.last_fsync = time.monotonic()
+
+    def write(self, data):
+        """
+        Queue data to be written, waiting while the buffer budget is full
+
+        Args:
+            data: Bytes or a memoryview; it is copied, so the caller may reuse its buffer
+
+        Raises:
+            OSError: If an earlier write to this file failed
+        """
+        if self.error:
+            raise self.error
+        self.disk_writer._submit(self, data)
+
+    def close(self):
+        """
+        Wait for the queued writes and apply the flush policy
+
+        The file object itself stays open and belongs to the caller.
+
+        Raises:
+            OSError: If a write to this file failed
+        """
+        self.disk_writer._drain(self)
+        if self.error:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()
+        except Exception:
+            # Don't hide the exception that ended the transfer
+            if exc_type is None:
+                raise
+
+
+class DiskWriter:
+    """
+    Bounded write-behind stage between network reads and disk writes
+
+    Readers hand their chunks to dedicated writer threads so a slow disk
+    (e.g. a NAS-backed models folder) doesn't stall the socket reads. The
+    bytes waiting to be written are capped by the buffer budget; a reader
+    that would exceed it waits, and that wait is counted as stall time.
+    With a budget of 0 every write happens inline on the calling thread.
+
+    Flush policies:
+        none: leave flushing to the OS
+        close: fsync each file once its transfer ends
+        periodic: fsync every FSYNC_INTERVAL seconds while writing, and on close
+    """
+
+    FSYNC_INTERVAL = 5.0
+
+    def __init__(self, buffer_size: int = 0, threads: int = 2, flush_policy: str = "none"):
+        """
+        Initialize the writer
+
+        Args:
+            buffer_size: Maximum bytes waiting to be written (0 writes inline)
+            threads: Number of writer threads
+            flush_policy: When to fsync written files (none, close or periodic)
+        """
+        self.buffer_size = max(0, buffer_size)
+        self.flush_policy = flush_policy
+        self.condition = threading.Condition()
+        self.queues = []
+        self.next_writer = 0
+
+        # Statistics
+        self.buffered_bytes = 0
+        self.peak_buffered_bytes = 0
+        self.stall_time = 0.0
+        self.write_time = 0.0
+        self.bytes_written = 0
+        self.fsyncs = 0
+
+        if self.buffer_size:
+            for i in range(max(1, threads)):
+                write_queue = queue.Queue()
+                self.queues.append(write_queue)
+                threading.Thread(target=self._run, args=(write_queue,), name=f"disk-writer-{i}", daemon=True).start()
+
+    def attach(self, f, on_written: Optional[Callable[[int], None]] = None) -> FileWriter:
+        """
+        Start writing to an open file through the writer
+
+        Args:
+            f: File object positioned where the writes go
+            on_written: Called with the size of each write once it is in the file
+
+        Returns:
+            FileWriter to write through and close when the transfer ends
+        """
+        with self.condition:
+            writer_index = self.next_writer
+            if self.queues:
+                self.next_writer = (self.next_writer + 1) % len(self.queues)
+        return FileWriter(self, f, writer_index, on_written)
+
+    def _submit(self, handle: FileWriter, data):
+        """Write inline or queue a copy of data for the handle's writer thread"""
+        if not self.queues:
+            self._write(handle, data)
+            return
+
+        data = bytes(data)
+        size = len(data)
+        with self.condition:
+            # A single write larger than the budget still goes through once the buffer is empty
+            stalled_since = None
+            while self.buffered_bytes and self.buffered_bytes + size > self.buffer_size:
+                if stalled_since is None:
+                    stalled_since = time.monotonic()
+                self.condition.wait()
+            if stalled_since is not None:
+                self.stall_time += time.monotonic() - stalled_since
+
+            self.buffered_bytes += size
+            self.peak_buffered_bytes = max(self.peak_buffered_bytes, self.buffered_bytes)
+            handle.pending += 1
+        self.queues[handle.writer_index].put((handle, data))
+
+    def _write(self, handle: FileWriter, data):
+        """Write data to the handle's file and apply the periodic flush policy"""
+        started = time.monotonic()
+        view = memoryview(data)
+        while view:
+            # Unbuffered files may take only part of a write
+            n = handle.f.write(view)
+            view = view[n if n is not None else len(view):]
+
+        # Only count bytes that left the file object's buffer, so written is a
+        # safe resume point if the process dies; chunks larger than the buffer
+        # went straight to the file already
+        handle.f.flush()
+
+        synced = False
+        if self.flush_policy == "periodic" and started - handle.last_fsync >= self.FSYNC_INTERVAL:
+            os.fsync(handle.f.fileno())
+            handle.last_fsync = time.monotonic()
+            synced = True
+
+        with self.condition:
+            self.write_time += time.monotonic() - started
+            self.bytes_written += len(data)
+            self.fsyncs += synced
+        handle.written += len(data)
+        if handle.on_written:
+            handle.on_written(len(data))
+
+    def _run(self, write_queue: queue.Queue):
+        """Writer thread loop"""
+        while True:
+            handle, data = write_queue.get()
+            try:
+                if handle.error is None:
+                    self._write(handle, data)
+            except Exception as e:
+                logger.error(f"Error writing to {getattr(handle.f, 'name', 'file')}: {e}")
+                handle.error = e
+            finally:
+                with self.condition:
+                    self.buffered_bytes -= len(data)
+                    handle.pending -= 1
+                    self.condition.notify_all()
+
+    def _drain(self, handle: FileWriter):
+        """Wait until the handle has no queued writes, then fsync if the policy asks for it"""
+        with self.condition:
+            while handle.pending:
+                self.condition.wait()
+
+        if handle.error is None and self.flush_policy in ("close", "periodic"):
+            handle.f.flush()
+            os.fsync(handle.f.fileno())
+            with self.condition:
+                self.fsyncs += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get write-behind statistics
+
+        Returns:
+            Dictionary with buffered_bytes, peak_buffered_bytes, buffer_size,
+            stall_time (seconds readers waited for the budget), write_time,
+            bytes_written and fsyncs
+        """
+        with self.condition:
+            return {
+                "buffered_bytes": self.buffered_bytes,
+                "peak_buffered_bytes": self.peak_buffered_bytes,
+                "buffer_size": self.buffer_size,
+                "stall_time": self.stall_time,
+                "write_time": self.write_time,
+                "bytes_written": self.bytes_written,
+                "fsyncs": self.fsyncs,
+            }
+
+    def log_stats(self):
+        """Log write-behind statistics for diagnostics"""
+        stats = self.get_stats()
+        logger.debug(
+            f"Disk writer: {stats['bytes_written']} bytes written in {stats['write_time']:.1f}s, "
+            f"{stats['buffered_bytes']} buffered (peak {stats['peak_buffered_bytes']}), "
+            f"readers stalled {stats['stall_time']:.1f}s, {stats['fsyncs']} fsyncs"
+        )
+
+
+def create_disk_writer(config: Dict[str, Any]) -> DiskWriter:
+    """
+    Create the disk writer from the download configuration
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        DiskWriter with write_buffer_mb of buffer (0 writes inline)
+    """
+    return DiskWriter(
+        buffer_size=config.get("write_buffer_mb", 64) * 1024 * 1024,
+        threads=config.get("disk_writer_threads", 2),
+        flush_policy=config.get("disk_flush_policy", "none")
+    )
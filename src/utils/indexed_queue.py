@@ -0,0 +1,141 @@
+"""
+Indexed ordered queue utility
+"""
+from typing import Dict, Hashable, Iterator, List
+
+class IndexedQueue:
+    """
+    Ordered queue of unique items with fast removal and repositioning
+
+    Items are kept in a list of small blocks with an item -> block index.
+    Every operation touches one block plus, at most, the list of blocks, so
+    enqueue, dequeue, remove and move stay fast with tens of thousands of
+    entries instead of shifting the whole queue like list.pop(0),
+    list.remove and list.insert do.
+    """
+
+    BLOCK_SIZE = 256
+
+    def __init__(self, items=None):
+        """
+        Initialize the queue
+
+        Args:
+            items: Optional initial items in queue order
+        """
+        self._blocks: List[List[Hashable]] = []
+        self._block_of: Dict[Hashable, List[Hashable]] = {}
+        for item in items or []:
+            self.append(item)
+
+    def __len__(self):
+        return len(self._block_of)
+
+    def __contains__(self, item):
+        return item in self._block_of
+
+    def __iter__(self) -> Iterator[Hashable]:
+        for block in self._blocks:
+            yield from block
+
+    def _block_index(self, block: List[Hashable]) -> int:
+        """Get the position of a block in the block list"""
+        for i, candidate in enumerate(self._blocks):
+            if candidate is block:
+                return i
+        raise ValueError("block not in queue")
+
+    def _split(self, i: int):
+        """Split block i in two if it grew too large"""
+        block = self._blocks[i]
+        if len(block) <= 2 * self.BLOCK_SIZE:
+            return
+
+        tail = block[self.BLOCK_SIZE:]
+        del block[self.BLOCK_SIZE:]
+        self._blocks.insert(i + 1, tail)
+        for item in tail:
+            self._block_of[item] = tail
+
+    def _drop_if_empty(self, block: List[Hashable]):
+        """Remove a block from the block list once it has no items left"""
+        if not block:
+            del self._blocks[self._block_index(block)]
+
+    def append(self, item: Hashable):
+        """Add an item to the end of the queue"""
+        self.insert(len(self._block_of), item)
+
+    def insert(self, position: int, item: Hashable):
+        """
+        Insert an item at a position
+
+        Args:
+            position: Position in queue order, clamped to the queue bounds
+            item: Item to insert; it must not be in the queue already
+        """
+        if item in self._block_of:
+            raise ValueError(f"item already queued: {item!r}")
+
+        if not self._blocks:
+            self._blocks.append([])
+
+        position = min(max(0, position), len(self._block_of))
+        if position == len(self._block_of):
+            # Fast path for appends
+            i = len(self._blocks) - 1
+            offset = len(self._blocks[i])
+        else:
+            for i, block in enumerate(self._blocks):
+                if position < len(block):
+                    offset = position
+                    break
+                position -= len(block)
+
+        block = self._blocks[i]
+        block.insert(offset, item)
+        self._block_of[item] = block
+        self._split(i)
+
+    def pop_first(self) -> Hashable:
+        """Remove and return the first item"""
+        if not self._block_of:
+            raise IndexError("pop from empty queue")
+        block = self._blocks[0]
+        item = block.pop(0)
+        del self._block_of[item]
+        if not block:
+            del self._blocks[0]
+        return item
+
+    def remove(self, item: Hashable):
+        """Remove an item from anywhere in the queue"""
+        block = self._block_of.pop(item)
+        block.remove(item)
+        self._drop_if_empty(block)
+
+    def move(self, item: Hashable, position: int):
+        """
+        Move an item to a position
+
+        Args:
+            item: Item in the queue
+            position: New position, counted without the item itself
+        """
+        self.remove(item)
+        self.insert(position, item)
+
+    def index(self, item: Hashable) -> int:
+        """Get the position of an item in queue order"""
+        block = self._block_of[item]
+        position = 0
+        for candidate in self._blocks:
+            if candidate is block:
+                return position + block.index(item)
+            position += len(candidate)
+        raise ValueError("block not in queue")
+
+    def clear(self):
+        """Remove all items"""
+        self._blocks.clear()
+        self._block_of.clear()